@@ -1,6 +1,11 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
+
+import memoria_compartilhada
+from grafo_csr import GrafoCSR
 
 
 matriz_distancias = np.array([
@@ -16,37 +21,224 @@ matriz_distancias = np.array([
 cidades = ['A', 'B', 'C', 'D', 'E', 'F']
 
 
-def dijkstra(grafo, inicio):
-    n = len(grafo)
+def linha_esparsa(linha):
+    return isinstance(linha, dict) or (len(linha) > 0 and isinstance(linha[0], (tuple, list)))
+
+
+def lista_adjacencia(grafo):
+    if isinstance(grafo, np.ndarray):
+        linhas, colunas = np.nonzero(grafo > 0)
+        pesos = grafo[linhas, colunas].tolist()
+        adjacencia = [[] for _ in range(len(grafo))]
+        for origem, destino, peso in zip(linhas.tolist(), colunas.tolist(), pesos):
+            adjacencia[origem].append((destino, peso))
+        return adjacencia
+
+    if isinstance(grafo, dict):
+        grafo = [grafo.get(i, ()) for i in range(max(grafo, default=-1) + 1)]
+
+    adjacencia = []
+    for linha in grafo:
+        if isinstance(linha, dict):
+            adjacencia.append([(vizinho, peso) for vizinho, peso in linha.items() if peso > 0])
+        elif linha_esparsa(linha):
+            adjacencia.append([(vizinho, peso) for vizinho, peso in linha if peso > 0])
+        else:
+            adjacencia.append([(vizinho, peso) for vizinho, peso in enumerate(linha) if peso > 0])
+
+    return adjacencia
+
+
+def funcao_vizinhos(grafo):
+    if isinstance(grafo, GrafoCSR):
+        indptr, indices, pesos = grafo.indptr, grafo.indices, grafo.pesos
+
+        def vizinhos(no):
+            inicio, fim = int(indptr[no]), int(indptr[no + 1])
+            return zip(indices[inicio:fim].tolist(), pesos[inicio:fim].tolist())
+
+        return len(grafo), vizinhos
+
+    if isinstance(grafo, np.ndarray):
+        def vizinhos(no):
+            linha = grafo[no]
+            indices = np.flatnonzero(linha > 0)
+            return zip(indices.tolist(), linha[indices].tolist())
+
+        return len(grafo), vizinhos
+
+    adjacencia = lista_adjacencia(grafo)
+    return len(adjacencia), adjacencia.__getitem__
+
+
+def grafo_reverso(grafo):
+    if isinstance(grafo, GrafoCSR):
+        return grafo.transposta()
+    if isinstance(grafo, np.ndarray):
+        return grafo.T
+
+    adjacencia = lista_adjacencia(grafo)
+    reverso = [[] for _ in adjacencia]
+    for origem, arestas in enumerate(adjacencia):
+        for destino, peso in arestas:
+            reverso[destino].append((origem, peso))
+    return reverso
+
+
+def peso_aresta(grafo, origem, destino):
+    if isinstance(grafo, GrafoCSR):
+        return grafo.peso(origem, destino)
+    return grafo[origem][destino]
+
+
+def dijkstra(grafo, inicio, destino=None, vizinhos=None):
+    n, vizinhos_de = vizinhos if vizinhos is not None else funcao_vizinhos(grafo)
     distancias = [float('inf')] * n
     distancias[inicio] = 0
     visitados = [False] * n
     anteriores = [-1] * n
 
-    for _ in range(n):
-        menor_distancia = float('inf')
-        indice_menor = -1
+    fila = [(0, inicio)]
 
-        for i in range(n):
-            if not visitados[i] and distancias[i] < menor_distancia:
-                menor_distancia = distancias[i]
-                indice_menor = i
+    while fila:
+        distancia_atual, atual = heapq.heappop(fila)
 
-        if indice_menor == -1:
+        if visitados[atual]:
+            continue
+        visitados[atual] = True
+        if atual == destino:
             break
 
-        visitados[indice_menor] = True
-
-        for vizinho in range(n):
-            if (grafo[indice_menor][vizinho] > 0 and
-                    not visitados[vizinho] and
-                    distancias[indice_menor] + grafo[indice_menor][vizinho] < distancias[vizinho]):
-                distancias[vizinho] = distancias[indice_menor] + grafo[indice_menor][vizinho]
-                anteriores[vizinho] = indice_menor
+        for vizinho, peso in vizinhos_de(atual):
+            nova_distancia = distancia_atual + peso
+            if not visitados[vizinho] and nova_distancia < distancias[vizinho]:
+                distancias[vizinho] = nova_distancia
+                anteriores[vizinho] = atual
+                heapq.heappush(fila, (nova_distancia, vizinho))
 
     return distancias, anteriores
 
 
+def reconstruir_caminho(anteriores, destino):
+    caminho = []
+    atual = destino
+
+    while atual != -1:
+        caminho.append(atual)
+        atual = anteriores[atual]
+
+    caminho.reverse()
+    return caminho
+
+
+def heuristica_euclidiana(coordenadas):
+    coordenadas = np.asarray(coordenadas, dtype=np.float64)
+
+    def heuristica(no, destino):
+        return float(np.hypot(*(coordenadas[no] - coordenadas[destino])))
+
+    return heuristica
+
+
+def _a_estrela(vizinhos_de, origem, destino, heuristica):
+    distancias = {origem: 0}
+    anteriores = {origem: -1}
+    fila = [(heuristica(origem, destino), 0, origem)]
+
+    while fila:
+        _, distancia_atual, atual = heapq.heappop(fila)
+
+        if distancia_atual > distancias[atual]:
+            continue
+        if atual == destino:
+            return distancia_atual, reconstruir_caminho(anteriores, destino)
+
+        for vizinho, peso in vizinhos_de(atual):
+            nova_distancia = distancia_atual + peso
+            if nova_distancia < distancias.get(vizinho, float('inf')):
+                distancias[vizinho] = nova_distancia
+                anteriores[vizinho] = atual
+                heapq.heappush(fila, (nova_distancia + heuristica(vizinho, destino), nova_distancia, vizinho))
+
+    return float('inf'), []
+
+
+def _dijkstra_bidirecional(vizinhos_de, vizinhos_reversos_de, origem, destino):
+    if origem == destino:
+        return 0, [origem]
+
+    distancias = ({origem: 0}, {destino: 0})
+    anteriores = ({origem: -1}, {destino: -1})
+    visitados = (set(), set())
+    filas = ([(0, origem)], [(0, destino)])
+    expandir = (vizinhos_de, vizinhos_reversos_de)
+
+    melhor_distancia = float('inf')
+    encontro = -1
+
+    while filas[0] and filas[1]:
+        if filas[0][0][0] + filas[1][0][0] >= melhor_distancia:
+            break
+
+        lado = 0 if filas[0][0][0] <= filas[1][0][0] else 1
+        outro = 1 - lado
+        distancia_atual, atual = heapq.heappop(filas[lado])
+
+        if atual in visitados[lado]:
+            continue
+        visitados[lado].add(atual)
+
+        for vizinho, peso in expandir[lado](atual):
+            nova_distancia = distancia_atual + peso
+            if nova_distancia < distancias[lado].get(vizinho, float('inf')):
+                distancias[lado][vizinho] = nova_distancia
+                anteriores[lado][vizinho] = atual
+                heapq.heappush(filas[lado], (nova_distancia, vizinho))
+
+            if vizinho in distancias[outro]:
+                total = distancias[lado][vizinho] + distancias[outro][vizinho]
+                if total < melhor_distancia:
+                    melhor_distancia = total
+                    encontro = vizinho
+
+    if encontro == -1:
+        return float('inf'), []
+
+    caminho = reconstruir_caminho(anteriores[0], encontro)
+    atual = anteriores[1][encontro]
+    while atual != -1:
+        caminho.append(atual)
+        atual = anteriores[1][atual]
+
+    return melhor_distancia, caminho
+
+
+def caminho_mais_curto(grafo, origem, destino, metodo='dijkstra', heuristica=None, reverso=None, vizinhos=None,
+                       vizinhos_reversos=None):
+    # vizinhos e vizinhos_reversos sao o retorno de funcao_vizinhos para o grafo e o reverso; quem faz
+    # varias consultas no mesmo grafo pode monta-los uma vez e repassa-los
+    if metodo == 'dijkstra':
+        distancias, anteriores = dijkstra(grafo, origem, destino, vizinhos)
+        if distancias[destino] == float('inf'):
+            return float('inf'), []
+        return distancias[destino], reconstruir_caminho(anteriores, destino)
+
+    if metodo == 'a_estrela':
+        if heuristica is None:
+            raise ValueError("O metodo 'a_estrela' precisa de uma heuristica")
+        _, vizinhos_de = vizinhos if vizinhos is not None else funcao_vizinhos(grafo)
+        return _a_estrela(vizinhos_de, origem, destino, heuristica)
+
+    if metodo == 'bidirecional':
+        _, vizinhos_de = vizinhos if vizinhos is not None else funcao_vizinhos(grafo)
+        if vizinhos_reversos is None:
+            vizinhos_reversos = funcao_vizinhos(reverso if reverso is not None else grafo_reverso(grafo))
+        _, vizinhos_reversos_de = vizinhos_reversos
+        return _dijkstra_bidirecional(vizinhos_de, vizinhos_reversos_de, origem, destino)
+
+    raise ValueError(f"Metodo desconhecido: {metodo}")
+
+
 def obter_caminhos_mais_curtos(anteriores, inicio):
     caminhos = {}
     n = len(anteriores)
@@ -68,97 +260,192 @@ def obter_caminhos_mais_curtos(anteriores, inicio):
 
     return caminhos
 
-def construir_arvore_geradora(anteriores, grafo):
-    G = nx.Graph()
-    n = len(anteriores)
 
-    for i in range(n):
-        G.add_node(cidades[i])
+def para_csr(grafo):
+    if isinstance(grafo, GrafoCSR):
+        return grafo
+    if isinstance(grafo, np.ndarray):
+        return GrafoCSR.de_matriz(grafo)
 
-    for i in range(n):
-        if anteriores[i] != -1:
-            peso = int(grafo[anteriores[i]][i])
-            G.add_edge(cidades[anteriores[i]], cidades[i], weight=peso)
+    adjacencia = lista_adjacencia(grafo)
+    origens = [origem for origem, arestas in enumerate(adjacencia) for _ in arestas]
+    destinos = [destino for arestas in adjacencia for destino, _ in arestas]
+    pesos = [peso for arestas in adjacencia for _, peso in arestas]
+    return GrafoCSR.de_arestas(len(adjacencia), origens, destinos, pesos)
 
-    return G
 
+def floyd_warshall(grafo):
+    matriz = np.asarray(grafo, dtype=np.float64)
+    n = len(matriz)
 
+    existe_aresta = matriz > 0
+    distancias = np.where(existe_aresta, matriz, np.inf)
+    np.fill_diagonal(distancias, 0)
+    anteriores = np.where(existe_aresta, np.arange(n)[:, None], -1)
+    np.fill_diagonal(anteriores, -1)
 
-cidade_inicial = 0
-distancias_curtas, anteriores = dijkstra(matriz_distancias, cidade_inicial)
-caminhos = obter_caminhos_mais_curtos(anteriores, cidade_inicial)
+    for k in range(n):
+        via_k = distancias[:, k:k + 1] + distancias[k:k + 1, :]
+        melhora = via_k < distancias
+        distancias = np.where(melhora, via_k, distancias)
+        anteriores = np.where(melhora, anteriores[k], anteriores)
 
-arvore_geradora = construir_arvore_geradora(anteriores, matriz_distancias)
+    return distancias, anteriores
 
-print("================== RESULTADOS DO ALGORITMO DE DIJKSTRA ==================\n")
-print(f"Cidade de origem: {cidades[cidade_inicial]}\n")
 
-print("Distancia mais curtas a partir de A: ")
-for i, cidade in enumerate(cidades):
-    print(f"{cidades[cidade_inicial]} -> {cidade}: {distancias_curtas[i]}")
+_grafo_trabalhador = None
+_saida_trabalhador = None
+_blocos_trabalhador = None
 
-print("\nCaminhos mais curtos: ")
-for i, cidade in enumerate(cidades):
-    caminho_str = ' -> '.join([cidades[no] for no in caminhos[i]])
-    print(f"{cidades[cidade_inicial]} -> {cidade}: {caminho_str}")
 
-plt.figure(figsize=(12, 5))
+def _iniciar_trabalhador(descritores_grafo, descritores_saida):
+    global _grafo_trabalhador, _saida_trabalhador, _blocos_trabalhador
 
-plt.subplot(1, 2, 1)
-pos = nx.spring_layout(arvore_geradora)
-rotulos_arestas = nx.get_edge_attributes(arvore_geradora, 'weight')
+    _blocos_trabalhador, arrays = memoria_compartilhada.anexar_arrays(descritores_grafo + descritores_saida)
+    _grafo_trabalhador = GrafoCSR(*arrays[:3])
+    _saida_trabalhador = arrays[3:]
 
 
-nx.draw(arvore_geradora, pos, with_labels=True, node_size=800,
-        node_color='lightblue', font_size=12, font_weight='bold')
-nx.draw_networkx_edge_labels(arvore_geradora, pos, edge_labels=rotulos_arestas)
+def _processar_origens(linha_inicial, origens):
+    distancias_saida, anteriores_saida = _saida_trabalhador
+    for linha, origem in enumerate(origens, start=linha_inicial):
+        distancias, anteriores = dijkstra(_grafo_trabalhador, origem)
+        distancias_saida[linha] = distancias
+        anteriores_saida[linha] = anteriores
 
 
-plt.title('Arvore Geradora | Caminhos Mais Curtos a partir de A')
+def dijkstra_multiplas_origens(grafo, origens='todas', processos=None, limite_floyd_warshall=256):
+    denso = isinstance(grafo, np.ndarray) or (
+        isinstance(grafo, list) and not any(linha_esparsa(linha) for linha in grafo))
+    if not denso or len(grafo) > limite_floyd_warshall:
+        grafo = para_csr(grafo)
 
-plt.subplot(1, 2, 2)
-grafo_completo = nx.Graph()
+    n = len(grafo)
+    origens = list(range(n)) if origens == 'todas' else list(origens)
+
+    if not isinstance(grafo, GrafoCSR):
+        distancias, anteriores = floyd_warshall(grafo)
+        return distancias[origens], anteriores[origens]
+
+    processos = processos or os.cpu_count() or 1
+
+    if processos == 1 or len(origens) < 2:
+        distancias = np.empty((len(origens), n), dtype=np.float64)
+        anteriores = np.empty((len(origens), n), dtype=np.int64)
+        for linha, origem in enumerate(origens):
+            distancias[linha], anteriores[linha] = dijkstra(grafo, origem)
+        return distancias, anteriores
+
+    compartilhados = [memoria_compartilhada.compartilhar_array(array)
+                      for array in (grafo.indptr, grafo.indices, grafo.pesos)]
+    saida_distancias = memoria_compartilhada.criar_array((len(origens), n), np.float64)
+    saida_anteriores = memoria_compartilhada.criar_array((len(origens), n), np.int64)
+    todos = compartilhados + [saida_distancias, saida_anteriores]
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            initializer=_iniciar_trabalhador,
+            initargs=([d for _, _, d in compartilhados], [saida_distancias[2], saida_anteriores[2]]),
+        ) as executor:
+            tarefas = [executor.submit(_processar_origens, inicio, lote)
+                       for inicio, lote in memoria_compartilhada.dividir_lotes(origens, processos)]
+            for tarefa in tarefas:
+                tarefa.result()
+
+        distancias = saida_distancias[1].copy()
+        anteriores = saida_anteriores[1].copy()
+    finally:
+        blocos = [bloco for bloco, _, _ in todos]
+        del todos, compartilhados, saida_distancias, saida_anteriores
+        memoria_compartilhada.liberar(blocos)
 
-for i in range(len(cidades)):
-    for j in range(i + 1, len(cidades)):
-        if matriz_distancias[i][j] > 0:
-            peso = int(matriz_distancias[i][j])
-            grafo_completo.add_edge(cidades[i], cidades[j], weight=peso)
+    return distancias, anteriores
 
 
-pos_completo = nx.spring_layout(grafo_completo)
-rotulos_arestas_completo = nx.get_edge_attributes(grafo_completo, 'weight')
+def construir_arvore_geradora(anteriores, grafo, nomes=None):
+    import networkx as nx
 
+    G = nx.Graph()
+    n = len(anteriores)
+    if nomes is None:
+        nomes = list(range(n))
 
-nx.draw(grafo_completo, pos_completo, with_labels=True, node_size=800,
-        node_color='lightgreen', font_size=12, font_weight='bold')
-nx.draw_networkx_edge_labels(grafo_completo, pos_completo, edge_labels=rotulos_arestas_completo)
+    for i in range(n):
+        G.add_node(nomes[i])
 
+    for i in range(n):
+        if anteriores[i] != -1:
+            peso = int(peso_aresta(grafo, anteriores[i], i))
+            G.add_edge(nomes[anteriores[i]], nomes[i], weight=peso)
 
-plt.title('Grafo Completo | Todas as Conexões')
+    return G
 
-plt.tight_layout()
-plt.show()
 
-print("\n================== INFORMAÇÕES DA ARVORE GERADORA ==================")
-print(f"Numero de arestas na arvore: {arvore_geradora.number_of_edges()}")
-print(f"Numero de nós na arvore: {arvore_geradora.number_of_nodes()}")
-print(f"Arestas da arvore geradora: {list(arvore_geradora.edges(data=True))}")
+def plotar_resultados(anteriores, grafo, nomes=None, cidade_inicial=0, coordenadas=None, arquivo=None,
+                      limite_rotulos=50, decimacao=1):
+    from renderizacao import criar_figura, desenhar_grafo, finalizar_figura, layout_circular
 
+    n = len(anteriores)
+    if nomes is None:
+        nomes = [str(i) for i in range(n)]
+    if coordenadas is None:
+        coordenadas = layout_circular(n)
 
+    anteriores = np.asarray(anteriores)
+    filhos = np.flatnonzero(anteriores != -1)
+    arestas_arvore = np.column_stack((anteriores[filhos], filhos))
 
+    csr = para_csr(grafo)
+    origens = np.repeat(np.arange(len(csr)), np.diff(csr.indptr))
+    superiores = (origens < csr.indices) & np.isfinite(csr.pesos)
+    arestas_grafo = np.column_stack((origens[superiores], csr.indices[superiores]))
 
+    rotular_arvore = len(arestas_arvore) <= limite_rotulos
+    rotular_grafo = len(arestas_grafo) <= limite_rotulos
+    pesos_arvore = [int(peso_aresta(grafo, a, b)) for a, b in arestas_arvore.tolist()] if rotular_arvore else None
+    pesos_grafo = np.asarray(csr.pesos)[superiores].astype(np.int64) if rotular_grafo else None
 
+    figura = criar_figura((12, 5), arquivo)
 
+    eixo = figura.add_subplot(1, 2, 1)
+    desenhar_grafo(eixo, coordenadas, arestas_arvore, pesos_arvore, nomes, limite_rotulos, decimacao)
+    eixo.set_title(f'Arvore Geradora | Caminhos Mais Curtos a partir de {nomes[cidade_inicial]}')
 
+    eixo = figura.add_subplot(1, 2, 2)
+    desenhar_grafo(eixo, coordenadas, arestas_grafo, pesos_grafo, nomes, limite_rotulos, decimacao,
+                   cor_nos='lightgreen')
+    eixo.set_title('Grafo Completo | Todas as Conexões')
 
+    finalizar_figura(figura, arquivo)
 
 
+def main():
+    cidade_inicial = 0
+    distancias_curtas, anteriores = dijkstra(matriz_distancias, cidade_inicial)
+    caminhos = obter_caminhos_mais_curtos(anteriores, cidade_inicial)
 
+    arvore_geradora = construir_arvore_geradora(anteriores, matriz_distancias, cidades)
 
+    print("================== RESULTADOS DO ALGORITMO DE DIJKSTRA ==================\n")
+    print(f"Cidade de origem: {cidades[cidade_inicial]}\n")
 
+    print(f"Distancia mais curtas a partir de {cidades[cidade_inicial]}: ")
+    for i, cidade in enumerate(cidades):
+        print(f"{cidades[cidade_inicial]} -> {cidade}: {distancias_curtas[i]}")
 
+    print("\nCaminhos mais curtos: ")
+    for i, cidade in enumerate(cidades):
+        caminho_str = ' -> '.join([cidades[no] for no in caminhos[i]])
+        print(f"{cidades[cidade_inicial]} -> {cidade}: {caminho_str}")
 
+    plotar_resultados(anteriores, matriz_distancias, cidades, cidade_inicial)
 
+    print("\n================== INFORMAÇÕES DA ARVORE GERADORA ==================")
+    print(f"Numero de arestas na arvore: {arvore_geradora.number_of_edges()}")
+    print(f"Numero de nós na arvore: {arvore_geradora.number_of_nodes()}")
+    print(f"Arestas da arvore geradora: {list(arvore_geradora.edges(data=True))}")
 
 
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
+
+import memoria_compartilhada
+from grafo_csr import GrafoCSR
 
 matriz_distancias = np.array([
     [0, 20, 30, 40, 50, 60, 70, 80, 90, 100],
@@ -18,145 +25,492 @@ matriz_distancias = np.array([
 cidades = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
 
 
+def distancia_entre(matriz_distancias, origem, destino):
+    if isinstance(matriz_distancias, GrafoCSR):
+        return matriz_distancias.peso(origem, destino)
+    return matriz_distancias[origem][destino]
+
 
 def vizinho_mais_proximo(matriz_distancias, cidade_inicial):
+    if not isinstance(matriz_distancias, GrafoCSR):
+        matriz_distancias = np.asarray(matriz_distancias)
+
     num_cidades = len(matriz_distancias)
-    visitadas = [False] * num_cidades
+    visitadas = np.zeros(num_cidades, dtype=bool)
     caminho = [cidade_inicial]
     visitadas[cidade_inicial] = True
     distancia_total = 0
 
-    print("============== ALGORITMO DO VIZINHO MAIS PROXIIMO ==============")
-    print(f"Cidade inicial: {cidades[cidade_inicial]}")
-    print("\nProcesso de construção de rota:")
-
     cidade_atual = cidade_inicial
 
-    for etapa in range(num_cidades - 1):
-        menor_distancia = float('inf')
-        vizinho_mais_proximo = -1
-
-        for vizinho in range(num_cidades):
-            if not visitadas[vizinho] and matriz_distancias[cidade_atual][vizinho] < menor_distancia:
-                menor_distancia = matriz_distancias[cidade_atual][vizinho]
-                vizinho_mais_proximo = vizinho
-
+    for _ in range(num_cidades - 1):
+        if isinstance(matriz_distancias, GrafoCSR):
+            indices, pesos = matriz_distancias.vizinhos(cidade_atual)
+            livres = ~visitadas[indices]
+            indices, pesos = indices[livres], pesos[livres]
+            if len(indices) == 0:
+                raise ValueError(f"Cidade {cidade_atual} não tem ligação com nenhuma cidade não visitada")
+            posicao = np.argmin(pesos)
+            vizinho_mais_proximo = int(indices[posicao])
+            menor_distancia = pesos[posicao]
+        else:
+            linha = matriz_distancias[cidade_atual]
+            vizinho_mais_proximo = int(np.argmin(np.where(visitadas, np.inf, linha)))
+            menor_distancia = linha[vizinho_mais_proximo]
 
         caminho.append(vizinho_mais_proximo)
         visitadas[vizinho_mais_proximo] = True
         distancia_total += menor_distancia
 
-        print(f"Etapa {etapa + 1}: {cidades[cidade_atual]} --> {cidades[vizinho_mais_proximo]} (distância: {menor_distancia})")
-
         cidade_atual = vizinho_mais_proximo
 
-    distancia_volta = matriz_distancias[caminho[-1]][cidade_inicial]
-    distancia_total += distancia_volta
+    distancia_total += distancia_entre(matriz_distancias, caminho[-1], cidade_inicial)
     caminho.append(cidade_inicial)
 
-    print(f"Volta para início: {cidades[caminho[-2]]} --> {cidades[cidade_inicial]} (distância: {distancia_volta})")
-
     return caminho, distancia_total
 
 
-def plotar_rota(caminho, matriz_distancias):
-    G = nx.Graph()
-
-    for cidade in cidades:
-        G.add_node(cidade)
-
-    for i in range(len(caminho) - 1):
-        cidade_origem = cidades[caminho[i]]
-        cidade_destino = cidades[caminho[i + 1]]
-        distancia = matriz_distancias[caminho[i]][caminho[i + 1]]
-        G.add_edge(cidade_origem, cidade_destino, weight=distancia)
-
-    plt.figure(figsize=(14, 6))
-
-    plt.subplot(1, 2, 1)
-    pos = nx.circular_layout(G)
-
-    nx.draw_networkx_nodes(G, pos, node_size=800, node_color='lightblue')
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight='bold')
+def vizinho_mais_proximo_coordenadas(coordenadas, cidade_inicial):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        cKDTree = None
 
-    edges = list(G.edges())
-    nx.draw_networkx_edges(G, pos, edgelist=edges, width=2, edge_color='red', alpha=0.7)
+    coordenadas = np.asarray(coordenadas, dtype=np.float64)
+    num_cidades = len(coordenadas)
+    visitadas = np.zeros(num_cidades, dtype=bool)
+    caminho = [cidade_inicial]
+    visitadas[cidade_inicial] = True
+    distancia_total = 0.0
 
+    arvore = None
+    indices_arvore = None
+    visitadas_na_arvore = 0
 
-    edge_labels = nx.get_edge_attributes(G, 'weight')
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+    cidade_atual = cidade_inicial
 
-    plt.title('Rota Encontrada | Vizinho Mais Próximo')
-    plt.axis('off')
+    for _ in range(num_cidades - 1):
+        if cKDTree is None:
+            diferencas = coordenadas - coordenadas[cidade_atual]
+            quadrados = np.einsum('ij,ij->i', diferencas, diferencas)
+            quadrados[visitadas] = np.inf
+            vizinho_mais_proximo = int(np.argmin(quadrados))
+            menor_distancia = float(np.sqrt(quadrados[vizinho_mais_proximo]))
+        else:
+            # a arvore e reconstruida so com as cidades restantes quando metade ja foi visitada
+            if arvore is None or 2 * visitadas_na_arvore > len(indices_arvore):
+                indices_arvore = np.flatnonzero(~visitadas)
+                arvore = cKDTree(coordenadas[indices_arvore])
+                visitadas_na_arvore = 0
+
+            k = 8
+            while True:
+                k = min(k, len(indices_arvore))
+                distancias, posicoes = arvore.query(coordenadas[cidade_atual], k=k)
+                candidatos = indices_arvore[np.atleast_1d(posicoes)]
+                livres = ~visitadas[candidatos]
+                if livres.any():
+                    posicao = int(np.argmax(livres))
+                    vizinho_mais_proximo = int(candidatos[posicao])
+                    menor_distancia = float(np.atleast_1d(distancias)[posicao])
+                    break
+                k *= 2
+
+            visitadas_na_arvore += 1
 
-    plt.subplot(1, 2, 2)
+        caminho.append(vizinho_mais_proximo)
+        visitadas[vizinho_mais_proximo] = True
+        distancia_total += menor_distancia
 
+        cidade_atual = vizinho_mais_proximo
 
-    x_positions = range(len(caminho))
-    y_position = 0
+    distancia_total += float(np.hypot(*(coordenadas[cidade_atual] - coordenadas[cidade_inicial])))
+    caminho.append(cidade_inicial)
 
-    plt.plot(x_positions, [y_position] * len(caminho), 'ro-', linewidth=3, markersize=10)
+    return caminho, distancia_total
 
-    for i, cidade_idx in enumerate(caminho):
-        plt.text(i, y_position + 0.1, cidades[cidade_idx],
-                 ha='center', va='bottom', fontsize=12, fontweight='bold')
 
-    for i in range(len(caminho) - 1):
-        distancia = matriz_distancias[caminho[i]][caminho[i + 1]]
-        x_mid = (i + i + 1) / 2
-        plt.text(x_mid, y_position - 0.1, f'{distancia}',
-                 ha='center', va='top', fontsize=10,
-                 bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
+def _listas_vizinhos(num_cidades, tamanho, matriz_distancias=None, coordenadas=None):
+    tamanho = min(tamanho, num_cidades - 1)
+
+    if coordenadas is not None:
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            cKDTree = None
+
+        if cKDTree is not None:
+            _, indices = cKDTree(coordenadas).query(coordenadas, k=tamanho + 1)
+            return [[v for v in linha if v != cidade][:tamanho] for cidade, linha in enumerate(indices.tolist())]
+
+        vizinhos = []
+        for cidade in range(num_cidades):
+            diferencas = coordenadas - coordenadas[cidade]
+            quadrados = np.einsum('ij,ij->i', diferencas, diferencas)
+            quadrados[cidade] = np.inf
+            mais_proximos = np.argpartition(quadrados, tamanho - 1)[:tamanho]
+            vizinhos.append(mais_proximos[np.argsort(quadrados[mais_proximos])].tolist())
+        return vizinhos
+
+    if isinstance(matriz_distancias, GrafoCSR):
+        vizinhos = []
+        for cidade in range(num_cidades):
+            indices, pesos = matriz_distancias.vizinhos(cidade)
+            vizinhos.append(indices[np.argsort(pesos, kind='stable')[:tamanho]].tolist())
+        return vizinhos
+
+    distancias = np.array(matriz_distancias, dtype=np.float64)
+    np.fill_diagonal(distancias, np.inf)
+    indices = np.argpartition(distancias, tamanho - 1, axis=1)[:, :tamanho]
+    ordem = np.argsort(np.take_along_axis(distancias, indices, axis=1), axis=1)
+    return np.take_along_axis(indices, ordem, axis=1).tolist()
+
+
+def melhorar_rota(caminho, matriz_distancias=None, coordenadas=None, tamanho_vizinhanca=8, tempo_limite=None,
+                  vizinhos=None):
+    if coordenadas is not None:
+        coordenadas = np.asarray(coordenadas, dtype=np.float64)
+        xs, ys = coordenadas[:, 0].tolist(), coordenadas[:, 1].tolist()
+
+        def d(a, b):
+            return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+    elif isinstance(matriz_distancias, GrafoCSR):
+        def d(a, b):
+            return matriz_distancias.peso(a, b)
+    else:
+        matriz_distancias = np.asarray(matriz_distancias)
+        d = matriz_distancias.item
+
+    rota = list(caminho[:-1]) if len(caminho) > 1 and caminho[0] == caminho[-1] else list(caminho)
+    n = len(rota)
+    distancia_total = sum(d(rota[i], rota[(i + 1) % n]) for i in range(n))
+
+    if n < 5:
+        return rota + rota[:1], distancia_total
+
+    if vizinhos is None:
+        vizinhos = _listas_vizinhos(n, tamanho_vizinhanca, matriz_distancias, coordenadas)
+    posicao = [0] * n
+    for i, cidade in enumerate(rota):
+        posicao[cidade] = i
+
+    def sucessor(cidade):
+        return rota[(posicao[cidade] + 1) % n]
+
+    def predecessor(cidade):
+        return rota[(posicao[cidade] - 1) % n]
+
+    def inverter_intervalo(i, j):
+        tamanho = (j - i) % n + 1
+        for k in range(tamanho // 2):
+            a, b = (i + k) % n, (j - k) % n
+            rota[a], rota[b] = rota[b], rota[a]
+            posicao[rota[a]] = a
+            posicao[rota[b]] = b
+
+    def trocar_arestas(a, b, c, e):
+        # remove (a, b) e (c, e), adiciona (a, c) e (b, e); inverte o lado mais curto da rota
+        if sucessor(a) == b:
+            i, j = posicao[b], posicao[c]
+        else:
+            i, j = posicao[c], posicao[b]
+        if 2 * ((j - i) % n + 1) > n:
+            i, j = (j + 1) % n, (i - 1) % n
+        inverter_intervalo(i, j)
+
+    def mover_segmento(inicio, tamanho, x, y, invertido):
+        fim = (inicio + tamanho - 1) % n
+        tamanho_depois = (posicao[x] - fim) % n
+        if tamanho_depois <= n - tamanho - tamanho_depois:
+            inverter_intervalo(inicio, posicao[x])
+            inverter_intervalo(inicio, (inicio + tamanho_depois - 1) % n)
+            inicio_segmento = (inicio + tamanho_depois) % n
+        else:
+            inicio_y = posicao[y]
+            inverter_intervalo(inicio_y, fim)
+            inverter_intervalo((inicio_y + tamanho) % n, fim)
+            inicio_segmento = inicio_y
+        if not invertido:
+            inverter_intervalo(inicio_segmento, (inicio_segmento + tamanho - 1) % n)
+
+    def tentar_2opt(a):
+        for sentido in (sucessor, predecessor):
+            b = sentido(a)
+            d_ab = d(a, b)
+            for c in vizinhos[a]:
+                d_ac = d(a, c)
+                if d_ac >= d_ab:
+                    break
+                e = sentido(c)
+                if c == b or e == a:
+                    continue
+                delta = d_ac + d(b, e) - d_ab - d(c, e)
+                if delta < -1e-9:
+                    trocar_arestas(a, b, c, e)
+                    return delta, (a, b, c, e)
+        return 0, ()
+
+    def tentar_or_opt(s1):
+        inicio = posicao[s1]
+        for tamanho in (1, 2, 3):
+            if tamanho + 2 >= n:
+                break
+            fim = (inicio + tamanho - 1) % n
+            se = rota[fim]
+            p, nx = rota[(inicio - 1) % n], rota[(fim + 1) % n]
+            segmento = {rota[(inicio + k) % n] for k in range(tamanho)}
+            ganho_remocao = d(p, s1) + d(se, nx) - d(p, nx)
+            if ganho_remocao <= 1e-9:
+                continue
+
+            for extremo in (s1, se):
+                for c in vizinhos[extremo]:
+                    if d(extremo, c) >= ganho_remocao:
+                        break
+                    if c in segmento:
+                        continue
+                    for x, y in ((predecessor(c), c), (c, sucessor(c))):
+                        if x in segmento or y in segmento:
+                            continue
+                        d_xy = d(x, y)
+                        direto = d(x, s1) + d(se, y) - d_xy - ganho_remocao
+                        invertido = d(x, se) + d(s1, y) - d_xy - ganho_remocao
+                        delta = min(direto, invertido)
+                        if delta < -1e-9:
+                            mover_segmento(inicio, tamanho, x, y, invertido < direto)
+                            return delta, (p, nx, x, y, s1, se)
+        return 0, ()
+
+    prazo = time.perf_counter() + tempo_limite if tempo_limite is not None else None
+    ativas = deque(rota)
+    na_fila = [True] * n
+    iteracoes = 0
+
+    while ativas:
+        iteracoes += 1
+        if prazo is not None and iteracoes % 256 == 0 and time.perf_counter() > prazo:
+            break
+
+        cidade = ativas.popleft()
+        na_fila[cidade] = False
+
+        delta, tocadas = tentar_2opt(cidade)
+        if not tocadas:
+            delta, tocadas = tentar_or_opt(cidade)
+        if not tocadas:
+            continue
+
+        distancia_total += delta
+        for tocada in tocadas:
+            if not na_fila[tocada]:
+                na_fila[tocada] = True
+                ativas.append(tocada)
+
+    inicio = posicao[caminho[0]]
+    rota = rota[inicio:] + rota[:inicio]
+    return rota + rota[:1], distancia_total
+
+
+def _vizinhos_para_melhorar(matriz_distancias):
+    num_cidades = len(matriz_distancias)
+    # abaixo de 5 cidades melhorar_rota nao usa as listas
+    return _listas_vizinhos(num_cidades, 8, matriz_distancias) if num_cidades >= 5 else None
 
-    plt.title('Sequência de Visita das Cidades')
-    plt.xlabel('Ordem de Visitação')
-    plt.yticks([])
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
 
-    plt.show()
+_distancias_trabalhador = None
+_blocos_trabalhador = None
+_vizinhos_trabalhador = None
 
 
-cidade_inicial = 0
-caminho_encontrado, distancia_total = vizinho_mais_proximo(matriz_distancias, cidade_inicial)
+def _iniciar_trabalhador(descritores):
+    global _distancias_trabalhador, _blocos_trabalhador, _vizinhos_trabalhador
 
-print("==============RESULTADO FINAL ==============\n")
+    _blocos_trabalhador, arrays = memoria_compartilhada.anexar_arrays(descritores)
 
-caminho_nomes = [cidades[i] for i in caminho_encontrado]
-print(f"Rota encontrada: {' --> '.join(caminho_nomes)}")
-print(f"Distsancia total percorrida: {distancia_total}")
+    _distancias_trabalhador = GrafoCSR(*arrays) if len(arrays) == 3 else arrays[0]
+    _vizinhos_trabalhador = None
 
-print("\nDetalhamento da rota:")
-for i in range(len(caminho_encontrado) - 1):
-    cidade_origem = caminho_encontrado[i]
-    cidade_destino = caminho_encontrado[i + 1]
-    distancia_trecho = matriz_distancias[cidade_origem][cidade_destino]
-    print(f"  {cidades[cidade_origem]} --> {cidades[cidade_destino]}: {distancia_trecho} km")
 
-plotar_rota(caminho_encontrado, matriz_distancias)
+def _resolver_inicios(matriz_distancias, inicios, melhorar, vizinhos=None):
+    resultados = []
+    melhor_caminho, melhor_distancia = None, float('inf')
 
+    for inicio in inicios:
+        try:
+            caminho, distancia = vizinho_mais_proximo(matriz_distancias, inicio)
+        except ValueError:
+            resultados.append((inicio, float('inf')))
+            continue
 
+        if melhorar:
+            # as listas de vizinhos so dependem das distancias e servem para todos os inicios
+            if vizinhos is None:
+                vizinhos = _vizinhos_para_melhorar(matriz_distancias)
+            caminho, distancia = melhorar_rota(caminho, matriz_distancias, vizinhos=vizinhos)
 
+        resultados.append((inicio, distancia))
+        if distancia < melhor_distancia:
+            melhor_caminho, melhor_distancia = caminho, distancia
 
+    return resultados, melhor_caminho, melhor_distancia
 
 
+def _resolver_inicios_trabalhador(inicios, melhorar):
+    global _vizinhos_trabalhador
 
+    if melhorar and _vizinhos_trabalhador is None:
+        _vizinhos_trabalhador = _vizinhos_para_melhorar(_distancias_trabalhador)
+    return _resolver_inicios(_distancias_trabalhador, inicios, melhorar, _vizinhos_trabalhador)
 
 
+def vizinho_mais_proximo_multiplos_inicios(matriz_distancias, inicios='todas', amostra=None,
+                                           melhorar=False, processos=None, semente=None):
+    if not isinstance(matriz_distancias, GrafoCSR):
+        matriz_distancias = np.asarray(matriz_distancias)
 
+    num_cidades = len(matriz_distancias)
+    inicios = list(range(num_cidades)) if inicios == 'todas' else list(inicios)
+    if amostra is not None and amostra < len(inicios):
+        gerador = np.random.default_rng(semente)
+        inicios = gerador.choice(inicios, size=amostra, replace=False).tolist()
+
+    processos = min(processos or os.cpu_count() or 1, len(inicios))
+
+    if processos <= 1:
+        lotes = [_resolver_inicios(matriz_distancias, inicios, melhorar)]
+    else:
+        if isinstance(matriz_distancias, GrafoCSR):
+            arrays = (matriz_distancias.indptr, matriz_distancias.indices, matriz_distancias.pesos)
+        else:
+            arrays = (matriz_distancias,)
+        compartilhados = [memoria_compartilhada.compartilhar_array(array) for array in arrays]
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=processos,
+                initializer=_iniciar_trabalhador,
+                initargs=([d for _, _, d in compartilhados],),
+            ) as executor:
+                tarefas = [executor.submit(_resolver_inicios_trabalhador, lote, melhorar)
+                           for _, lote in memoria_compartilhada.dividir_lotes(inicios, processos)]
+                lotes = [tarefa.result() for tarefa in tarefas]
+        finally:
+            blocos = [bloco for bloco, _, _ in compartilhados]
+            del compartilhados
+            memoria_compartilhada.liberar(blocos)
+
+    distancias_por_inicio = {}
+    melhor_caminho, melhor_distancia = None, float('inf')
+    for resultados, caminho, distancia in lotes:
+        distancias_por_inicio.update(resultados)
+        if distancia < melhor_distancia:
+            melhor_caminho, melhor_distancia = caminho, distancia
+
+    valores = np.array([d for d in distancias_por_inicio.values() if d < float('inf')], dtype=np.float64)
+    estatisticas = {
+        'distancias': distancias_por_inicio,
+        'melhor_inicio': melhor_caminho[0] if melhor_caminho else None,
+        'minimo': float(valores.min()) if len(valores) else float('inf'),
+        'maximo': float(valores.max()) if len(valores) else float('inf'),
+        'media': float(valores.mean()) if len(valores) else float('inf'),
+        'desvio_padrao': float(valores.std()) if len(valores) else 0.0,
+        'sem_solucao': len(distancias_por_inicio) - len(valores),
+    }
+
+    return melhor_caminho, melhor_distancia, estatisticas
+
+
+def plotar_rota(caminho, matriz_distancias, nomes=None, coordenadas=None, arquivo=None,
+                limite_rotulos=50, decimacao=1):
+    from renderizacao import criar_figura, desenhar_grafo, finalizar_figura, layout_circular
+
+    arestas = np.column_stack((caminho[:-1], caminho[1:]))
+
+    if matriz_distancias is None:
+        coordenadas = np.asarray(coordenadas, dtype=np.float64)
+        diferencas = coordenadas[arestas[:, 0]] - coordenadas[arestas[:, 1]]
+        distancias = np.hypot(diferencas[:, 0], diferencas[:, 1])
+    elif isinstance(matriz_distancias, GrafoCSR):
+        distancias = np.array([matriz_distancias.peso(a, b) for a, b in arestas.tolist()])
+    else:
+        distancias = np.asarray(matriz_distancias)[arestas[:, 0], arestas[:, 1]]
+
+    num_cidades = len(coordenadas) if coordenadas is not None else len(matriz_distancias)
+    if nomes is None:
+        nomes = [str(i) for i in range(num_cidades)]
+    if coordenadas is None:
+        coordenadas = layout_circular(num_cidades)
+
+    mostrar_distancias = len(arestas) <= limite_rotulos
+
+    figura = criar_figura((14, 6), arquivo)
+
+    eixo = figura.add_subplot(1, 2, 1)
+    desenhar_grafo(eixo, coordenadas, arestas, distancias, nomes, limite_rotulos, decimacao,
+                   cor_arestas='red', largura=2)
+    eixo.set_title('Rota Encontrada | Vizinho Mais Próximo')
+
+    eixo = figura.add_subplot(1, 2, 2)
+    y_position = 0
 
+    if mostrar_distancias:
+        eixo.plot(range(len(caminho)), [y_position] * len(caminho), 'ro-', linewidth=3, markersize=10)
 
+        for i, cidade_idx in enumerate(caminho):
+            eixo.text(i, y_position + 0.1, nomes[cidade_idx],
+                      ha='center', va='bottom', fontsize=12, fontweight='bold')
 
+        for i, distancia in enumerate(distancias.tolist()):
+            x_mid = (i + i + 1) / 2
+            eixo.text(x_mid, y_position - 0.1, f'{distancia}',
+                      ha='center', va='top', fontsize=10,
+                      bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
+        eixo.set_ylim(-0.5, 0.5)
+        eixo.set_yticks([])
+        eixo.set_title('Sequência de Visita das Cidades')
+    else:
+        eixo.plot(np.arange(len(arestas))[::decimacao], np.cumsum(distancias)[::decimacao], 'r-', linewidth=1)
+        eixo.set_ylabel('Distância acumulada')
+        eixo.set_title('Distância Acumulada ao Longo da Rota')
 
+    eixo.set_xlabel('Ordem de Visitação')
+    eixo.grid(True, alpha=0.3)
 
+    finalizar_figura(figura, arquivo)
 
 
+def main():
+    cidade_inicial = 0
+    caminho_encontrado, distancia_total = vizinho_mais_proximo(matriz_distancias, cidade_inicial)
 
+    print("============== ALGORITMO DO VIZINHO MAIS PROXIIMO ==============")
+    print(f"Cidade inicial: {cidades[cidade_inicial]}")
+    print("\nProcesso de construção de rota:")
 
+    for etapa in range(len(caminho_encontrado) - 2):
+        cidade_origem = caminho_encontrado[etapa]
+        cidade_destino = caminho_encontrado[etapa + 1]
+        distancia_trecho = matriz_distancias[cidade_origem][cidade_destino]
+        print(f"Etapa {etapa + 1}: {cidades[cidade_origem]} --> {cidades[cidade_destino]} (distância: {distancia_trecho})")
 
+    distancia_volta = matriz_distancias[caminho_encontrado[-2]][cidade_inicial]
+    print(f"Volta para início: {cidades[caminho_encontrado[-2]]} --> {cidades[cidade_inicial]} (distância: {distancia_volta})")
 
+    print("==============RESULTADO FINAL ==============\n")
 
+    caminho_nomes = [cidades[i] for i in caminho_encontrado]
+    print(f"Rota encontrada: {' --> '.join(caminho_nomes)}")
+    print(f"Distsancia total percorrida: {distancia_total}")
 
+    print("\nDetalhamento da rota:")
+    for i in range(len(caminho_encontrado) - 1):
+        cidade_origem = caminho_encontrado[i]
+        cidade_destino = caminho_encontrado[i + 1]
+        distancia_trecho = matriz_distancias[cidade_origem][cidade_destino]
+        print(f"  {cidades[cidade_origem]} --> {cidades[cidade_destino]}: {distancia_trecho} km")
 
+    plotar_rota(caminho_encontrado, matriz_distancias, cidades)
 
 
+if __name__ == "__main__":
+    main()
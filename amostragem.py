@@ -0,0 +1,111 @@
+import ctypes
+import random
+import socket
+import sys
+
+# opcodes do BPF classico usados na montagem do programa
+BPF_LD_W_ABS = 0x20
+BPF_JMP_JA = 0x05
+BPF_JMP_JGT_K = 0x25
+BPF_RET_K = 0x06
+
+# carga auxiliar do Linux que devolve um inteiro aleatorio de 32 bits (SKF_AD_OFF + SKF_AD_RANDOM)
+SKF_AD_RANDOM = (-0x1000 + 56) & 0xFFFFFFFF
+SO_ATTACH_FILTER = 26
+TAMANHO_MAXIMO = 0x40000
+
+
+class _InstrucaoBPF(ctypes.Structure):
+    _fields_ = [('code', ctypes.c_uint16), ('jt', ctypes.c_uint8), ('jf', ctypes.c_uint8), ('k', ctypes.c_uint32)]
+
+
+class _ProgramaBPF(ctypes.Structure):
+    _fields_ = [('len', ctypes.c_ushort), ('filter', ctypes.POINTER(_InstrucaoBPF))]
+
+
+def combinar_filtros(filtros):
+    if filtros is None or isinstance(filtros, str):
+        return filtros or None
+    filtros = [filtro.strip() for filtro in filtros if filtro and filtro.strip()]
+    if not filtros:
+        return None
+    if len(filtros) == 1:
+        return filtros[0]
+    return " or ".join(f"({filtro})" for filtro in filtros)
+
+
+def compilar_filtro(filtro, interface=None):
+    from scapy.arch.common import compile_filter, free_filter
+
+    programa = compile_filter(filtro, interface)
+    try:
+        return [(instrucao.code, instrucao.jt, instrucao.jf, instrucao.k)
+                for instrucao in programa.bf_insns[:programa.bf_len]]
+    finally:
+        free_filter(programa)
+
+
+def aplicar_amostragem(programa=None, snaplen=None, probabilidade=None):
+    # cada "ret #k" que aceita o pacote passa a truncar em snaplen e, com probabilidade, a saltar
+    # para um sufixo que sorteia no kernel se o pacote segue para o socket
+    programa = list(programa or [(BPF_RET_K, 0, 0, TAMANHO_MAXIMO)])
+    limite_tamanho = snaplen or TAMANHO_MAXIMO
+
+    if probabilidade is None:
+        return [(codigo, jt, jf, min(k, limite_tamanho) if codigo == BPF_RET_K and k else k)
+                for codigo, jt, jf, k in programa]
+
+    sufixo = len(programa)
+    limite = min(int(probabilidade * 0xFFFFFFFF), 0xFFFFFFFF)
+    resultado = [(BPF_JMP_JA, 0, 0, sufixo - posicao - 1) if codigo == BPF_RET_K and k else (codigo, jt, jf, k)
+                 for posicao, (codigo, jt, jf, k) in enumerate(programa)]
+    resultado += [
+        (BPF_LD_W_ABS, 0, 0, SKF_AD_RANDOM),
+        (BPF_JMP_JGT_K, 1, 0, limite),
+        (BPF_RET_K, 0, 0, limite_tamanho),
+        (BPF_RET_K, 0, 0, 0),
+    ]
+    return resultado
+
+
+def anexar_programa(sock, programa):
+    if not sys.platform.startswith('linux'):
+        raise OSError("Filtros com amostragem ou snaplen no kernel só são suportados no Linux")
+
+    instrucoes = (_InstrucaoBPF * len(programa))(*programa)
+    descritor = _ProgramaBPF(len(programa), ctypes.cast(instrucoes, ctypes.POINTER(_InstrucaoBPF)))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, bytes(descritor))
+
+
+class Amostrador:
+    def __init__(self, taxa=1, probabilidade=None, semente=None):
+        if taxa < 1:
+            raise ValueError("A taxa de amostragem deve ser pelo menos 1")
+        if probabilidade is not None and not 0 < probabilidade <= 1:
+            raise ValueError("A probabilidade de amostragem deve estar entre 0 e 1")
+
+        self.taxa = taxa
+        self.probabilidade = probabilidade
+        # quando o sorteio e feito pelo filtro do kernel, o pacote ja chega amostrado
+        self.probabilidade_no_kernel = False
+        self.aleatorio = random.Random(semente).random
+        self.vistos = 0
+        self.aceitos = 0
+
+    @property
+    def ativo(self):
+        return self.taxa > 1 or self.probabilidade is not None
+
+    @property
+    def fator(self):
+        return self.taxa / (self.probabilidade or 1)
+
+    def aceitar(self):
+        self.vistos += 1
+        if self.taxa > 1 and self.vistos % self.taxa:
+            return False
+        sortear = self.probabilidade is not None and not self.probabilidade_no_kernel
+        if sortear and self.aleatorio() >= self.probabilidade:
+            return False
+        self.aceitos += 1
+        return True
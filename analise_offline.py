@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from scapy.all import conf
+
+from captura_pacotes import AnalisadorRede, analisar_lote
+from estatisticas_captura import EstatisticasCaptura
+from leitor_pcap import LeitorPcap
+from tabela_fluxos import TabelaFluxos
+
+_classes_enlace = {}
+
+
+def classe_enlace(linktype):
+    classe = _classes_enlace.get(linktype)
+    if classe is None:
+        classe = _classes_enlace[linktype] = conf.l2types.num2layer.get(linktype, conf.raw_layer)
+    return classe
+
+
+def analisar_registros(leitor, tamanho_lote=1024, trecho=None):
+    inicio, fim, estado = trecho or (None, None, None)
+    lote = []
+
+    for timestamp, linktype, dados in leitor.registros(inicio, fim, estado):
+        lote.append((timestamp, classe_enlace(linktype), dados))
+        if len(lote) >= tamanho_lote:
+            infos = analisar_lote(lote)
+            # as fatias apontam para o mmap e precisam sair de uso antes de o leitor ser fechado
+            lote.clear()
+            yield infos
+
+    if lote:
+        infos = analisar_lote(lote)
+        lote.clear()
+        yield infos
+
+
+def analisar_trecho(caminho, trecho, tamanho_lote=1024, max_infos=None, parametros_fluxos=None):
+    estatisticas = EstatisticasCaptura()
+    fluxos = TabelaFluxos(**parametros_fluxos, guardar_iniciais=True) if parametros_fluxos is not None else None
+    infos_retidas = deque(maxlen=max_infos)
+    quantidade = 0
+
+    with LeitorPcap(caminho) as leitor:
+        for infos in analisar_registros(leitor, tamanho_lote, trecho):
+            for info in infos:
+                estatisticas.registrar(info)
+                if fluxos is not None:
+                    fluxos.registrar(info)
+            infos_retidas.extend(infos)
+            quantidade += len(infos)
+
+    return estatisticas, fluxos, quantidade, list(infos_retidas)
+
+
+def analisar_arquivo(analisador, caminho, processos=0, tamanho_lote=1024, exibir_pacotes=False):
+    if not processos:
+        with LeitorPcap(caminho) as leitor:
+            for infos in analisar_registros(leitor, tamanho_lote):
+                for info in infos:
+                    analisador.registrar_info(info)
+                    if exibir_pacotes:
+                        analisador.exibir_pacote(info)
+        return analisador
+
+    with LeitorPcap(caminho) as leitor:
+        trechos = leitor.dividir(processos * 4)
+
+    max_infos = analisador.pacotes_capturados.maxlen
+    parametros_fluxos = analisador.fluxos.parametros if analisador.fluxos is not None else None
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        tarefas = [executor.submit(analisar_trecho, caminho, trecho, tamanho_lote, max_infos, parametros_fluxos)
+                   for trecho in trechos]
+
+        # os trechos sao mesclados na ordem do arquivo para a numeracao e a retencao ficarem
+        # iguais as da leitura sequencial
+        for tarefa in tarefas:
+            estatisticas, fluxos, quantidade, infos = tarefa.result()
+            analisador.estatisticas.mesclar(estatisticas)
+            if fluxos is not None:
+                analisador.fluxos.mesclar(fluxos)
+
+            primeiro = analisador.contador_pacotes + quantidade - len(infos)
+            for posicao, info in enumerate(infos, 1):
+                info['numero'] = primeiro + posicao
+                analisador.reter_info(info)
+                if exibir_pacotes:
+                    analisador.exibir_pacote(info)
+            analisador.contador_pacotes += quantidade
+
+    return analisador
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisa um arquivo pcap/pcapng")
+    parser.add_argument('arquivo')
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1,
+                        help="processos analisadores (0 para ler sequencialmente)")
+    parser.add_argument('--tempo-ocioso', type=float, default=300.0)
+    args = parser.parse_args()
+
+    analisador = AnalisadorRede(max_pacotes=0, intervalo_estatisticas=0, rastrear_fluxos=True,
+                                tempo_ocioso_fluxos=args.tempo_ocioso)
+    try:
+        analisar_arquivo(analisador, args.arquivo, processos=args.processos)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler o arquivo: {e}")
+        sys.exit(1)
+    analisador.exibir_estatisticas(agora=analisador.estatisticas.ultimo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import socket
+import struct
+
+import numpy as np
+
+from decodificador_rapido import CODIGOS_FLAGS_TCP, TEXTO_FLAGS_TCP
+
+DTYPE_PACOTE = np.dtype([
+    ('timestamp', np.float64),
+    ('tamanho', np.uint32),
+    # bits CAMADA_ETHERNET e CAMADA_IP indicando quais camadas o pacote tinha
+    ('camadas', np.uint8),
+    ('mac_origem', np.uint64),
+    ('mac_destino', np.uint64),
+    ('ethertype', np.uint16),
+    ('ip_origem', np.uint32),
+    ('ip_destino', np.uint32),
+    ('protocolo', np.uint8),
+    ('ttl', np.uint8),
+    ('tamanho_ip', np.uint16),
+    # 6, 17 ou 1 conforme a camada TCP, UDP ou ICMP presente; 0 quando nao ha camada de transporte
+    ('transporte', np.uint8),
+    ('porta_origem', np.uint16),
+    ('porta_destino', np.uint16),
+    ('flags_tcp', np.uint8),
+    ('sequencia', np.uint32),
+    ('ack', np.uint32),
+    ('tamanho_dados', np.uint32),
+    ('tipo_icmp', np.uint8),
+    ('codigo_icmp', np.uint8),
+])
+
+TRANSPORTES = {'TCP': 6, 'UDP': 17, 'ICMP': 1}
+CAMADA_ETHERNET = 1
+CAMADA_IP = 2
+IPV4 = struct.Struct('!I')
+
+
+def ip_para_inteiro(endereco):
+    return IPV4.unpack(socket.inet_aton(endereco))[0]
+
+
+def inteiro_para_ip(valor):
+    return socket.inet_ntoa(IPV4.pack(int(valor)))
+
+
+def mac_para_inteiro(endereco):
+    return int(endereco.replace(':', ''), 16)
+
+
+def inteiro_para_mac(valor):
+    texto = f"{int(valor):012x}"
+    return ':'.join(texto[i:i + 2] for i in range(0, 12, 2))
+
+
+def linha_de_info(info):
+    linha = [info['timestamp'], info.get('tamanho', 0)] + [0] * 18
+
+    for camada in info['camadas']:
+        tipo = camada['tipo']
+        if tipo == 'Ethernet':
+            linha[2] |= CAMADA_ETHERNET
+            linha[3:6] = [mac_para_inteiro(camada['origem']), mac_para_inteiro(camada['destino']), camada['protocolo']]
+        elif tipo == 'IP':
+            linha[2] |= CAMADA_IP
+            linha[6:11] = [ip_para_inteiro(camada['origem']), ip_para_inteiro(camada['destino']),
+                           camada['protocolo'], camada['ttl'], camada['tamanho']]
+        elif tipo == 'TCP':
+            linha[11:18] = [6, camada['porta_origem'], camada['porta_destino'], CODIGOS_FLAGS_TCP[camada['flags']],
+                            camada['sequencia'], camada['ack'], camada['tamanho']]
+        elif tipo == 'UDP':
+            linha[11:14] = [17, camada['porta_origem'], camada['porta_destino']]
+            linha[17] = camada['tamanho']
+        elif tipo == 'ICMP':
+            linha[11] = 1
+            linha[18:20] = [camada['tipo_icmp'], camada['codigo']]
+
+    return tuple(linha)
+
+
+class ArmazenamentoColunar:
+    def __init__(self, maxlen=None, tamanho_bloco=65536):
+        self.maxlen = maxlen
+        self.tamanho_bloco = tamanho_bloco
+        self.blocos = []
+        self.preenchido = 0
+        self.inicio = 0
+        self.quantidade = 0
+        self._cache = None
+
+    def __len__(self):
+        return self.quantidade
+
+    def _novo_bloco(self):
+        self.blocos.append(np.empty(self.tamanho_bloco, dtype=DTYPE_PACOTE))
+        self.preenchido = 0
+
+    def adicionar(self, info):
+        if not self.blocos or self.preenchido == len(self.blocos[-1]):
+            self._novo_bloco()
+        self.blocos[-1][self.preenchido] = linha_de_info(info)
+        self.preenchido += 1
+        self.quantidade += 1
+        self._cache = None
+        self._aplicar_limite()
+
+    def adicionar_infos(self, infos):
+        self.adicionar_array(np.array([linha_de_info(info) for info in infos], dtype=DTYPE_PACOTE))
+
+    def adicionar_array(self, pacotes):
+        pacotes = np.asarray(pacotes, dtype=DTYPE_PACOTE)
+        posicao = 0
+        while posicao < len(pacotes):
+            if not self.blocos or self.preenchido == len(self.blocos[-1]):
+                self._novo_bloco()
+            bloco = self.blocos[-1]
+            quantidade = min(len(bloco) - self.preenchido, len(pacotes) - posicao)
+            bloco[self.preenchido:self.preenchido + quantidade] = pacotes[posicao:posicao + quantidade]
+            self.preenchido += quantidade
+            posicao += quantidade
+
+        self.quantidade += len(pacotes)
+        self._cache = None
+        self._aplicar_limite()
+
+    def _descartar_primeiros(self, quantidade):
+        self.quantidade -= quantidade
+        while quantidade:
+            fim_bloco = self.preenchido if len(self.blocos) == 1 else len(self.blocos[0])
+            restantes = fim_bloco - self.inicio
+            if quantidade < restantes or len(self.blocos) == 1:
+                self.inicio += quantidade
+                break
+            quantidade -= restantes
+            self.blocos.pop(0)
+            self.inicio = 0
+        self._cache = None
+
+    def _aplicar_limite(self):
+        if self.maxlen is not None and self.quantidade > self.maxlen:
+            self._descartar_primeiros(self.quantidade - self.maxlen)
+
+    def descartar_anteriores(self, limite):
+        # a retencao por tempo assume, como a deque, que os pacotes chegam em ordem
+        descartar = 0
+        for posicao, bloco in enumerate(self.blocos):
+            fim_bloco = self.preenchido if posicao == len(self.blocos) - 1 else len(bloco)
+            inicio_bloco = self.inicio if posicao == 0 else 0
+            timestamps = bloco['timestamp'][inicio_bloco:fim_bloco]
+            antigos = int(np.searchsorted(timestamps, limite, side='left'))
+            descartar += antigos
+            if antigos < len(timestamps):
+                break
+
+        if descartar:
+            self._descartar_primeiros(descartar)
+
+    def array(self):
+        if self._cache is None:
+            partes = list(self.blocos)
+            if partes:
+                partes[-1] = partes[-1][:self.preenchido]
+                partes[0] = partes[0][self.inicio:] if len(partes) > 1 else partes[0][self.inicio:self.preenchido]
+            self._cache = np.concatenate(partes) if partes else np.empty(0, dtype=DTYPE_PACOTE)
+        return self._cache
+
+    def info(self, posicao):
+        linha = self.array()[posicao]
+        camadas = []
+
+        if linha['camadas'] & CAMADA_ETHERNET:
+            camadas.append({'tipo': 'Ethernet', 'origem': inteiro_para_mac(linha['mac_origem']),
+                            'destino': inteiro_para_mac(linha['mac_destino']), 'protocolo': int(linha['ethertype'])})
+
+        if linha['camadas'] & CAMADA_IP:
+            camadas.append({'tipo': 'IP', 'origem': inteiro_para_ip(linha['ip_origem']),
+                            'destino': inteiro_para_ip(linha['ip_destino']), 'protocolo': int(linha['protocolo']),
+                            'ttl': int(linha['ttl']), 'tamanho': int(linha['tamanho_ip'])})
+
+        transporte = linha['transporte']
+        if transporte == 6:
+            camadas.append({'tipo': 'TCP', 'porta_origem': int(linha['porta_origem']),
+                            'porta_destino': int(linha['porta_destino']), 'flags': TEXTO_FLAGS_TCP[linha['flags_tcp']],
+                            'sequencia': int(linha['sequencia']), 'ack': int(linha['ack']),
+                            'tamanho': int(linha['tamanho_dados'])})
+        elif transporte == 17:
+            camadas.append({'tipo': 'UDP', 'porta_origem': int(linha['porta_origem']),
+                            'porta_destino': int(linha['porta_destino']), 'tamanho': int(linha['tamanho_dados'])})
+        elif transporte == 1:
+            camadas.append({'tipo': 'ICMP', 'tipo_icmp': int(linha['tipo_icmp']), 'codigo': int(linha['codigo_icmp'])})
+
+        return {'timestamp': float(linha['timestamp']), 'tamanho': int(linha['tamanho']), 'camadas': camadas}
+
+    def _filtrar(self, protocolo=None):
+        pacotes = self.array()
+        if protocolo is not None:
+            pacotes = pacotes[pacotes['transporte'] == TRANSPORTES.get(protocolo, protocolo)]
+        return pacotes
+
+    def top_pares_ip(self, top=5, protocolo=None):
+        pacotes = self._filtrar(protocolo)
+        pacotes = pacotes[(pacotes['camadas'] & CAMADA_IP) != 0]
+        chaves = (pacotes['ip_origem'].astype(np.uint64) << np.uint64(32)) | pacotes['ip_destino']
+        pares, contagens = np.unique(chaves, return_counts=True)
+        ordem = np.argsort(contagens, kind='stable')[::-1][:top]
+        return [((inteiro_para_ip(par >> np.uint64(32)), inteiro_para_ip(par & np.uint64(0xFFFFFFFF))), int(contagem))
+                for par, contagem in zip(pares[ordem], contagens[ordem])]
+
+    def top_origens(self, top=5, por='bytes', protocolo=None):
+        pacotes = self._filtrar(protocolo)
+        pacotes = pacotes[(pacotes['camadas'] & CAMADA_IP) != 0]
+        origens, indices = np.unique(pacotes['ip_origem'], return_inverse=True)
+        pesos = pacotes['tamanho'] if por == 'bytes' else None
+        totais = np.bincount(indices, weights=pesos, minlength=len(origens))
+        ordem = np.argsort(totais, kind='stable')[::-1][:top]
+        return [(inteiro_para_ip(origem), int(total)) for origem, total in zip(origens[ordem], totais[ordem])]
+
+    def histograma_portas(self, protocolo=None, campo='porta_destino'):
+        pacotes = self._filtrar(protocolo)
+        pacotes = pacotes[(pacotes['transporte'] == 6) | (pacotes['transporte'] == 17)]
+        return np.bincount(pacotes[campo], minlength=65536)
+
+    def top_portas(self, top=5, protocolo=None, campo='porta_destino'):
+        histograma = self.histograma_portas(protocolo, campo)
+        portas = np.flatnonzero(histograma)
+        portas = portas[np.argsort(histograma[portas], kind='stable')[::-1][:top]]
+        return [(int(porta), int(histograma[porta])) for porta in portas]
+
+    def por_intervalo(self, intervalo=1.0, protocolo=None):
+        pacotes = self._filtrar(protocolo)
+        baldes = np.floor(pacotes['timestamp'] / intervalo).astype(np.int64)
+        inicios, indices = np.unique(baldes, return_inverse=True)
+        quantidades = np.bincount(indices, minlength=len(inicios))
+        bytes_ = np.bincount(indices, weights=pacotes['tamanho'], minlength=len(inicios))
+        return inicios * intervalo, quantidades, bytes_
+
+    def salvar_npz(self, caminho):
+        np.savez_compressed(caminho, pacotes=self.array())
+
+    @classmethod
+    def carregar_npz(cls, caminho, maxlen=None):
+        armazenamento = cls(maxlen=maxlen)
+        with np.load(caminho) as arquivo:
+            armazenamento.adicionar_array(arquivo['pacotes'])
+        return armazenamento
+
+    def para_arrow(self):
+        import pyarrow as pa
+
+        pacotes = self.array()
+        return pa.table({nome: pacotes[nome] for nome in DTYPE_PACOTE.names})
+
+    def salvar_parquet(self, caminho):
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.para_arrow(), caminho)
+
+    def salvar_arrow(self, caminho):
+        import pyarrow.feather as feather
+
+        feather.write_feather(self.para_arrow(), caminho)
+
+    def salvar(self, caminho):
+        if caminho.endswith('.parquet'):
+            self.salvar_parquet(caminho)
+        elif caminho.endswith(('.arrow', '.feather')):
+            self.salvar_arrow(caminho)
+        else:
+            self.salvar_npz(caminho)
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import Dijkstra
+import Heuristica
+from grafo_csr import GrafoCSR
+
+
+TAMANHOS_PADRAO = [10, 100, 1000, 10000, 100000, 1000000]
+
+
+def gerar_grafo_denso(n, gerador):
+    matriz = gerador.integers(1, 101, size=(n, n))
+    matriz = np.triu(matriz, 1)
+    return matriz + matriz.T
+
+
+def gerar_instancia_euclidiana(n, gerador):
+    return gerador.random((n, 2))
+
+
+def gerar_grafo_esparso(coordenadas, grau):
+    n = len(coordenadas)
+    grau = min(grau, n - 1)
+    # a mesma busca de k vizinhos da heuristica, com scipy quando disponivel
+    vizinhos = np.array(Heuristica._listas_vizinhos(n, grau, coordenadas=coordenadas), dtype=np.int64)
+    origens = np.repeat(np.arange(n), grau)
+    destinos = vizinhos.ravel()
+
+    # vizinhos mutuos aparecem duas vezes; cada par entra uma vez so, depois nos dois sentidos
+    pares = np.unique(np.stack((np.minimum(origens, destinos), np.maximum(origens, destinos)), axis=1), axis=0)
+    menores, maiores = pares[:, 0], pares[:, 1]
+    pesos = np.hypot(*(coordenadas[menores] - coordenadas[maiores]).T)
+    return GrafoCSR.de_arestas(n, np.concatenate((menores, maiores)),
+                               np.concatenate((maiores, menores)), np.concatenate((pesos, pesos)))
+
+
+def medir(funcao, repeticoes, memoria):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return min(tempos), float(np.median(tempos)), pico
+
+
+def casos_de_teste(n, gerador, args):
+    coordenadas = gerar_instancia_euclidiana(n, gerador)
+    esparso = gerar_grafo_esparso(coordenadas, args.grau) if n > 1 else None
+    origem, destino = 0, n - 1
+
+    if n <= args.limite_denso:
+        denso = gerar_grafo_denso(n, gerador)
+        _, anteriores_denso = Dijkstra.dijkstra(denso, origem)
+        yield 'dijkstra', 'denso', denso.size, lambda: Dijkstra.dijkstra(denso, origem)
+        yield 'construir_arvore_geradora', 'denso', n, lambda: Dijkstra.construir_arvore_geradora(anteriores_denso, denso)
+        yield 'vizinho_mais_proximo', 'denso', denso.size, lambda: Heuristica.vizinho_mais_proximo(denso, origem)
+
+    if n <= args.limite_floyd_warshall:
+        denso = gerar_grafo_denso(n, gerador)
+        yield 'floyd_warshall', 'denso', denso.size, lambda: Dijkstra.floyd_warshall(denso)
+        yield 'dijkstra_multiplas_origens', 'denso', denso.size, lambda: Dijkstra.dijkstra_multiplas_origens(denso)
+
+    if 1 < n <= args.limite_denso:
+        denso = gerar_grafo_denso(n, gerador)
+        inicios = min(args.inicios, n)
+        for processos in sorted({1, args.processos}):
+            yield ('vizinho_mais_proximo_multiplos_inicios', f'denso_{processos}p', denso.size,
+                   lambda processos=processos: Heuristica.vizinho_mais_proximo_multiplos_inicios(
+                       denso, amostra=inicios, processos=processos, semente=args.semente))
+        yield ('vizinho_mais_proximo_multiplos_inicios', f'melhorar_{args.processos}p', denso.size,
+               lambda: Heuristica.vizinho_mais_proximo_multiplos_inicios(
+                   denso, amostra=inicios, melhorar=True, processos=args.processos, semente=args.semente))
+
+    if esparso is not None:
+        arestas = esparso.numero_arestas
+        _, anteriores = Dijkstra.dijkstra(esparso, origem)
+        heuristica = Dijkstra.heuristica_euclidiana(coordenadas)
+        vizinhos = Dijkstra.funcao_vizinhos(esparso)
+        vizinhos_reversos = Dijkstra.funcao_vizinhos(esparso.transposta())
+
+        yield 'dijkstra', 'csr', arestas, lambda: Dijkstra.dijkstra(esparso, origem)
+        yield 'obter_caminhos_mais_curtos', 'csr', n, lambda: Dijkstra.obter_caminhos_mais_curtos(anteriores, origem)
+        yield 'caminho_mais_curto', 'dijkstra', arestas, lambda: Dijkstra.caminho_mais_curto(esparso, origem, destino)
+        yield 'caminho_mais_curto', 'bidirecional', arestas, lambda: Dijkstra.caminho_mais_curto(
+            esparso, origem, destino, 'bidirecional', vizinhos=vizinhos, vizinhos_reversos=vizinhos_reversos)
+        yield 'caminho_mais_curto', 'a_estrela', arestas, lambda: Dijkstra.caminho_mais_curto(
+            esparso, origem, destino, 'a_estrela', heuristica, vizinhos=vizinhos)
+        if n <= args.limite_arvore:
+            yield 'construir_arvore_geradora', 'csr', n, lambda: Dijkstra.construir_arvore_geradora(anteriores, esparso)
+        if n <= args.limite_multiplas_origens:
+            origens = gerador.choice(n, size=min(args.origens, n), replace=False).tolist()
+            for processos in sorted({1, args.processos}):
+                yield ('dijkstra_multiplas_origens', f'csr_{processos}p', arestas * len(origens),
+                       lambda processos=processos: Dijkstra.dijkstra_multiplas_origens(
+                           esparso, origens, processos=processos, limite_floyd_warshall=0))
+
+    if n <= args.limite_tsp:
+        caminho, _ = Heuristica.vizinho_mais_proximo_coordenadas(coordenadas, origem)
+        yield 'vizinho_mais_proximo', 'coordenadas', n, lambda: Heuristica.vizinho_mais_proximo_coordenadas(coordenadas, origem)
+        yield 'melhorar_rota', 'coordenadas', n, lambda: Heuristica.melhorar_rota(caminho, coordenadas=coordenadas)
+
+
+def versao_git():
+    try:
+        resultado = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return resultado.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(args):
+    # carrega antes das medicoes o import tardio feito por construir_arvore_geradora
+    import networkx  # noqa: F401
+
+    ambiente = {
+        'commit': versao_git(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'semente': args.semente,
+    }
+    resultados = []
+
+    for n in args.tamanhos:
+        gerador = np.random.default_rng([args.semente, n])
+
+        for algoritmo, variante, tamanho_entrada, funcao in casos_de_teste(n, gerador, args):
+            melhor, mediana, pico = medir(funcao, args.repeticoes, not args.sem_memoria)
+            resultado = {
+                'algoritmo': algoritmo,
+                'variante': variante,
+                'n': n,
+                'tamanho_entrada': int(tamanho_entrada),
+                'tempo_min_s': melhor,
+                'tempo_mediana_s': mediana,
+                'pico_memoria_bytes': pico,
+            }
+            resultados.append(resultado)
+            pico_texto = f"{pico / 1024:.0f} KiB" if pico is not None else "-"
+            print(f"{algoritmo:38} {variante:13} n={n:<9} {mediana * 1000:11.3f} ms  {pico_texto}", file=sys.stderr)
+
+    return ambiente, resultados
+
+
+def salvar(ambiente, resultados, arquivo_json, arquivo_csv):
+    if arquivo_json:
+        with open(arquivo_json, 'w', encoding='utf-8') as f:
+            json.dump({'ambiente': ambiente, 'resultados': resultados}, f, indent=2)
+
+    if arquivo_csv:
+        campos = ['commit'] + list(resultados[0].keys()) if resultados else ['commit']
+        with open(arquivo_csv, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=campos)
+            escritor.writeheader()
+            for resultado in resultados:
+                escritor.writerow({'commit': ambiente['commit'], **resultado})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos algoritmos de grafos e do caixeiro viajante")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--grau', type=int, default=4, help="vizinhos por no no grafo esparso")
+    parser.add_argument('--limite-denso', type=int, default=2000)
+    parser.add_argument('--limite-floyd-warshall', type=int, default=500)
+    parser.add_argument('--limite-arvore', type=int, default=100000)
+    parser.add_argument('--limite-tsp', type=int, default=1000000)
+    parser.add_argument('--limite-multiplas-origens', type=int, default=100000)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1,
+                        help="processos das variantes paralelas, comparadas com a de um processo")
+    parser.add_argument('--origens', type=int, default=64, help="origens do Dijkstra em lote")
+    parser.add_argument('--inicios', type=int, default=32, help="inicios do vizinho mais proximo com varios inicios")
+    parser.add_argument('--sem-memoria', action='store_true', help="nao mede o pico de memoria com tracemalloc")
+    parser.add_argument('--json', default='benchmark.json')
+    parser.add_argument('--csv', default=None)
+    args = parser.parse_args()
+
+    ambiente, resultados = executar(args)
+    salvar(ambiente, resultados, args.json, args.csv)
+
+
+if __name__ == "__main__":
+    main()
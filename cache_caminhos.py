@@ -0,0 +1,153 @@
+import hashlib
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from Dijkstra import dijkstra, obter_caminhos_mais_curtos
+from grafo_csr import GrafoCSR
+
+
+def impressao_grafo(grafo):
+    # impressao pelo conteudo; percorre o grafo inteiro, entao o cache so a calcula quando nao ha versao
+    if isinstance(grafo, GrafoCSR):
+        return ('csr', grafo.identificador, grafo.versao)
+    if isinstance(grafo, np.ndarray):
+        conteudo = np.ascontiguousarray(grafo)
+        return ('matriz', conteudo.shape, conteudo.dtype.str, hashlib.blake2b(conteudo.data, digest_size=16).hexdigest())
+    return ('lista', hashlib.blake2b(repr(grafo).encode('utf-8'), digest_size=16).hexdigest())
+
+
+def _referencia(grafo):
+    try:
+        return weakref.ref(grafo)
+    except TypeError:
+        # listas nao aceitam weakref; a referencia forte impede que o id seja reaproveitado enquanto houver entradas
+        return lambda: grafo
+
+
+class CacheCaminhos:
+    def __init__(self, capacidade=128, limite_nos=None):
+        self.capacidade = capacidade
+        self.limite_nos = limite_nos
+        self.entradas = OrderedDict()
+        # identidade do grafo -> (referencia, token, versao, impressao) da ultima consulta
+        self.registros = {}
+        self.entradas_por_impressao = {}
+        self.nos_armazenados = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.invalidacoes = 0
+
+    def _impressao(self, grafo, versao):
+        if isinstance(grafo, GrafoCSR):
+            identidade = grafo.identificador
+            registro = self.registros.get(identidade)
+            impressao = impressao_grafo(grafo)
+            if registro is None or registro[3] != impressao:
+                registro = (None, None, grafo.versao, impressao)
+        else:
+            identidade = id(grafo)
+            registro = self.registros.get(identidade)
+            if registro is not None and registro[0]() is not grafo:
+                # o grafo do registro foi descartado e o id agora e de outro objeto
+                self._invalidar(registro[3])
+                self.registros.pop(identidade, None)
+                registro = None
+
+            # com versao explicita, ou numa matriz somente leitura, a impressao ja calculada continua valendo
+            imutavel = isinstance(grafo, np.ndarray) and not grafo.flags.writeable
+            if registro is None or registro[2] != versao or (versao is None and not imutavel):
+                referencia, token = registro[:2] if registro is not None else (_referencia(grafo), uuid.uuid4().hex)
+                if versao is not None:
+                    impressao = ('versao', token, versao)
+                else:
+                    impressao = impressao_grafo(grafo)
+                registro = (referencia, token, versao, impressao)
+
+        anterior = self.registros.get(identidade)
+        if anterior is not None and anterior[3] != registro[3]:
+            self._invalidar(anterior[3])
+        self.registros[identidade] = registro
+        return identidade, registro[3]
+
+    def _invalidar(self, impressao):
+        for chave in [chave for chave in self.entradas if chave[0] == impressao]:
+            self._remover(chave)
+            self.invalidacoes += 1
+
+    def _remover(self, chave):
+        _, _, _, nos = self.entradas.pop(chave)
+        self.nos_armazenados -= nos
+
+        impressao = chave[0]
+        identidade, quantidade = self.entradas_por_impressao[impressao]
+        if quantidade > 1:
+            self.entradas_por_impressao[impressao] = (identidade, quantidade - 1)
+        else:
+            # sem entradas, o registro do grafo tambem sai para nao segurar o objeto nem crescer sem limite
+            del self.entradas_por_impressao[impressao]
+            registro = self.registros.get(identidade)
+            if registro is not None and registro[3] == impressao:
+                del self.registros[identidade]
+
+    def _limitar(self):
+        while self.entradas and (len(self.entradas) > self.capacidade or
+                                 (self.limite_nos is not None and self.nos_armazenados > self.limite_nos)):
+            self._remover(next(iter(self.entradas)))
+
+    def _buscar(self, grafo, inicio, versao):
+        identidade, impressao = self._impressao(grafo, versao)
+        chave = (impressao, inicio)
+
+        if chave in self.entradas:
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return chave, self.entradas[chave]
+
+        self.faltas += 1
+        distancias, anteriores = dijkstra(grafo, inicio)
+        entrada = (tuple(distancias), tuple(anteriores), None, len(distancias))
+        self.entradas[chave] = entrada
+        _, quantidade = self.entradas_por_impressao.get(impressao, (identidade, 0))
+        self.entradas_por_impressao[impressao] = (identidade, quantidade + 1)
+        self.nos_armazenados += entrada[3]
+        self._limitar()
+
+        return chave, entrada
+
+    def dijkstra(self, grafo, inicio, versao=None):
+        _, (distancias, anteriores, _, _) = self._buscar(grafo, inicio, versao)
+        return list(distancias), list(anteriores)
+
+    def obter_caminhos_mais_curtos(self, grafo, inicio, versao=None):
+        chave, (distancias, anteriores, caminhos, nos) = self._buscar(grafo, inicio, versao)
+
+        if caminhos is None:
+            caminhos = obter_caminhos_mais_curtos(anteriores, inicio)
+            if chave in self.entradas:
+                # os caminhos guardados tambem contam para o limite de nos
+                nos_caminhos = sum(len(caminho) for caminho in caminhos.values())
+                self.entradas[chave] = (distancias, anteriores, caminhos, nos + nos_caminhos)
+                self.nos_armazenados += nos_caminhos
+                self._limitar()
+
+        return {no: list(caminho) for no, caminho in caminhos.items()}
+
+    def limpar(self):
+        self.entradas.clear()
+        self.registros.clear()
+        self.entradas_por_impressao.clear()
+        self.nos_armazenados = 0
+
+    def estatisticas(self):
+        consultas = self.acertos + self.faltas
+        return {
+            'entradas': len(self.entradas),
+            'nos_armazenados': self.nos_armazenados,
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'invalidacoes': self.invalidacoes,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+        }
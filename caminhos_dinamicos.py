@@ -0,0 +1,224 @@
+import heapq
+
+import numpy as np
+
+from Dijkstra import funcao_vizinhos, grafo_reverso, linha_esparsa
+from grafo_csr import GrafoCSR
+
+
+def _linha_esparsa(grafo, linha):
+    if isinstance(linha, dict) or linha_esparsa(linha):
+        return True
+    # uma linha vazia nao diz a forma; vale a da primeira linha preenchida do grafo
+    return not linha and any(linha_esparsa(outra) for outra in grafo if len(outra) > 0)
+
+
+def _peso_atual(grafo, origem, destino):
+    if isinstance(grafo, GrafoCSR):
+        peso = grafo.peso(origem, destino)
+    elif isinstance(grafo[origem], dict):
+        peso = grafo[origem].get(destino, 0)
+    elif isinstance(grafo, np.ndarray) or not _linha_esparsa(grafo, grafo[origem]):
+        peso = grafo[origem][destino]
+    else:
+        peso = next((peso for vizinho, peso in grafo[origem] if vizinho == destino), 0)
+    return peso if peso > 0 else float('inf')
+
+
+def _aplicar_peso(grafo, origem, destino, peso, reverso=None):
+    if isinstance(grafo, GrafoCSR):
+        grafo.atualizar_peso(origem, destino, peso)
+        return
+
+    linha = grafo[origem]
+    if isinstance(linha, dict):
+        if peso <= 0:
+            linha.pop(destino, None)
+        else:
+            linha[destino] = peso
+    elif isinstance(grafo, np.ndarray) or not _linha_esparsa(grafo, linha):
+        linha[destino] = peso
+    else:
+        posicao = next((i for i, (vizinho, _) in enumerate(linha) if vizinho == destino), None)
+        if peso <= 0:
+            if posicao is not None:
+                del linha[posicao]
+        elif posicao is None:
+            linha.append((destino, peso))
+        else:
+            linha[posicao] = (destino, peso)
+
+    # uma aresta nova tambem entra no reverso; as removidas ficam nele e sao ignoradas pelo peso infinito
+    if reverso is not None and peso > 0 and not isinstance(reverso, np.ndarray):
+        if all(anterior != origem for anterior, _ in reverso[destino]):
+            reverso[destino].append((origem, peso))
+
+
+def _funcao_entrantes(grafo, reverso):
+    if isinstance(grafo, np.ndarray):
+        def entrantes(no):
+            coluna = grafo[:, no]
+            origens = np.flatnonzero(coluna > 0)
+            return zip(origens.tolist(), coluna[origens].tolist())
+
+        return entrantes
+
+    # o reverso so fornece as origens; os pesos sao lidos do grafo, que ja tem as alteracoes aplicadas
+    if isinstance(reverso, GrafoCSR):
+        def origens_de(no):
+            return reverso.vizinhos(no)[0].tolist()
+    else:
+        def origens_de(no):
+            return [origem for origem, _ in reverso[no]]
+
+    def entrantes(no):
+        for origem in origens_de(no):
+            peso = _peso_atual(grafo, origem, no)
+            if peso < float('inf'):
+                yield origem, peso
+
+    return entrantes
+
+
+def _funcao_saintes(grafo):
+    if isinstance(grafo, (GrafoCSR, np.ndarray)):
+        return funcao_vizinhos(grafo)[1]
+
+    # le a linha do no sob demanda em vez de converter o grafo inteiro a cada atualizacao
+    def saintes(no):
+        linha = grafo[no]
+        if isinstance(linha, dict):
+            return [(vizinho, peso) for vizinho, peso in linha.items() if peso > 0]
+        if _linha_esparsa(grafo, linha):
+            return [(vizinho, peso) for vizinho, peso in linha if peso > 0]
+        return [(vizinho, peso) for vizinho, peso in enumerate(linha) if peso > 0]
+
+    return saintes
+
+
+def indice_filhos(anteriores):
+    filhos = [set() for _ in range(len(anteriores))]
+    for no, anterior in enumerate(anteriores):
+        if anterior != -1:
+            filhos[anterior].add(no)
+    return filhos
+
+
+def _descendentes(anteriores, raizes, filhos=None):
+    if filhos is None:
+        anteriores = np.asarray(anteriores)
+        ordem = np.argsort(anteriores, kind='stable')
+        pais_ordenados = anteriores[ordem]
+
+        def filhos_de(no):
+            inicio, fim = np.searchsorted(pais_ordenados, [no, no + 1])
+            return ordem[inicio:fim].tolist()
+    else:
+        filhos_de = filhos.__getitem__
+
+    descendentes = set(raizes)
+    pendentes = list(raizes)
+    while pendentes:
+        no = pendentes.pop()
+        for filho in filhos_de(no):
+            if filho not in descendentes:
+                descendentes.add(filho)
+                pendentes.append(filho)
+
+    return descendentes
+
+
+def atualizar_caminhos(grafo, distancias, anteriores, alteracoes, reverso=None, filhos=None):
+    # quem faz varias atualizacoes no mesmo grafo deve passar o reverso (grafo_reverso) e reaproveita-lo:
+    # as arestas novas sao incluidas nele aqui; sem ele, o reverso e montado a cada chamada que precisar
+    alteracoes = list(alteracoes)
+    raizes_afetadas = []
+    reduzidas = []
+
+    for origem, destino, peso in alteracoes:
+        antigo = _peso_atual(grafo, origem, destino)
+        _aplicar_peso(grafo, origem, destino, peso, reverso)
+        novo = _peso_atual(grafo, origem, destino)
+
+        if novo > antigo and anteriores[destino] == origem:
+            raizes_afetadas.append(destino)
+        elif novo < antigo:
+            reduzidas.append((origem, destino))
+
+    alterados = {}
+    valores_antigos = {}
+    fila = []
+
+    def registrar(no, distancia, anterior):
+        if no not in valores_antigos:
+            valores_antigos[no] = (distancias[no], anteriores[no])
+        if filhos is not None and anteriores[no] != anterior:
+            if anteriores[no] != -1:
+                filhos[anteriores[no]].discard(no)
+            if anterior != -1:
+                filhos[anterior].add(no)
+        distancias[no] = distancia
+        anteriores[no] = anterior
+
+    afetados = _descendentes(anteriores, raizes_afetadas, filhos) if raizes_afetadas else set()
+    for no in afetados:
+        registrar(no, float('inf'), -1)
+
+    if afetados:
+        if reverso is None and not isinstance(grafo, np.ndarray):
+            # montado depois das alteracoes, ja inclui as arestas novas
+            reverso = grafo_reverso(grafo)
+        entrantes = _funcao_entrantes(grafo, reverso)
+        for no in afetados:
+            for origem, peso in entrantes(no):
+                if origem in afetados:
+                    continue
+                nova_distancia = distancias[origem] + peso
+                if nova_distancia < distancias[no]:
+                    registrar(no, nova_distancia, origem)
+            if distancias[no] < float('inf'):
+                heapq.heappush(fila, (distancias[no], no))
+
+    for origem, destino in reduzidas:
+        nova_distancia = distancias[origem] + _peso_atual(grafo, origem, destino)
+        if nova_distancia < distancias[destino]:
+            registrar(destino, nova_distancia, origem)
+            heapq.heappush(fila, (nova_distancia, destino))
+
+    vizinhos_de = _funcao_saintes(grafo)
+    while fila:
+        distancia_atual, atual = heapq.heappop(fila)
+        if distancia_atual > distancias[atual]:
+            continue
+
+        for vizinho, peso in vizinhos_de(atual):
+            nova_distancia = distancia_atual + peso
+            if nova_distancia < distancias[vizinho]:
+                registrar(vizinho, nova_distancia, atual)
+                heapq.heappush(fila, (nova_distancia, vizinho))
+
+    for no, (distancia_antiga, anterior_antigo) in valores_antigos.items():
+        if distancias[no] != distancia_antiga or anteriores[no] != anterior_antigo:
+            alterados[no] = anterior_antigo
+
+    for origem, destino, _ in alteracoes:
+        if anteriores[destino] == origem and destino not in alterados:
+            alterados[destino] = origem
+
+    return alterados
+
+
+def atualizar_arvore_geradora(arvore, grafo, anteriores, alterados, nomes=None):
+    if nomes is None:
+        nomes = list(range(len(anteriores)))
+
+    for no, anterior_antigo in alterados.items():
+        if anterior_antigo != -1 and arvore.has_edge(nomes[anterior_antigo], nomes[no]):
+            arvore.remove_edge(nomes[anterior_antigo], nomes[no])
+
+    for no in alterados:
+        if anteriores[no] != -1:
+            peso = int(_peso_atual(grafo, anteriores[no], no))
+            arvore.add_edge(nomes[anteriores[no]], nomes[no], weight=peso)
+
+    return arvore
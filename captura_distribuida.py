@@ -0,0 +1,268 @@
+import multiprocessing
+import os
+import queue
+import signal
+import struct
+import time
+from select import select
+
+from amostragem import combinar_filtros
+from captura_pacotes import AnalisadorRede, abrir_socket_bruto
+from estatisticas_captura import EstatisticasCaptura
+from metricas_captura import SOL_PACKET, ler_estatisticas_kernel
+from tabela_fluxos import TabelaFluxos, resumir_tabelas
+
+PACKET_FANOUT = 18
+# o hash do kernel para o fanout e simetrico, entao os dois sentidos de um fluxo caem no mesmo socket
+PACKET_FANOUT_HASH = 0
+PACKET_FANOUT_FLAG_DEFRAG = 0x8000
+
+
+def entrar_fanout(sock, grupo, modo=PACKET_FANOUT_HASH | PACKET_FANOUT_FLAG_DEFRAG):
+    # com a flag de desfragmentacao o valor passa do int com sinal, entao vai empacotado
+    sock.setsockopt(SOL_PACKET, PACKET_FANOUT, struct.pack('I', (grupo & 0xFFFF) | (modo << 16)))
+
+
+def _novo_relatorio(indice, analisador, final=False):
+    estatisticas = analisador.estatisticas
+    # as estatisticas vao como diferenca desde o ultimo relatorio e o coordenador as acumula com mesclar
+    analisador.estatisticas = EstatisticasCaptura()
+    return {
+        'indice': indice,
+        'enviado': time.time(),
+        'final': final,
+        'estatisticas': estatisticas,
+        # dos fluxos vao so os alterados e os que sairam da tabela desde o ultimo relatorio
+        'fluxos': analisador.fluxos.extrair_alteracoes() if analisador.fluxos is not None else None,
+    }
+
+
+def capturar_trabalhador(indice, interface, grupo, configuracao, fila, parar):
+    # o Ctrl+C e tratado pelo coordenador, que avisa os trabalhadores pelo evento
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    analisador = AnalisadorRede(max_pacotes=0, intervalo_estatisticas=0,
+                                taxa_amostragem=configuracao['taxa_amostragem'],
+                                probabilidade_amostragem=configuracao['probabilidade_amostragem'])
+    if configuracao['parametros_fluxos'] is not None:
+        analisador.fluxos = TabelaFluxos(**configuracao['parametros_fluxos'], registrar_alteracoes=True)
+    exibir = configuracao['formato'] is not None or configuracao['caminho_log'] is not None
+    if exibir:
+        caminho_log = configuracao['caminho_log']
+        if caminho_log:
+            raiz, extensao = os.path.splitext(caminho_log)
+            caminho_log = f"{raiz}.{indice}{extensao}"
+        analisador.configurar_saida(configuracao['formato'], caminho_log)
+
+    amostrador = analisador.amostrador
+    sock = None
+    contadores = {'pacotes': 0, 'recebidos': 0, 'kernel_pacotes': 0, 'kernel_descartes': 0}
+    try:
+        sock, classe = abrir_socket_bruto(interface, configuracao['filtro'], configuracao['snaplen'],
+                                          amostrador.probabilidade)
+        if sock is None:
+            raise OSError(f"Interface {interface} não oferece um socket bruto")
+        amostrador.probabilidade_no_kernel = amostrador.probabilidade is not None
+        if grupo is not None:
+            entrar_fanout(sock.ins, grupo)
+
+        intervalo = configuracao['intervalo_relatorio']
+        proximo_relatorio = time.monotonic() + intervalo
+        analisar_bytes = analisador.analisar_bytes
+        # sem bloqueio o laco esvazia o socket e volta a consultar o evento e o relogio quando ele seca
+        sock.ins.setblocking(False)
+        while not parar.is_set():
+            if select([sock.ins], [], [], 0.1)[0]:
+                try:
+                    for _ in range(1024):
+                        _, dados, timestamp = sock.recv_raw()
+                        if dados is None:
+                            continue
+                        contadores['recebidos'] += 1
+                        if amostrador.aceitar():
+                            info = analisar_bytes(dados, classe, timestamp)
+                            contadores['pacotes'] += 1
+                            if exibir:
+                                analisador.exibir_pacote(info)
+                except BlockingIOError:
+                    pass
+
+            if time.monotonic() >= proximo_relatorio:
+                relatorio = _novo_relatorio(indice, analisador)
+                relatorio.update(_coletar_contadores(sock, contadores))
+                fila.put(relatorio)
+                proximo_relatorio = time.monotonic() + intervalo
+
+        relatorio = _novo_relatorio(indice, analisador, final=True)
+        relatorio.update(_coletar_contadores(sock, contadores))
+        fila.put(relatorio)
+    except Exception as e:
+        fila.put({'indice': indice, 'final': True, 'erro': f"{type(e).__name__}: {e}"})
+    finally:
+        if sock is not None:
+            sock.close()
+        analisador.encerrar_saida()
+
+
+def _coletar_contadores(sock, contadores):
+    try:
+        pacotes, descartes = ler_estatisticas_kernel(sock.ins)
+        contadores['kernel_pacotes'] += pacotes
+        contadores['kernel_descartes'] += descartes
+    except OSError:
+        pass
+    diferenca = dict(contadores)
+    for nome in contadores:
+        contadores[nome] = 0
+    return diferenca
+
+
+class CapturaDistribuida:
+    def __init__(self, analisador, interfaces, processos_por_interface=1, intervalo_relatorio=1.0,
+                 intervalo_exibicao=10.0, formato=None, caminho_log=None):
+        self.analisador = analisador
+        self.interfaces = [interfaces] if isinstance(interfaces, str) or interfaces is None else list(interfaces)
+        self.processos_por_interface = max(1, processos_por_interface)
+        self.intervalo_relatorio = intervalo_relatorio
+        self.intervalo_exibicao = intervalo_exibicao
+        self.formato = formato
+        self.caminho_log = caminho_log
+
+        # uma tabela por interface, atualizada com as alteracoes enviadas pelos trabalhadores; o fanout nao deixa
+        # dois trabalhadores da mesma interface com o mesmo fluxo
+        self.interface_do_trabalhador = {}
+        self.fluxos_por_interface = {}
+        if analisador.fluxos is not None:
+            parametros = analisador.fluxos.parametros
+            self.fluxos_por_interface = {posicao: TabelaFluxos(**parametros) for posicao in range(len(self.interfaces))}
+            if len(self.interfaces) == 1:
+                analisador.fluxos = self.fluxos_por_interface[0]
+        self.ativos = set()
+        self.erros = {}
+        self._registrar_medidores()
+
+    def _registrar_medidores(self):
+        metricas = self.analisador.metricas
+        metricas.registrar_medidor('trabalhadores_ativos', lambda: len(self.ativos))
+        if len(self.fluxos_por_interface) > 1:
+            metricas.registrar_medidor('fluxos_ativos', lambda: sum(len(tabela.ativos)
+                                                                     for tabela in self.fluxos_por_interface.values()))
+
+    def _configuracao(self, filtro, snaplen):
+        analisador = self.analisador
+        return {
+            'filtro': filtro,
+            'snaplen': snaplen,
+            'taxa_amostragem': analisador.amostrador.taxa,
+            'probabilidade_amostragem': analisador.amostrador.probabilidade,
+            'parametros_fluxos': analisador.fluxos.parametros if analisador.fluxos is not None else None,
+            'intervalo_relatorio': self.intervalo_relatorio,
+            'formato': self.formato,
+            'caminho_log': self.caminho_log,
+        }
+
+    def mesclar_fluxos(self):
+        if len(self.fluxos_por_interface) <= 1:
+            return self.analisador.fluxos
+        # o mesmo fluxo visto em duas interfaces e somado por mesclar; a tabela mesclada passa a dividir os
+        # fluxos com as das interfaces, entao so e montada no fim da captura
+        tabela = TabelaFluxos(**self.analisador.fluxos.parametros)
+        for posicao in sorted(self.fluxos_por_interface):
+            tabela.mesclar(self.fluxos_por_interface[posicao], simultanea=True)
+        self.analisador.fluxos = tabela
+        self.fluxos_por_interface = {0: tabela}
+        return tabela
+
+    def _receber(self, relatorio):
+        analisador = self.analisador
+        indice = relatorio['indice']
+        if relatorio.get('erro'):
+            self.erros[indice] = relatorio['erro']
+        else:
+            analisador.metricas.observar('relatorio', time.time() - relatorio['enviado'])
+            analisador.estatisticas.mesclar(relatorio['estatisticas'])
+            if relatorio['fluxos'] is not None:
+                tabela = self.fluxos_por_interface[self.interface_do_trabalhador[indice]]
+                tabela.aplicar_alteracoes(relatorio['fluxos'])
+
+            analisador.contador_pacotes += relatorio['pacotes']
+            analisador.amostrador.vistos += relatorio['recebidos']
+            analisador.amostrador.aceitos += relatorio['pacotes']
+            analisador.metricas.incrementar('kernel_pacotes', relatorio['kernel_pacotes'])
+            analisador.metricas.incrementar('kernel_descartes', relatorio['kernel_descartes'])
+            analisador.metricas.incrementar(f'trabalhador_{indice}_pacotes', relatorio['pacotes'])
+
+        if relatorio['final']:
+            self.ativos.discard(indice)
+
+    def _exibir(self, final=False):
+        resumo_fluxos = None
+        if final:
+            self.mesclar_fluxos()
+        elif len(self.fluxos_por_interface) > 1:
+            resumo_fluxos = resumir_tabelas(self.fluxos_por_interface.values())
+        self.analisador.exibir_estatisticas(resumo_fluxos=resumo_fluxos)
+
+    def iniciar_captura(self, filtro="tcp", quantidade=0, snaplen=None):
+        print("Iniciando captura distribuída de pacotes de rede...")
+        print("Pressione Ctrl+C para parar a captura\n")
+
+        filtro = combinar_filtros(filtro)
+        self.analisador.preparar_amostragem(snaplen)
+        configuracao = self._configuracao(filtro, snaplen)
+
+        fila = multiprocessing.Queue()
+        parar = multiprocessing.Event()
+        processos = []
+        for posicao, interface in enumerate(self.interfaces):
+            # um grupo de fanout por interface; com um unico processo na interface o fanout e dispensado
+            grupo = (os.getpid() + posicao) & 0xFFFF if self.processos_por_interface > 1 else None
+            for _ in range(self.processos_por_interface):
+                indice = len(processos)
+                self.interface_do_trabalhador[indice] = posicao
+                processos.append(multiprocessing.Process(
+                    target=capturar_trabalhador, args=(indice, interface, grupo, configuracao, fila, parar),
+                    daemon=True))
+                self.ativos.add(indice)
+
+        try:
+            for processo in processos:
+                processo.start()
+
+            proxima_exibicao = time.monotonic() + self.intervalo_exibicao if self.intervalo_exibicao else None
+            while self.ativos:
+                try:
+                    self._receber(fila.get(timeout=0.2))
+                except queue.Empty:
+                    if not any(processo.is_alive() for processo in processos):
+                        break
+
+                # a quantidade e conferida a cada relatorio, entao pode passar um pouco do pedido
+                if quantidade and self.analisador.contador_pacotes >= quantidade:
+                    parar.set()
+                if proxima_exibicao is not None and time.monotonic() >= proxima_exibicao:
+                    self._exibir()
+                    proxima_exibicao = time.monotonic() + self.intervalo_exibicao
+
+        except KeyboardInterrupt:
+            print("\n\nCaptura interrompida pelo usuário")
+        finally:
+            parar.set()
+            # recolhe os relatorios finais antes de esperar os processos, para a fila nao travar o join
+            limite = time.monotonic() + 5 + self.intervalo_relatorio
+            while self.ativos and time.monotonic() < limite:
+                try:
+                    self._receber(fila.get(timeout=0.2))
+                except queue.Empty:
+                    if not any(processo.is_alive() for processo in processos):
+                        break
+            for processo in processos:
+                processo.join(timeout=1)
+                if processo.is_alive():
+                    processo.terminate()
+
+            for indice, erro in sorted(self.erros.items()):
+                print(f"Erro no trabalhador {indice}: {erro}")
+            self._exibir(final=True)
+            self.analisador.exibir_metricas()
+            print("\nCaptura finalizada")
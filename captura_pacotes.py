@@ -1,118 +1,332 @@
 from scapy.all import *
 import time
 import sys
-from datetime import datetime
+from collections import deque
+
+from amostragem import Amostrador, aplicar_amostragem, anexar_programa, combinar_filtros, compilar_filtro
+from armazenamento_colunar import ArmazenamentoColunar
+from decodificador_rapido import ETHERNET, decodificar_quadro
+from estatisticas_captura import EstatisticasCaptura
+from metricas_captura import InstantaneosPeriodicos, MetricasCaptura, ServidorMetricas, gravar_instantaneos
+from saidas_pacotes import SaidaAssincrona, SaidaTexto, abrir_log, formatar_hora, formatar_linha
+from tabela_fluxos import TabelaFluxos
+
+def interpretar_flags_tcp(flags):
+    flag_names = []
+    if flags & 0x01: flag_names.append("FIN")
+    if flags & 0x02: flag_names.append("SYN")
+    if flags & 0x04: flag_names.append("RST")
+    if flags & 0x08: flag_names.append("PSH")
+    if flags & 0x10: flag_names.append("ACK")
+    if flags & 0x20: flag_names.append("URG")
+    if flags & 0x40: flag_names.append("ECE")
+    if flags & 0x80: flag_names.append("CWR")
+
+    return "/".join(flag_names) if flag_names else "Nenhuma"
+
+def extrair_camadas(pacote):
+    camadas = []
+
+    if Ether in pacote:
+        eth = pacote[Ether]
+        camadas.append({'tipo': 'Ethernet','origem': eth.src,'destino': eth.dst,'protocolo': eth.type})
+
+    if IP in pacote:
+        ip = pacote[IP]
+        camadas.append({'tipo': 'IP','origem': ip.src,'destino': ip.dst,'protocolo': ip.proto,'ttl': ip.ttl,'tamanho': ip.len,'cabecalho': (ip.ihl or 5) * 4})
+
+    if TCP in pacote:
+        tcp = pacote[TCP]
+        flags = interpretar_flags_tcp(tcp.flags)
+        camadas.append({'tipo': 'TCP','porta_origem': tcp.sport,'porta_destino': tcp.dport,'flags': flags,'sequencia': tcp.seq, 'ack': tcp.ack,'cabecalho': (tcp.dataofs or 5) * 4,'tamanho': len(tcp.payload)})
+
+    elif UDP in pacote:
+        udp = pacote[UDP]
+        camadas.append({'tipo': 'UDP', 'porta_origem': udp.sport, 'porta_destino': udp.dport,'tamanho': udp.len})
+
+    elif ICMP in pacote:
+        icmp = pacote[ICMP]
+        camadas.append({ 'tipo': 'ICMP','tipo_icmp': icmp.type, 'codigo': icmp.code})
+
+    return camadas
+
+def extrair_camadas_bytes(dados, classe=Ether):
+    if classe is Ether:
+        camadas = decodificar_quadro(dados)
+        if camadas is not None:
+            return camadas
+    return extrair_camadas(classe(bytes(dados)))
+
+def montar_info(timestamp, dados, classe):
+    camadas = extrair_camadas_bytes(dados, classe)
+    info = {'timestamp': timestamp, 'tamanho': len(dados), 'camadas': camadas}
+
+    # com snaplen o quadro chega truncado; o tamanho do cabecalho IP recupera o tamanho original
+    if len(camadas) > 1 and camadas[0]['tipo'] == 'Ethernet' and camadas[1]['tipo'] == 'IP':
+        original = ETHERNET.size + camadas[1]['tamanho']
+        if original > len(dados):
+            info['tamanho'] = original
+            info['capturado'] = len(dados)
+    return info
+
+def analisar_lote(lote):
+    return [montar_info(timestamp, dados, classe) for timestamp, classe, dados in lote]
+
+def abrir_socket_bruto(interface=None, filtro=None, snaplen=None, probabilidade=None):
+    no_kernel = snaplen is not None or probabilidade is not None
+    # com snaplen ou amostragem o filtro e compilado aqui e combinado com elas num unico programa BPF
+    sock = conf.L2listen(iface=interface, filter=None if no_kernel else filtro)
+    classe = getattr(sock, 'LL', None)
+    if classe is None:
+        sock.close()
+        return None, None
+
+    if no_kernel:
+        try:
+            programa = compilar_filtro(filtro, interface) if filtro else None
+            anexar_programa(sock.ins, aplicar_amostragem(programa, snaplen, probabilidade))
+        except Exception:
+            sock.close()
+            raise
+
+    # o sniff passa a entregar os bytes sem dissecar; a classe original fica para o decodificador
+    sock.LL = conf.raw_layer
+    return sock, classe
 
 class AnalisadorRede:
-    def __init__(self):
+    def __init__(self, max_pacotes=None, max_segundos=None, intervalo_estatisticas=10, colunar=False,
+                 rastrear_fluxos=False, tempo_ocioso_fluxos=300.0, taxa_amostragem=1, probabilidade_amostragem=None,
+                 saida=None):
         self.contador_pacotes = 0
-        self.pacotes_capturados = []
+        self.max_segundos = max_segundos
+        self.intervalo_estatisticas = intervalo_estatisticas
+        self.colunar = colunar
+        if colunar:
+            self.pacotes_capturados = ArmazenamentoColunar(maxlen=max_pacotes)
+        else:
+            self.pacotes_capturados = deque(maxlen=max_pacotes)
+        self.estatisticas = EstatisticasCaptura()
+        self.fluxos = TabelaFluxos(tempo_ocioso=tempo_ocioso_fluxos) if rastrear_fluxos else None
+        self.classe_enlace = Ether
+        self.amostrador = Amostrador(taxa_amostragem, probabilidade_amostragem)
+        # sem saida configurada os pacotes sao impressos na propria thread de captura
+        self.saida = saida
+        self.metricas = MetricasCaptura()
+        self._registrar_medidores()
+
+    def _registrar_medidores(self):
+        # medidores que dependem de algo opcional (fluxos, saida) somem do relatorio quando ele nao existe
+        metricas = self.metricas
+        metricas.registrar_medidor('pacotes_recebidos', lambda: self.amostrador.vistos, contador=True)
+        metricas.registrar_medidor('pacotes_nao_amostrados', lambda: self.amostrador.vistos - self.amostrador.aceitos,
+                                   contador=True)
+        metricas.registrar_medidor('pacotes_analisados', lambda: self.contador_pacotes, contador=True)
+        metricas.registrar_medidor('pacotes_retidos', lambda: len(self.pacotes_capturados))
+        metricas.registrar_medidor('fluxos_ativos', lambda: len(self.fluxos.ativos))
+        metricas.registrar_medidor('fila_saida', lambda: self.saida.fila.qsize())
+        metricas.registrar_medidor('saida_escritos', lambda: self.saida.contadores['escritos'], contador=True)
+        metricas.registrar_medidor('saida_descartados', lambda: self.saida.contadores['descartados'], contador=True)
 
     def formatar_timestamp(self, timestamp):
-        return datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+        return formatar_hora(timestamp)
 
     def analisar_pacote(self, pacote):
-        info = {'timestamp': time.time(), 'numero': self.contador_pacotes + 1, 'camadas': []}
-
-        if Ether in pacote:
-            eth = pacote[Ether]
-            info['camadas'].append({'tipo': 'Ethernet','origem': eth.src,'destino': eth.dst,'protocolo': eth.type})
-
-        if IP in pacote:
-            ip = pacote[IP]
-            info['camadas'].append({'tipo': 'IP','origem': ip.src,'destino': ip.dst,'protocolo': ip.proto,'ttl': ip.ttl,'tamanho': ip.len})
-
-        if TCP in pacote:
-            tcp = pacote[TCP]
-            flags = self.interpretar_flags_tcp(tcp.flags)
-            info['camadas'].append({'tipo': 'TCP','porta_origem': tcp.sport,'porta_destino': tcp.dport,'flags': flags,'sequencia': tcp.seq, 'ack': tcp.ack,'tamanho': len(tcp.payload)})
-
-        elif UDP in pacote:
-            udp = pacote[UDP]
-            info['camadas'].append({'tipo': 'UDP', 'porta_origem': udp.sport, 'porta_destino': udp.dport,'tamanho': udp.len})
+        info = {'timestamp': time.time(), 'tamanho': len(pacote), 'camadas': extrair_camadas(pacote)}
+        return self.registrar_info(info)
+
+    def analisar_bytes(self, dados, classe=None, timestamp=None):
+        info = montar_info(time.time() if timestamp is None else timestamp, dados, classe or self.classe_enlace)
+        return self.registrar_info(info)
+
+    def registrar_info(self, info):
+        info['numero'] = self.contador_pacotes + 1
+        self.estatisticas.registrar(info)
+        if self.fluxos is not None:
+            self.fluxos.registrar(info)
+        self.reter_info(info)
+        self.contador_pacotes += 1
+        return info
 
-        elif ICMP in pacote:
-            icmp = pacote[ICMP]
-            info['camadas'].append({ 'tipo': 'ICMP','tipo_icmp': icmp.type, 'codigo': icmp.code})
+    def reter_info(self, info):
+        if self.colunar:
+            self.pacotes_capturados.adicionar(info)
+            if self.max_segundos is not None:
+                self.pacotes_capturados.descartar_anteriores(info['timestamp'] - self.max_segundos)
+            return
 
         self.pacotes_capturados.append(info)
-        self.contador_pacotes += 1
-        return info
+        if self.max_segundos is not None:
+            limite = info['timestamp'] - self.max_segundos
+            while self.pacotes_capturados and self.pacotes_capturados[0]['timestamp'] < limite:
+                self.pacotes_capturados.popleft()
+
+    def exportar_pacotes(self, caminho):
+        pacotes = self.pacotes_capturados
+        if not self.colunar:
+            pacotes = ArmazenamentoColunar()
+            pacotes.adicionar_infos(self.pacotes_capturados)
+        pacotes.salvar(caminho)
 
     def interpretar_flags_tcp(self, flags):
-        flag_names = []
-        if flags & 0x01: flag_names.append("FIN")
-        if flags & 0x02: flag_names.append("SYN")
-        if flags & 0x04: flag_names.append("RST")
-        if flags & 0x08: flag_names.append("PSH")
-        if flags & 0x10: flag_names.append("ACK")
-        if flags & 0x20: flag_names.append("URG")
-        if flags & 0x40: flag_names.append("ECE")
-        if flags & 0x80: flag_names.append("CWR")
-
-        return "/".join(flag_names) if flag_names else "Nenhuma"
+        return interpretar_flags_tcp(flags)
 
-    def exibir_pacote(self, info_pacote):
-        print(f"=============== PACOTE #{info_pacote['numero']} - {self.formatar_timestamp(info_pacote['timestamp'])} ===============")
+    def formatar_pacote(self, info_pacote):
+        linhas = [f"=============== PACOTE #{info_pacote['numero']} - {self.formatar_timestamp(info_pacote['timestamp'])} ==============="]
 
         for camada in info_pacote['camadas']:
-            print(f"\n[{camada['tipo']}]")
+            linhas.append(f"\n[{camada['tipo']}]")
 
             if camada['tipo'] == 'Ethernet':
-                print(f" Origem:      {camada['origem']}")
-                print(f" Destino:     {camada['destino']}")
-                print(f" Protocolo:   {camada['protocolo']:04x}")
+                linhas.append(f" Origem:      {camada['origem']}")
+                linhas.append(f" Destino:     {camada['destino']}")
+                linhas.append(f" Protocolo:   {camada['protocolo']:04x}")
 
             elif camada['tipo'] == 'IP':
-                print(f" Origem:      {camada['origem']}")
-                print(f" Destino:     {camada['destino']}")
-                print(f" Protocolo:   {camada['protocolo']}")
-                print(f" TTL:         {camada['ttl']}")
-                print(f" Tamanho:     {camada['tamanho']} bytes")
+                linhas.append(f" Origem:      {camada['origem']}")
+                linhas.append(f" Destino:     {camada['destino']}")
+                linhas.append(f" Protocolo:   {camada['protocolo']}")
+                linhas.append(f" TTL:         {camada['ttl']}")
+                linhas.append(f" Tamanho:     {camada['tamanho']} bytes")
 
             elif camada['tipo'] == 'TCP':
-                print(f" Porta Origem:    {camada['porta_origem']}")
-                print(f" Porta Destino:   {camada['porta_destino']}")
-                print(f" Flags:           {camada['flags']}")
-                print(f" Sequência:       {camada['sequencia']}")
-                print(f" ACK:             {camada['ack']}")
-                print(f" Tamanho Dados:   {camada['tamanho']} bytes")
+                linhas.append(f" Porta Origem:    {camada['porta_origem']}")
+                linhas.append(f" Porta Destino:   {camada['porta_destino']}")
+                linhas.append(f" Flags:           {camada['flags']}")
+                linhas.append(f" Sequência:       {camada['sequencia']}")
+                linhas.append(f" ACK:             {camada['ack']}")
+                linhas.append(f" Tamanho Dados:   {camada['tamanho']} bytes")
 
             elif camada['tipo'] == 'UDP':
-                print(f" Porta Origem:    {camada['porta_origem']}")
-                print(f" Porta Destino:   {camada['porta_destino']}")
-                print(f" Tamanho:         {camada['tamanho']} bytes")
+                linhas.append(f" Porta Origem:    {camada['porta_origem']}")
+                linhas.append(f" Porta Destino:   {camada['porta_destino']}")
+                linhas.append(f" Tamanho:         {camada['tamanho']} bytes")
 
             elif camada['tipo'] == 'ICMP':
-                print(f" Tipo:    {camada['tipo_icmp']}")
-                print(f" Código:  {camada['codigo']}")
+                linhas.append(f" Tipo:    {camada['tipo_icmp']}")
+                linhas.append(f" Código:  {camada['codigo']}")
 
-        print(f"=================================================================")
+        linhas.append(f"=================================================================")
+        return "\n".join(linhas)
 
-    def callback_captura(self, pacote):
-        info_pacote = self.analisar_pacote(pacote)
+    def exibir_pacote(self, info_pacote):
+        if self.saida is not None:
+            self.saida.enviar(info_pacote)
+        else:
+            print(self.formatar_pacote(info_pacote))
+
+    def configurar_saida(self, formato='detalhado', caminho_log=None, **opcoes):
+        saidas = []
+        if formato == 'detalhado':
+            saidas.append(SaidaTexto(self.formatar_pacote))
+        elif formato == 'compacto':
+            saidas.append(SaidaTexto(formatar_linha))
+        if caminho_log:
+            saidas.append(abrir_log(caminho_log))
+        self.saida = SaidaAssincrona(saidas, metricas=self.metricas, **opcoes)
+        return self.saida
+
+    def encerrar_saida(self):
+        if self.saida is None:
+            return
+        self.saida.encerrar()
+        if self.saida.contadores['descartados']:
+            print(f"Pacotes não exibidos por fila de saída cheia: {self.saida.contadores['descartados']}")
+
+    def amostrar(self, pacote):
+        return self.amostrador.aceitar()
+
+    def _processar(self, pacote, analisar):
+        metricas = self.metricas
+        # do carimbo do kernel ate aqui: espera no socket e, sem o decodificador rapido, a dissecacao do scapy
+        metricas.observar('captura', time.time() - float(pacote.time))
+        inicio = time.perf_counter()
+        info_pacote = analisar(pacote)
+        meio = time.perf_counter()
         self.exibir_pacote(info_pacote)
+        fim = time.perf_counter()
+        metricas.observar('analise', meio - inicio)
+        metricas.observar('exibicao', fim - meio)
+        self._verificar_estatisticas()
+
+    def _analisar_bruto(self, pacote):
+        return self.analisar_bytes(bytes(pacote), timestamp=float(pacote.time))
 
-        if self.contador_pacotes % 10 == 0:
+    def callback_captura(self, pacote):
+        self._processar(pacote, self.analisar_pacote)
+
+    def callback_captura_bytes(self, pacote):
+        self._processar(pacote, self._analisar_bruto)
+
+    def _verificar_estatisticas(self):
+        if self.intervalo_estatisticas and self.contador_pacotes % self.intervalo_estatisticas == 0:
             self.exibir_estatisticas()
 
-    def exibir_estatisticas(self):
+    def exibir_estatisticas(self, agora=None, resumo_fluxos=None):
         print(f"=============== ESTATÍSTICAS DA CAPTURA ================")
         print(f"Total de pacotes capturados: {self.contador_pacotes}")
 
-        protocolos = {}
-        for pacote in self.pacotes_capturados:
-            for camada in pacote['camadas']:
-                if camada['tipo'] in ['TCP', 'UDP', 'ICMP']:
-                    protocolos[camada['tipo']] = protocolos.get(camada['tipo'], 0) + 1
+        print(f"Pacotes mantidos em memória: {len(self.pacotes_capturados)}")
+
+        resumo = self.estatisticas.resumo(agora=agora)
+        if resumo['fator_amostragem'] != 1:
+            print(f"Valores estimados pela amostragem: fator {resumo['fator_amostragem']:g}, "
+                  f"{resumo['pacotes_amostrados']} pacotes amostrados de {self.amostrador.vistos} recebidos")
+            print(f"Total estimado de pacotes: {resumo['total_pacotes']}")
+        print(f"Total de bytes: {resumo['total_bytes']}")
 
         print("Pacotes por protocolo:")
-        for protocolo, quantidade in protocolos.items():
-            print(f"  {protocolo}: {quantidade}")
+        for protocolo, quantidade in resumo['protocolos'].items():
+            print(f"  {protocolo}: {quantidade} ({resumo['bytes_por_protocolo'][protocolo]} bytes)")
+
+        print("Pares IP mais ativos:")
+        for (origem, destino), quantidade in resumo['top_pares_ip']:
+            print(f"  {origem} -> {destino}: {quantidade}")
+
+        print("Portas de destino mais usadas:")
+        for porta, quantidade in resumo['top_portas']:
+            print(f"  {porta}: {quantidade}")
+
+        print("Taxas:")
+        for segundos, (pacotes_por_segundo, bytes_por_segundo) in resumo['taxas'].items():
+            print(f"  últimos {segundos}s: {pacotes_por_segundo:.1f} pacotes/s, {bytes_por_segundo:.1f} bytes/s")
+
+        if resumo_fluxos is not None or self.fluxos is not None:
+            self.exibir_fluxos(resumo=resumo_fluxos)
 
         print(f"=================================================================")
 
 
+    def exibir_fluxos(self, top=5, resumo=None):
+        if resumo is None:
+            resumo = self.fluxos.resumo(top)
+        print(f"Fluxos TCP: {resumo['fluxos_ativos']} na tabela, {resumo['total_fluxos']} no total, "
+              f"{resumo['total_encerrados']} encerrados")
+        print(f"  Retransmissões: {resumo['retransmissoes']}")
+        if resumo['rtt_mediano'] is not None:
+            print(f"  RTT mediano: {resumo['rtt_mediano'] * 1000:.2f} ms")
+        for estado, quantidade in resumo['estados'].items():
+            print(f"  {estado}: {quantidade}")
+
+        print("Maiores fluxos:")
+        for fluxo in resumo['maiores_fluxos']:
+            (ip_cliente, porta_cliente), (ip_servidor, porta_servidor) = fluxo['cliente'], fluxo['servidor']
+            rtt = f"{fluxo['rtt'] * 1000:.2f} ms" if fluxo['rtt'] is not None else "-"
+            print(f"  {ip_cliente}:{porta_cliente} -> {ip_servidor}:{porta_servidor} [{fluxo['estado']}] "
+                  f"{sum(fluxo['pacotes'])} pacotes, {sum(fluxo['bytes'])} bytes, {fluxo['duracao']:.2f}s, "
+                  f"RTT {rtt}, {sum(fluxo['retransmissoes'])} retransmissões")
+
+    def exibir_metricas(self):
+        instantaneo = self.metricas.instantaneo()
+        contadores = instantaneo['contadores']
+        print("Métricas da captura:")
+        if 'kernel_pacotes' in contadores:
+            print(f"  Kernel: {contadores['kernel_pacotes']} pacotes, {contadores['kernel_descartes']} descartados")
+        for nome, valor in instantaneo['medidores'].items():
+            print(f"  {nome}: {valor}")
+        for etapa, latencia in instantaneo['latencias'].items():
+            print(f"  Latência {etapa}: {latencia['quantidade']} medições, média {latencia['media'] * 1e6:.1f}us, "
+                  f"p50 <= {latencia['p50'] * 1e6:g}us, p99 <= {latencia['p99'] * 1e6:g}us")
+
     def listar_interfaces(self):
         interfaces = get_windows_if_list() if sys.platform == "win32" else get_if_list()
         print("\nInterfaces de rede disponíveis:")
@@ -120,17 +334,34 @@ class AnalisadorRede:
             print(f"  {i}: {interface}")
         return interfaces
 
-    def iniciar_captura(self, interface=None, filtro="tcp", quantidade=0):
+    def preparar_amostragem(self, snaplen=None):
+        self.estatisticas.fator_amostragem = self.amostrador.fator
+        # snaplen e sorteio no kernel so valem no socket bruto, que entrega os bytes sem dissecar
+        return snaplen is not None or self.amostrador.probabilidade is not None
+
+    def iniciar_captura(self, interface=None, filtro="tcp", quantidade=0, decodificador_rapido=False, snaplen=None):
         print("Iniciando captura de pacotes de rede...")
         print("Pressione Ctrl+C para parar a captura\n")
 
+        filtro = combinar_filtros(filtro)
+        no_kernel = self.preparar_amostragem(snaplen)
+
+        sock = None
         try:
-            sniff(
-                iface=interface,
-                filter=filtro,
-                prn=self.callback_captura,
-                count=quantidade
-            )
+            if decodificador_rapido or no_kernel:
+                sock, classe = abrir_socket_bruto(interface, filtro, snaplen, self.amostrador.probabilidade)
+                self.amostrador.probabilidade_no_kernel = sock is not None and no_kernel
+
+            if sock is not None:
+                self.classe_enlace = classe
+                callback = self.callback_captura_bytes
+            else:
+                # o socket e aberto aqui, e nao pelo sniff, para as estatisticas do kernel ficarem acessiveis
+                sock = conf.L2listen(iface=interface, filter=filtro)
+                callback = self.callback_captura
+            self.metricas.acompanhar_socket(sock)
+            # com lfilter o sniff so conta os pacotes amostrados, entao a quantidade vale para eles
+            sniff(opened_socket=sock, prn=callback, lfilter=self.amostrar, count=quantidade, store=False)
 
         except KeyboardInterrupt:
             print("\n\nCaptura interrompida pelo usuário")
@@ -138,34 +369,101 @@ class AnalisadorRede:
             print(f"Erro durante a captura: {e}")
 
         finally:
+            if sock is not None:
+                # os contadores do kernel precisam ser lidos antes de o socket fechar
+                self.metricas.coletar()
+                sock.close()
+            self.encerrar_saida()
             self.exibir_estatisticas()
+            self.exibir_metricas()
             print("\nCaptura finalizada")
 
+def analisar_arquivo_pcap(analisador, arquivo):
+    try:
+        processos = input("Processos analisadores (0 para ler sequencialmente) [0]: ").strip()
+        processos = int(processos) if processos else 0
+    except ValueError:
+        processos = 0
+
+    exibir = input("Exibir cada pacote? (s/N): ").strip().lower() == 's'
+
+    if analisador.saida is not None:
+        # lendo um arquivo nada se perde esperando a saida, entao ela pode segurar a leitura
+        analisador.saida.bloquear = True
+
+    from analise_offline import analisar_arquivo
+    inicio = time.time()
+    try:
+        analisar_arquivo(analisador, arquivo, processos=processos, exibir_pacotes=exibir)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler o arquivo: {e}")
+        return
+    finally:
+        analisador.encerrar_saida()
+
+    # as taxas sao calculadas em relacao ao ultimo pacote do arquivo, nao ao relogio atual
+    analisador.exibir_estatisticas(agora=analisador.estatisticas.ultimo)
+    print(f"\nArquivo analisado em {time.time() - inicio:.2f}s")
+
+def exportar_pacotes(analisador):
+    if not len(analisador.pacotes_capturados):
+        return
+
+    caminho = input("Salvar os pacotes mantidos em (.npz, .parquet ou .arrow; Enter para não salvar): ").strip()
+    if not caminho:
+        return
+    try:
+        analisador.exportar_pacotes(caminho)
+        print(f"Pacotes salvos em {caminho}")
+    except (OSError, ImportError) as e:
+        print(f"Erro ao salvar os pacotes: {e}")
+
 def main():
     print("=============== ANALISADOR DE PACOTES DE REDE ===============")
 
-    analisador = AnalisadorRede()
-
     print("\nConfigurações da captura:")
 
+    try:
+        max_pacotes = input("Manter os últimos N pacotes em memória (Enter para todos, 0 para nenhum): ").strip()
+        max_pacotes = int(max_pacotes) if max_pacotes else None
+    except ValueError:
+        max_pacotes = None
+
+    colunar = input("Guardar os pacotes em formato colunar (NumPy)? (s/N): ").strip().lower() == 's'
+    rastrear_fluxos = input("Rastrear fluxos TCP? (s/N): ").strip().lower() == 's'
+
+    analisador = AnalisadorRede(max_pacotes=max_pacotes, colunar=colunar, rastrear_fluxos=rastrear_fluxos)
+
+    formato = input("Exibição dos pacotes: (d)etalhada, (c)ompacta ou (n)enhuma [d]: ").strip().lower()
+    formato = {'c': 'compacto', 'n': None}.get(formato[:1], 'detalhado')
+    caminho_log = input("Gravar os pacotes em log (.jsonl ou .bin; Enter para não gravar): ").strip()
+    try:
+        analisador.configurar_saida(formato, caminho_log or None)
+    except OSError as e:
+        print(f"Erro ao abrir o log: {e}")
+        analisador.configurar_saida(formato)
+
+    arquivo = input("Arquivo pcap/pcapng para análise offline (Enter para captura ao vivo): ").strip()
+    if arquivo:
+        analisar_arquivo_pcap(analisador, arquivo)
+        exportar_pacotes(analisador)
+        return
+
     interfaces = analisador.listar_interfaces()
 
+    escolhidas = []
     if interfaces:
         try:
-            escolha = input(f"\nSelecione a interface (0-{len(interfaces)-1}) ou Enter para padrão: ")
-            if escolha.strip():
-                interface = interfaces[int(escolha)]
-            else:
-                interface = None
+            escolha = input(f"\nSelecione a interface (0-{len(interfaces)-1}; várias separadas por vírgula) "
+                            f"ou Enter para padrão: ")
+            escolhidas = [interfaces[int(indice)] for indice in escolha.split(",") if indice.strip()]
         except (ValueError, IndexError):
             print("Interface inválida, usando padrão")
-            interface = None
-    else:
-        interface = None
+            escolhidas = []
+    interface = escolhidas[0] if escolhidas else None
 
-    filtro = input("Filtro (ex: tcp, udp, icmp, port 80) [tcp]: ").strip()
-    if not filtro:
-        filtro = "tcp"
+    filtro = input("Filtro (ex: tcp, udp, icmp, port 80; separe vários com ;) [tcp]: ").strip()
+    filtro = combinar_filtros(filtro.split(";")) or "tcp"
 
     try:
         quantidade = input("Quantidade de pacotes (0 para ilimitado) [0]: ").strip()
@@ -173,13 +471,104 @@ def main():
     except ValueError:
         quantidade = 0
 
+    try:
+        trabalhadores = input("Processos analisadores (0 para analisar na thread de captura) [0]: ").strip()
+        trabalhadores = int(trabalhadores) if trabalhadores else 0
+    except ValueError:
+        trabalhadores = 0
+
+    try:
+        por_interface = input("Processos de captura por interface com PACKET_FANOUT (0 para não usar) [0]: ").strip()
+        por_interface = int(por_interface) if por_interface else 0
+    except ValueError:
+        por_interface = 0
+    distribuida = por_interface > 0 or len(escolhidas) > 1
+
+    rapido = input("Usar o decodificador rápido de cabeçalhos? (s/N): ").strip().lower() == 's'
+
+    try:
+        taxa = input("Amostrar 1 a cada N pacotes [1]: ").strip()
+        taxa = max(1, int(taxa)) if taxa else 1
+    except ValueError:
+        taxa = 1
+
+    try:
+        probabilidade = input("Probabilidade de amostragem entre 0 e 1 (Enter para desativar): ").strip()
+        probabilidade = float(probabilidade) if probabilidade else None
+        if probabilidade is not None and not 0 < probabilidade <= 1:
+            probabilidade = None
+    except ValueError:
+        probabilidade = None
+
+    try:
+        snaplen = input("Bytes capturados por pacote (Enter para o quadro completo): ").strip()
+        snaplen = int(snaplen) if snaplen else None
+    except ValueError:
+        snaplen = None
+
+    analisador.amostrador = Amostrador(taxa, probabilidade)
+
+    try:
+        porta_metricas = input("Porta local para expor métricas Prometheus (Enter para desativar): ").strip()
+        porta_metricas = int(porta_metricas) if porta_metricas else None
+    except ValueError:
+        porta_metricas = None
+
+    caminho_instantaneos = input("Gravar instantâneos das métricas em (.jsonl; Enter para não gravar): ").strip()
+    intervalo_instantaneos = 10.0
+    if caminho_instantaneos:
+        try:
+            intervalo = input("Intervalo entre instantâneos em segundos [10]: ").strip()
+            intervalo_instantaneos = float(intervalo) if intervalo else 10.0
+        except ValueError:
+            intervalo_instantaneos = 10.0
+
     print(f"\nIniciando captura com:")
-    print(f"  Interface: {interface or 'padrão'}")
+    print(f"  Interface: {', '.join(escolhidas) or 'padrão'}")
     print(f"  Filtro: {filtro}")
     print(f"  Quantidade: {quantidade or 'ilimitado'}")
+    print(f"  Retenção: {'todos' if max_pacotes is None else max_pacotes} pacotes")
+    if distribuida:
+        print(f"  Processos de captura: {max(1, por_interface)} por interface")
+    else:
+        print(f"  Analisadores: {trabalhadores or 'thread de captura'}")
+    print(f"  Decodificador: {'rápido' if rapido else 'scapy'}")
+    print(f"  Amostragem: 1 a cada {taxa}" + (f", probabilidade {probabilidade:g}" if probabilidade else ""))
+    print(f"  Snaplen: {snaplen or 'quadro completo'}")
+    print(f"  Exibição: {formato or 'nenhuma'}" + (f", log em {caminho_log}" if caminho_log else ""))
+    if porta_metricas:
+        print(f"  Métricas: http://127.0.0.1:{porta_metricas}/metrics")
     print(f"=================================================================")
 
-    analisador.iniciar_captura(interface, filtro, quantidade)
+    servidor_metricas = instantaneos = None
+    try:
+        if porta_metricas:
+            servidor_metricas = ServidorMetricas(analisador.metricas, porta_metricas).iniciar()
+        if caminho_instantaneos:
+            instantaneos = InstantaneosPeriodicos(analisador.metricas, intervalo_instantaneos,
+                                                  gravar_instantaneos(caminho_instantaneos)).iniciar()
+    except OSError as e:
+        print(f"Erro ao iniciar a exportação de métricas: {e}")
+
+    try:
+        if distribuida:
+            from captura_distribuida import CapturaDistribuida
+            # cada processo exibe e grava o proprio log; o coordenador so mescla estatisticas e fluxos
+            CapturaDistribuida(analisador, escolhidas or [None], por_interface, formato=formato,
+                               caminho_log=caminho_log or None).iniciar_captura(filtro, quantidade, snaplen)
+        elif trabalhadores:
+            from pipeline_captura import PipelineCaptura
+            PipelineCaptura(analisador, trabalhadores=trabalhadores).iniciar_captura(
+                interface, filtro, quantidade, rapido, snaplen)
+        else:
+            analisador.iniciar_captura(interface, filtro, quantidade, rapido, snaplen)
+    finally:
+        if instantaneos is not None:
+            instantaneos.encerrar()
+        if servidor_metricas is not None:
+            servidor_metricas.encerrar()
+
+    exportar_pacotes(analisador)
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,8 @@ from cryptography.fernet import Fernet
 import base64
 import time
 
+from protocolo_mensagens import DecodificadorQuadros, montar_quadro
+
 class ClienteMessenger:
     def __init__(self, host='localhost', porta=8443):
         self.host = host
@@ -14,6 +16,7 @@ class ClienteMessenger:
         self.cifrador = None
         self.usuario = None
         self.conectado = False
+        self.decodificador = DecodificadorQuadros()
         
         self.contexto_ssl = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
         self.contexto_ssl.check_hostname = False
@@ -33,8 +36,9 @@ class ClienteMessenger:
             
             print(f"Conectado ao servidor {self.host}:{self.porta}")
             
-            dados_chave = self.socket_cliente.recv(1024).decode('utf-8')
-            chave_info = json.loads(dados_chave)
+            chave_info = self.receber_mensagem()
+            if chave_info is None:
+                raise ConnectionError("Servidor encerrou a conexão antes de enviar a chave")
             
             if chave_info['tipo'] == 'chave_criptografia':
                 chave_criptografia = base64.urlsafe_b64decode(chave_info['chave'].encode('utf-8'))
@@ -45,7 +49,7 @@ class ClienteMessenger:
                 'tipo': 'registro',
                 'usuario': self.usuario
             })
-            self.socket_cliente.send(mensagem_registro.encode('utf-8'))
+            self.socket_cliente.sendall(montar_quadro(mensagem_registro))
             
             thread_recebimento = threading.Thread(target=self.receber_mensagens)
             thread_recebimento.daemon = True
@@ -57,6 +61,15 @@ class ClienteMessenger:
             print(f"Erro ao conectar: {e}")
             return False
     
+    def receber_mensagem(self):
+        # quadros que chegaram junto com este ficam no decodificador para a thread de recebimento
+        while True:
+            mensagem = self.decodificador.proxima()
+            if mensagem is not None:
+                return mensagem
+            if not self.decodificador.receber_de(self.socket_cliente):
+                return None
+
     def criptografar_mensagem(self, mensagem):
         mensagem_bytes = mensagem.encode('utf-8')
         mensagem_criptografada = self.cifrador.encrypt(mensagem_bytes)
@@ -85,7 +98,7 @@ class ClienteMessenger:
                 'timestamp': time.time()
             })
             
-            self.socket_cliente.send(dados_mensagem.encode('utf-8'))
+            self.socket_cliente.sendall(montar_quadro(dados_mensagem))
             print(f"Mensagem enviada: {mensagem}")
             
         except Exception as e:
@@ -95,12 +108,10 @@ class ClienteMessenger:
     def receber_mensagens(self):
         while self.conectado:
             try:
-                dados = self.socket_cliente.recv(1024)
-                if not dados:
+                mensagem_recebida = self.receber_mensagem()
+                if mensagem_recebida is None:
                     break
                 
-                mensagem_recebida = json.loads(dados.decode('utf-8'))
-                
                 if mensagem_recebida['tipo'] == 'mensagem':
                     mensagem_descriptografada = self.descriptografar_mensagem(
                         mensagem_recebida['conteudo']
@@ -0,0 +1,85 @@
+import socket
+import struct
+
+ETHERNET = struct.Struct('!6s6sH')
+TAMANHO_MINIMO_TCP = 20
+IPV4 = struct.Struct('!BBHHHBBH4s4s')
+TCP = struct.Struct('!HHIIBB')
+UDP = struct.Struct('!HHHH')
+ICMP = struct.Struct('!BBHI')
+
+TIPO_IPV4 = 0x0800
+TIPO_ARP = 0x0806
+
+# so echo request/reply seguem o caminho rapido; erros carregam o cabecalho IP original e outros
+# tipos tem campos extras, ambos dissecados pelo scapy
+TIPOS_ICMP_ECHO = {0, 8}
+
+NOMES_FLAGS_TCP = ("FIN", "SYN", "RST", "PSH", "ACK", "URG", "ECE", "CWR")
+TEXTO_FLAGS_TCP = [
+    "/".join(nome for bit, nome in enumerate(NOMES_FLAGS_TCP) if flags & (1 << bit)) or "Nenhuma"
+    for flags in range(256)
+]
+CODIGOS_FLAGS_TCP = {texto: flags for flags, texto in enumerate(TEXTO_FLAGS_TCP)}
+
+
+def decodificar_quadro(dados):
+    dados = memoryview(dados)
+    if len(dados) < ETHERNET.size:
+        return None
+
+    destino, origem, tipo = ETHERNET.unpack_from(dados)
+    camadas = [{'tipo': 'Ethernet', 'origem': origem.hex(':'), 'destino': destino.hex(':'), 'protocolo': tipo}]
+
+    if tipo == TIPO_ARP:
+        return camadas
+    if tipo != TIPO_IPV4 or len(dados) < ETHERNET.size + IPV4.size:
+        return None
+
+    inicio_ip = ETHERNET.size
+    versao_ihl, _, tamanho_ip, _, fragmento, ttl, protocolo, _, ip_origem, ip_destino = IPV4.unpack_from(dados, inicio_ip)
+    tamanho_cabecalho_ip = (versao_ihl & 0x0F) * 4
+    if versao_ihl >> 4 != 4 or tamanho_cabecalho_ip < IPV4.size or tamanho_ip < tamanho_cabecalho_ip:
+        return None
+
+    camadas.append({'tipo': 'IP', 'origem': socket.inet_ntoa(ip_origem), 'destino': socket.inet_ntoa(ip_destino),
+                    'protocolo': protocolo, 'ttl': ttl, 'tamanho': tamanho_ip, 'cabecalho': tamanho_cabecalho_ip})
+
+    if fragmento & 0x1FFF:
+        return camadas
+
+    inicio = inicio_ip + tamanho_cabecalho_ip
+    fim = min(inicio_ip + tamanho_ip, len(dados))
+
+    if protocolo == 6:
+        if fim - inicio < TAMANHO_MINIMO_TCP:
+            return None
+        porta_origem, porta_destino, sequencia, ack, deslocamento, flags = TCP.unpack_from(dados, inicio)
+        tamanho_cabecalho_tcp = (deslocamento >> 4) * 4
+        if tamanho_cabecalho_tcp < TAMANHO_MINIMO_TCP or inicio + tamanho_cabecalho_tcp > fim:
+            return None
+        camadas.append({'tipo': 'TCP', 'porta_origem': porta_origem, 'porta_destino': porta_destino,
+                        'flags': TEXTO_FLAGS_TCP[flags], 'sequencia': sequencia, 'ack': ack,
+                        'cabecalho': tamanho_cabecalho_tcp,
+                        # como len(tcp.payload) no scapy, o preenchimento do quadro entra na conta
+                        'tamanho': len(dados) - inicio - tamanho_cabecalho_tcp})
+
+    elif protocolo == 17:
+        if fim - inicio < UDP.size:
+            return None
+        porta_origem, porta_destino, tamanho_udp, _ = UDP.unpack_from(dados, inicio)
+        camadas.append({'tipo': 'UDP', 'porta_origem': porta_origem, 'porta_destino': porta_destino,
+                        'tamanho': tamanho_udp})
+
+    elif protocolo == 1:
+        if fim - inicio < ICMP.size:
+            return None
+        tipo_icmp, codigo, _, _ = ICMP.unpack_from(dados, inicio)
+        if tipo_icmp not in TIPOS_ICMP_ECHO:
+            return None
+        camadas.append({'tipo': 'ICMP', 'tipo_icmp': tipo_icmp, 'codigo': codigo})
+
+    else:
+        return None
+
+    return camadas
@@ -0,0 +1,178 @@
+import heapq
+import time
+from collections import Counter
+
+
+class JanelaDeslizante:
+    def __init__(self, segundos=10):
+        self.segundos = segundos
+        self.instantes = [None] * segundos
+        self.pacotes = [0] * segundos
+        self.bytes = [0] * segundos
+
+    def registrar(self, timestamp, tamanho):
+        segundo = int(timestamp)
+        posicao = segundo % self.segundos
+
+        if self.instantes[posicao] != segundo:
+            self.instantes[posicao] = segundo
+            self.pacotes[posicao] = 0
+            self.bytes[posicao] = 0
+
+        self.pacotes[posicao] += 1
+        self.bytes[posicao] += tamanho
+
+    def taxas(self, agora=None):
+        agora = int(time.time() if agora is None else agora)
+        inicio = agora - self.segundos + 1
+        pacotes = bytes_ = 0
+
+        for instante, quantidade, tamanho in zip(self.instantes, self.pacotes, self.bytes):
+            if instante is not None and inicio <= instante <= agora:
+                pacotes += quantidade
+                bytes_ += tamanho
+
+        return pacotes / self.segundos, bytes_ / self.segundos
+
+    def mesclar(self, outra):
+        for posicao, instante in enumerate(outra.instantes):
+            if instante is None:
+                continue
+            atual = self.instantes[posicao]
+            if atual is None or instante > atual:
+                self.instantes[posicao] = instante
+                self.pacotes[posicao] = outra.pacotes[posicao]
+                self.bytes[posicao] = outra.bytes[posicao]
+            elif instante == atual:
+                self.pacotes[posicao] += outra.pacotes[posicao]
+                self.bytes[posicao] += outra.bytes[posicao]
+
+
+class ContadorFrequentes:
+    # resumo de Misra-Gries: guarda no maximo capacidade chaves e subestima cada contagem em no
+    # maximo descontado; as chaves que passam de total / (capacidade + 1) nunca ficam de fora
+    def __init__(self, capacidade=1024):
+        self.capacidade = capacidade
+        self.contagens = {}
+        self.total = 0
+        self.descontado = 0
+
+    def __len__(self):
+        return len(self.contagens)
+
+    def adicionar(self, chave, quantidade=1):
+        self.total += quantidade
+        contagens = self.contagens
+        if chave in contagens:
+            contagens[chave] += quantidade
+            return
+        if len(contagens) >= self.capacidade:
+            # tabela cheia: todas as contagens descem juntas; o custo O(capacidade) se paga porque
+            # cada desconto remove pelo menos capacidade unidades das contagens
+            desconto = min(quantidade, min(contagens.values()))
+            self._descontar(desconto)
+            quantidade -= desconto
+            if quantidade <= 0:
+                return
+        contagens[chave] = quantidade
+
+    def _descontar(self, desconto):
+        self.descontado += desconto
+        self.contagens = {chave: valor - desconto for chave, valor in self.contagens.items() if valor > desconto}
+
+    def mesclar(self, outro):
+        self.total += outro.total
+        self.descontado += outro.descontado
+        contagens = self.contagens
+        for chave, valor in outro.contagens.items():
+            contagens[chave] = contagens.get(chave, 0) + valor
+        if len(contagens) > self.capacidade:
+            self._descontar(heapq.nlargest(self.capacidade + 1, contagens.values())[-1])
+
+    def most_common(self, top):
+        return heapq.nlargest(top, self.contagens.items(), key=lambda item: item[1])
+
+
+class EstatisticasCaptura:
+    def __init__(self, janelas=(1, 10, 60), fator_amostragem=1, max_pares_ip=1024):
+        # com amostragem, cada pacote registrado representa fator_amostragem pacotes; os contadores
+        # guardam os valores amostrados e o resumo devolve as estimativas escaladas
+        self.fator_amostragem = fator_amostragem
+        self.total_pacotes = 0
+        self.total_bytes = 0
+        self.protocolos = Counter()
+        self.bytes_por_protocolo = Counter()
+        # os pares de IP nao tem limite natural, entao so os mais frequentes ficam na memoria
+        self.pares_ip = ContadorFrequentes(max_pares_ip)
+        self.portas = Counter()
+        self.janelas = {segundos: JanelaDeslizante(segundos) for segundos in janelas}
+        self.inicio = None
+        self.ultimo = None
+
+    def registrar(self, info):
+        timestamp = info['timestamp']
+        tamanho = info.get('tamanho', 0)
+
+        if self.inicio is None:
+            self.inicio = timestamp
+        self.ultimo = timestamp
+
+        self.total_pacotes += 1
+        self.total_bytes += tamanho
+
+        for camada in info['camadas']:
+            tipo = camada['tipo']
+            if tipo == 'IP':
+                self.pares_ip.adicionar((camada['origem'], camada['destino']))
+            elif tipo in ('TCP', 'UDP', 'ICMP'):
+                self.protocolos[tipo] += 1
+                self.bytes_por_protocolo[tipo] += tamanho
+                if tipo != 'ICMP':
+                    self.portas[camada['porta_destino']] += 1
+
+        for janela in self.janelas.values():
+            janela.registrar(timestamp, tamanho)
+
+    def mesclar(self, outra):
+        self.total_pacotes += outra.total_pacotes
+        self.total_bytes += outra.total_bytes
+        self.protocolos.update(outra.protocolos)
+        self.bytes_por_protocolo.update(outra.bytes_por_protocolo)
+        self.pares_ip.mesclar(outra.pares_ip)
+        self.portas.update(outra.portas)
+
+        for segundos, janela in outra.janelas.items():
+            if segundos in self.janelas:
+                self.janelas[segundos].mesclar(janela)
+
+        if outra.inicio is not None:
+            self.inicio = outra.inicio if self.inicio is None else min(self.inicio, outra.inicio)
+            self.ultimo = outra.ultimo if self.ultimo is None else max(self.ultimo, outra.ultimo)
+
+    def taxas(self, agora=None):
+        taxas = {}
+        for segundos, janela in self.janelas.items():
+            pacotes, bytes_ = janela.taxas(agora)
+            taxas[segundos] = (pacotes * self.fator_amostragem, bytes_ * self.fator_amostragem)
+        return taxas
+
+    def _escalar(self, valor):
+        return valor if self.fator_amostragem == 1 else round(valor * self.fator_amostragem)
+
+    def resumo(self, top=5, agora=None):
+        duracao = (self.ultimo - self.inicio) if self.inicio is not None else 0
+        escalar = self._escalar
+        return {
+            'total_pacotes': escalar(self.total_pacotes),
+            'total_bytes': escalar(self.total_bytes),
+            'pacotes_amostrados': self.total_pacotes,
+            'fator_amostragem': self.fator_amostragem,
+            'duracao': duracao,
+            'protocolos': {chave: escalar(valor) for chave, valor in self.protocolos.items()},
+            'bytes_por_protocolo': {chave: escalar(valor) for chave, valor in self.bytes_por_protocolo.items()},
+            'top_pares_ip': [(chave, escalar(valor)) for chave, valor in self.pares_ip.most_common(top)],
+            # quanto as contagens de top_pares_ip podem estar abaixo do valor real
+            'erro_pares_ip': escalar(self.pares_ip.descontado),
+            'top_portas': [(chave, escalar(valor)) for chave, valor in self.portas.most_common(top)],
+            'taxas': self.taxas(agora),
+        }
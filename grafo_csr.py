@@ -0,0 +1,91 @@
+import os
+import uuid
+
+import numpy as np
+
+
+class GrafoCSR:
+    def __init__(self, indptr, indices, pesos):
+        self.indptr = indptr
+        self.indices = indices
+        self._pesos = np.asarray(pesos)
+        # a visao somente leitura obriga toda alteracao de peso a passar por atualizar_peso, que incrementa a versao
+        self.pesos = self._pesos.view()
+        self.pesos.flags.writeable = False
+        # identificador unico por instancia: o id() de um grafo descartado pode ser reaproveitado por outro
+        self.identificador = uuid.uuid4().hex
+        self.versao = 0
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def numero_arestas(self):
+        return len(self.indices)
+
+    @classmethod
+    def de_matriz(cls, matriz):
+        matriz = np.asarray(matriz)
+        linhas, colunas = np.nonzero(matriz > 0)
+        indptr = np.zeros(len(matriz) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(linhas, minlength=len(matriz)), out=indptr[1:])
+        return cls(indptr, colunas.astype(np.int32), matriz[linhas, colunas].astype(np.float64))
+
+    @classmethod
+    def de_arestas(cls, num_nos, origens, destinos, pesos):
+        origens = np.asarray(origens, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        pesos = np.asarray(pesos, dtype=np.float64)
+
+        validas = pesos > 0
+        origens, destinos, pesos = origens[validas], destinos[validas], pesos[validas]
+
+        ordem = np.lexsort((destinos, origens))
+        indptr = np.zeros(num_nos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origens, minlength=num_nos), out=indptr[1:])
+        return cls(indptr, destinos[ordem].astype(np.int32), pesos[ordem])
+
+    @classmethod
+    def carregar(cls, diretorio, mmap=True):
+        modo = 'r' if mmap else None
+        return cls(
+            np.load(os.path.join(diretorio, 'indptr.npy'), mmap_mode=modo),
+            np.load(os.path.join(diretorio, 'indices.npy'), mmap_mode=modo),
+            np.load(os.path.join(diretorio, 'pesos.npy'), mmap_mode=modo),
+        )
+
+    def salvar(self, diretorio):
+        os.makedirs(diretorio, exist_ok=True)
+        np.save(os.path.join(diretorio, 'indptr.npy'), np.asarray(self.indptr))
+        np.save(os.path.join(diretorio, 'indices.npy'), np.asarray(self.indices))
+        np.save(os.path.join(diretorio, 'pesos.npy'), np.asarray(self.pesos))
+
+    def vizinhos(self, no):
+        inicio, fim = self.indptr[no], self.indptr[no + 1]
+        return self.indices[inicio:fim], self.pesos[inicio:fim]
+
+    def peso(self, origem, destino):
+        inicio, fim = self.indptr[origem], self.indptr[origem + 1]
+        posicao = inicio + np.searchsorted(self.indices[inicio:fim], destino)
+        if posicao < fim and self.indices[posicao] == destino:
+            return self.pesos[posicao].item()
+        return float('inf')
+
+    def atualizar_peso(self, origem, destino, peso):
+        inicio, fim = self.indptr[origem], self.indptr[origem + 1]
+        posicao = inicio + np.searchsorted(self.indices[inicio:fim], destino)
+        if posicao >= fim or self.indices[posicao] != destino:
+            raise ValueError(f"Aresta {origem} -> {destino} não existe no grafo")
+
+        self._pesos[posicao] = peso if peso > 0 else float('inf')
+        self.versao += 1
+
+    def transposta(self):
+        origens = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        return GrafoCSR.de_arestas(len(self), self.indices, origens, self.pesos)
+
+    def para_matriz(self):
+        matriz = np.zeros((len(self), len(self)), dtype=np.asarray(self.pesos).dtype)
+        linhas = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        matriz[linhas, self.indices] = self.pesos
+        return matriz
@@ -0,0 +1,192 @@
+import mmap
+import struct
+
+MAGICOS_PCAP = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6),
+    b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9),
+    b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+TAMANHO_CABECALHO_PCAP = 24
+
+BLOCO_SECAO = 0x0A0D0D0A
+BLOCO_INTERFACE = 1
+BLOCO_PACOTE_OBSOLETO = 2
+BLOCO_PACOTE_SIMPLES = 3
+BLOCO_PACOTE_ESTENDIDO = 6
+MAGICO_ORDEM_PCAPNG = 0x1A2B3C4D
+
+OPCAO_FIM = 0
+OPCAO_RESOLUCAO = 9
+OPCAO_DESLOCAMENTO = 14
+
+
+def _alinhar(tamanho):
+    return (tamanho + 3) & ~3
+
+
+class LeitorPcap:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'rb')
+        try:
+            self.mapa = mmap.mmap(self.arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.arquivo.close()
+            raise ValueError(f"Arquivo vazio: {caminho}")
+        self.visao = memoryview(self.mapa)
+        self.tamanho = len(self.mapa)
+
+        magico = bytes(self.visao[:4])
+        if magico in MAGICOS_PCAP:
+            self.formato = 'pcap'
+            ordem, resolucao = MAGICOS_PCAP[magico]
+            if self.tamanho < TAMANHO_CABECALHO_PCAP:
+                self.fechar()
+                raise ValueError(f"Cabeçalho pcap truncado: {caminho}")
+            snaplen, linktype = struct.unpack_from(ordem + 'II', self.visao, 16)
+            self.inicio = TAMANHO_CABECALHO_PCAP
+            self.estado_inicial = {'ordem': ordem, 'interfaces': [(linktype & 0xFFFF, resolucao, 0, snaplen)]}
+        elif magico == struct.pack('<I', BLOCO_SECAO):
+            self.formato = 'pcapng'
+            self.inicio = 0
+            self.estado_inicial = {'ordem': '<', 'interfaces': []}
+        else:
+            self.fechar()
+            raise ValueError(f"Formato de arquivo desconhecido: {caminho}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        self.visao.release()
+        try:
+            self.mapa.close()
+        except BufferError:
+            # ainda ha fatias em uso; o mapa e liberado quando elas forem coletadas
+            pass
+        self.arquivo.close()
+
+    def _percorrer(self, inicio, fim, estado):
+        if self.formato == 'pcap':
+            return self._percorrer_pcap(inicio, fim, estado)
+        return self._percorrer_pcapng(inicio, fim, estado)
+
+    def _percorrer_pcap(self, inicio, fim, estado):
+        cabecalho = struct.Struct(estado['ordem'] + 'IIII')
+        linktype, resolucao, _, _ = estado['interfaces'][0]
+        visao = self.visao
+        posicao = inicio
+
+        while posicao + cabecalho.size <= fim:
+            segundos, fracao, capturado, _ = cabecalho.unpack_from(visao, posicao)
+            dados = posicao + cabecalho.size
+            if dados + capturado > self.tamanho:
+                break
+            yield posicao, segundos + fracao * resolucao, linktype, dados, capturado
+            posicao = dados + capturado
+
+    def _percorrer_pcapng(self, inicio, fim, estado):
+        visao = self.visao
+        posicao = inicio
+        timestamp = 0.0
+
+        while posicao + 12 <= fim:
+            ordem = estado['ordem']
+            tipo, tamanho_bloco = struct.unpack_from(ordem + 'II', visao, posicao)
+
+            if tipo == BLOCO_SECAO:
+                magico = struct.unpack_from('<I', visao, posicao + 8)[0]
+                ordem = '<' if magico == MAGICO_ORDEM_PCAPNG else '>'
+                tamanho_bloco = struct.unpack_from(ordem + 'I', visao, posicao + 4)[0]
+                estado['ordem'] = ordem
+                estado['interfaces'] = []
+
+            if tamanho_bloco < 12 or posicao + tamanho_bloco > self.tamanho:
+                break
+
+            if tipo == BLOCO_INTERFACE:
+                linktype, _, snaplen = struct.unpack_from(ordem + 'HHI', visao, posicao + 8)
+                resolucao, deslocamento = self._opcoes_interface(posicao + 16, posicao + tamanho_bloco - 4, ordem)
+                estado['interfaces'].append((linktype, resolucao, deslocamento, snaplen))
+
+            elif tipo == BLOCO_PACOTE_ESTENDIDO:
+                interface, alto, baixo, capturado, _ = struct.unpack_from(ordem + 'IIIII', visao, posicao + 8)
+                linktype, resolucao, deslocamento, _ = self._interface(estado, interface, posicao)
+                timestamp = ((alto << 32) | baixo) * resolucao + deslocamento
+                yield posicao, timestamp, linktype, posicao + 28, capturado
+
+            elif tipo == BLOCO_PACOTE_OBSOLETO:
+                interface, _, alto, baixo, capturado, _ = struct.unpack_from(ordem + 'HHIIII', visao, posicao + 8)
+                linktype, resolucao, deslocamento, _ = self._interface(estado, interface, posicao)
+                timestamp = ((alto << 32) | baixo) * resolucao + deslocamento
+                yield posicao, timestamp, linktype, posicao + 28, capturado
+
+            elif tipo == BLOCO_PACOTE_SIMPLES:
+                # nao tem carimbo de tempo (repete o do pacote anterior) e o tamanho capturado
+                # e limitado pelo snaplen da interface 0
+                original = struct.unpack_from(ordem + 'I', visao, posicao + 8)[0]
+                linktype, _, _, snaplen = self._interface(estado, 0, posicao)
+                capturado = min(original, snaplen or original, tamanho_bloco - 16)
+                yield posicao, timestamp, linktype, posicao + 12, capturado
+
+            posicao += tamanho_bloco
+
+    def _interface(self, estado, interface, posicao):
+        if interface >= len(estado['interfaces']):
+            raise ValueError(f"Bloco de pacote em {posicao} usa a interface {interface}, "
+                             f"mas a seção só descreve {len(estado['interfaces'])}: {self.caminho}")
+        return estado['interfaces'][interface]
+
+    def _opcoes_interface(self, inicio, fim, ordem):
+        resolucao, deslocamento = 1e-6, 0
+        posicao = inicio
+
+        while posicao + 4 <= fim:
+            codigo, tamanho = struct.unpack_from(ordem + 'HH', self.visao, posicao)
+            if codigo == OPCAO_FIM:
+                break
+            valor = posicao + 4
+            if codigo == OPCAO_RESOLUCAO and tamanho >= 1:
+                expoente = self.visao[valor]
+                resolucao = 2.0 ** -(expoente & 0x7F) if expoente & 0x80 else 10.0 ** -expoente
+            elif codigo == OPCAO_DESLOCAMENTO and tamanho >= 8:
+                deslocamento = struct.unpack_from(ordem + 'q', self.visao, valor)[0]
+            posicao = valor + _alinhar(tamanho)
+
+        return resolucao, deslocamento
+
+    def _copiar_estado(self, estado):
+        return {'ordem': estado['ordem'], 'interfaces': list(estado['interfaces'])}
+
+    def registros(self, inicio=None, fim=None, estado=None):
+        inicio = self.inicio if inicio is None else inicio
+        fim = self.tamanho if fim is None else fim
+        estado = self._copiar_estado(estado or self.estado_inicial)
+        visao = self.visao
+
+        for _, timestamp, linktype, dados, capturado in self._percorrer(inicio, fim, estado):
+            yield timestamp, linktype, visao[dados:dados + capturado]
+
+    def dividir(self, partes):
+        # os limites precisam cair no inicio de um registro, entao o arquivo e percorrido uma vez
+        # lendo apenas os cabecalhos; cada trecho leva o estado (ordem e interfaces) do ponto de corte
+        passo = max(1, (self.tamanho - self.inicio) // max(1, partes))
+        estado = self._copiar_estado(self.estado_inicial)
+        trechos = []
+        inicio_trecho, estado_trecho = self.inicio, self._copiar_estado(estado)
+        proximo_corte = self.inicio + passo
+
+        for posicao, _, _, _, _ in self._percorrer(self.inicio, self.tamanho, estado):
+            if posicao >= proximo_corte and posicao > inicio_trecho:
+                trechos.append((inicio_trecho, posicao, estado_trecho))
+                inicio_trecho = posicao
+                # so blocos de pacote geram cortes e eles nao alteram o estado, entao a copia vale para o trecho
+                estado_trecho = self._copiar_estado(estado)
+                proximo_corte = posicao + passo
+
+        trechos.append((inicio_trecho, self.tamanho, estado_trecho))
+        return trechos
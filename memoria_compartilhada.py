@@ -0,0 +1,42 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def criar_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    tamanho = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    bloco = shared_memory.SharedMemory(create=True, size=tamanho)
+    array = np.ndarray(shape, dtype=dtype, buffer=bloco.buf)
+    return bloco, array, (bloco.name, tuple(shape), dtype.str)
+
+
+def compartilhar_array(origem):
+    origem = np.asarray(origem)
+    bloco, array, descritor = criar_array(origem.shape, origem.dtype)
+    array[...] = origem
+    return bloco, array, descritor
+
+
+def anexar_array(descritor):
+    nome, shape, dtype = descritor
+    bloco = shared_memory.SharedMemory(name=nome)
+    return bloco, np.ndarray(shape, dtype=np.dtype(dtype), buffer=bloco.buf)
+
+
+def liberar(blocos):
+    for bloco in blocos:
+        bloco.close()
+        bloco.unlink()
+
+
+def anexar_arrays(descritores):
+    # o chamador guarda os blocos enquanto usar os arrays, senao a memoria e desmapeada
+    blocos_e_arrays = [anexar_array(d) for d in descritores]
+    return [bloco for bloco, _ in blocos_e_arrays], [array for _, array in blocos_e_arrays]
+
+
+def dividir_lotes(itens, processos):
+    # cerca de quatro lotes por processo equilibram a carga sem multiplicar as tarefas
+    tamanho = max(1, -(-len(itens) // (processos * 4)))
+    return [(inicio, itens[inicio:inicio + tamanho]) for inicio in range(0, len(itens), tamanho)]
@@ -0,0 +1,230 @@
+import json
+import struct
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# limites dos baldes em segundos, de 1us a 1s em passos 1-2.5-5
+LIMITES_LATENCIA = tuple(base * 10.0 ** expoente for expoente in range(-6, 0) for base in (1, 2.5, 5)) + (1.0,)
+
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+TPACKET_STATS = struct.Struct('II')
+
+
+class HistogramaLatencia:
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = limites
+        # o ultimo balde recebe o que passa do maior limite (+Inf)
+        self.baldes = [0] * (len(limites) + 1)
+        self.quantidade = 0
+        self.soma = 0.0
+
+    def registrar(self, segundos):
+        if segundos < 0:
+            segundos = 0.0
+        self.baldes[bisect_left(self.limites, segundos)] += 1
+        self.quantidade += 1
+        self.soma += segundos
+
+    def quantil(self, fracao):
+        # estimativa pelo limite superior do balde onde a contagem acumulada alcanca a fracao
+        if not self.quantidade:
+            return 0.0
+        alvo = fracao * self.quantidade
+        acumulado = 0
+        for limite, contagem in zip(self.limites + (float('inf'),), self.baldes):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return float('inf')
+
+    def resumo(self):
+        media = self.soma / self.quantidade if self.quantidade else 0.0
+        return {'quantidade': self.quantidade, 'media': media, 'p50': self.quantil(0.5),
+                'p99': self.quantil(0.99), 'maximo': self.quantil(1.0)}
+
+
+def ler_estatisticas_kernel(sock):
+    # PACKET_STATISTICS zera os contadores a cada leitura; tp_packets ja inclui os descartados
+    pacotes, descartes = TPACKET_STATS.unpack(sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, TPACKET_STATS.size))
+    return pacotes, descartes
+
+
+class MetricasCaptura:
+    def __init__(self, prefixo='captura'):
+        self.prefixo = prefixo
+        self.contadores = {}
+        self.histogramas = {}
+        self.medidores = {}
+        self.coletores = []
+        self.trava = threading.Lock()
+        # contadores e histogramas sao alterados pelas threads de captura, pela de escrita e pelos coletores
+        self.trava_registros = threading.Lock()
+
+    def incrementar(self, nome, quantidade=1):
+        with self.trava_registros:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def observar(self, etapa, segundos):
+        with self.trava_registros:
+            histograma = self.histogramas.get(etapa)
+            if histograma is None:
+                histograma = self.histogramas[etapa] = HistogramaLatencia()
+            histograma.registrar(segundos)
+
+    def _copiar_registros(self):
+        with self.trava_registros:
+            histogramas = {}
+            for etapa, histograma in self.histogramas.items():
+                copia = histogramas[etapa] = HistogramaLatencia(histograma.limites)
+                copia.baldes = list(histograma.baldes)
+                copia.quantidade, copia.soma = histograma.quantidade, histograma.soma
+            return dict(self.contadores), histogramas
+
+    def registrar_medidor(self, nome, funcao, contador=False):
+        self.medidores[nome] = (funcao, contador)
+
+    def registrar_coletor(self, funcao):
+        self.coletores.append(funcao)
+
+    def acompanhar_socket(self, sock):
+        sock = getattr(sock, 'ins', sock)
+
+        def coletar():
+            try:
+                pacotes, descartes = ler_estatisticas_kernel(sock)
+            except (OSError, ValueError):
+                # socket fechado ou plataforma sem PACKET_STATISTICS
+                self.coletores.remove(coletar)
+                return
+            self.incrementar('kernel_pacotes', pacotes)
+            self.incrementar('kernel_descartes', descartes)
+
+        self.coletores.append(coletar)
+        return coletar
+
+    def coletar(self):
+        with self.trava:
+            for coletor in list(self.coletores):
+                coletor()
+
+    def _valores_medidores(self):
+        valores = {}
+        for nome, (funcao, contador) in list(self.medidores.items()):
+            try:
+                valores[nome] = (funcao(), contador)
+            except Exception:
+                continue
+        return valores
+
+    def instantaneo(self):
+        self.coletar()
+        contadores, histogramas = self._copiar_registros()
+        return {
+            'timestamp': time.time(),
+            'contadores': contadores,
+            'medidores': {nome: valor for nome, (valor, _) in self._valores_medidores().items()},
+            'latencias': {etapa: histograma.resumo() for etapa, histograma in histogramas.items()},
+        }
+
+    def formatar_prometheus(self):
+        self.coletar()
+        contadores, histogramas = self._copiar_registros()
+        prefixo = self.prefixo
+        linhas = []
+
+        for nome, valor in sorted(contadores.items()):
+            linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+            linhas.append(f"{prefixo}_{nome}_total {valor}")
+
+        for nome, (valor, contador) in sorted(self._valores_medidores().items()):
+            if contador:
+                linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+                linhas.append(f"{prefixo}_{nome}_total {valor}")
+            else:
+                linhas.append(f"# TYPE {prefixo}_{nome} gauge")
+                linhas.append(f"{prefixo}_{nome} {valor}")
+
+        if histogramas:
+            nome = f"{prefixo}_latencia_segundos"
+            linhas.append(f"# TYPE {nome} histogram")
+            for etapa, histograma in sorted(histogramas.items()):
+                acumulado = 0
+                for limite, contagem in zip(histograma.limites, histograma.baldes):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{{etapa="{etapa}",le="{limite:g}"}} {acumulado}')
+                linhas.append(f'{nome}_bucket{{etapa="{etapa}",le="+Inf"}} {histograma.quantidade}')
+                linhas.append(f'{nome}_sum{{etapa="{etapa}"}} {histograma.soma}')
+                linhas.append(f'{nome}_count{{etapa="{etapa}"}} {histograma.quantidade}')
+
+        return "\n".join(linhas) + "\n"
+
+
+class _TratadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        corpo = self.server.metricas.formatar_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *argumentos):
+        pass
+
+
+class ServidorMetricas:
+    def __init__(self, metricas, porta=9108, endereco='127.0.0.1'):
+        self.servidor = ThreadingHTTPServer((endereco, porta), _TratadorMetricas)
+        self.servidor.daemon_threads = True
+        self.servidor.metricas = metricas
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+
+    @property
+    def endereco(self):
+        return self.servidor.server_address
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def encerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class InstantaneosPeriodicos:
+    def __init__(self, metricas, intervalo, destino):
+        self.metricas = metricas
+        self.intervalo = intervalo
+        self.destino = destino
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def encerrar(self):
+        self.parar.set()
+        self.thread.join()
+        # um ultimo instantaneo para o fim da captura tambem ficar registrado
+        self.destino(self.metricas.instantaneo())
+
+    def _executar(self):
+        while not self.parar.wait(self.intervalo):
+            self.destino(self.metricas.instantaneo())
+
+
+def gravar_instantaneos(caminho):
+    def gravar(instantaneo):
+        # um instantaneo a cada intervalo: abrir o arquivo em cada gravacao evita deixa-lo aberto apos a captura
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(instantaneo, separators=(',', ':')) + "\n")
+
+    return gravar
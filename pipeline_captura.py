@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from scapy.all import conf, sniff
+
+from amostragem import combinar_filtros
+from captura_pacotes import abrir_socket_bruto, analisar_lote
+from saidas_pacotes import SaidaAssincrona, SaidaTexto
+
+
+class PipelineCaptura:
+    def __init__(self, analisador, trabalhadores=2, tamanho_fila=50000, tamanho_lote=256,
+                 tamanho_fila_saida=10000, intervalo_saida=0.2, exibir_pacotes=True):
+        self.analisador = analisador
+        self.trabalhadores = trabalhadores
+        self.tamanho_fila = tamanho_fila
+        self.tamanho_lote = tamanho_lote
+        self.exibir_pacotes = exibir_pacotes
+        # sem saida configurada no analisador o pipeline exibe no formato detalhado, fora das threads de analise
+        self.saida = analisador.saida or SaidaAssincrona([SaidaTexto(analisador.formatar_pacote)],
+                                                         tamanho_fila_saida, intervalo=intervalo_saida)
+
+        self.fila_bruta = deque()
+        self.fila_lotes = queue.Queue(maxsize=trabalhadores * 2)
+        self.captura_encerrada = threading.Event()
+        self.classe_enlace = None
+
+        self.contadores = {
+            'capturados': 0,
+            'nao_amostrados': 0,
+            'descartados_captura': 0,
+            'analisados': 0,
+            'erros_analise': 0,
+        }
+        self._registrar_medidores()
+
+    def _registrar_medidores(self):
+        metricas = self.analisador.metricas
+        for nome in ('descartados_captura', 'erros_analise'):
+            metricas.registrar_medidor(f'pipeline_{nome}', lambda nome=nome: self.contadores[nome], contador=True)
+        metricas.registrar_medidor('pipeline_fila_bruta', lambda: len(self.fila_bruta))
+        metricas.registrar_medidor('pipeline_fila_lotes', lambda: self.fila_lotes.qsize())
+        # a saida pode ter sido criada pelo pipeline, entao os medidores do analisador passam a apontar para ela
+        metricas.registrar_medidor('fila_saida', lambda: self.saida.fila.qsize())
+        metricas.registrar_medidor('saida_escritos', lambda: self.saida.contadores['escritos'], contador=True)
+        metricas.registrar_medidor('saida_descartados', lambda: self.saida.contadores['descartados'], contador=True)
+        if self.saida.metricas is None:
+            self.saida.metricas = metricas
+
+    def amostrar(self, pacote):
+        self.contadores['capturados'] += 1
+        if self.analisador.amostrador.aceitar():
+            return True
+        self.contadores['nao_amostrados'] += 1
+        return False
+
+    def capturar(self, pacote):
+        self.analisador.metricas.observar('captura', time.time() - float(pacote.time))
+        if len(self.fila_bruta) >= self.tamanho_fila:
+            self.contadores['descartados_captura'] += 1
+            return
+        if self.classe_enlace is not None:
+            # socket bruto: o pacote e so a camada crua e a carga ja sao os bytes do quadro
+            self.fila_bruta.append((float(pacote.time), self.classe_enlace, pacote.load))
+        else:
+            self.fila_bruta.append((float(pacote.time), type(pacote), bytes(pacote)))
+
+    def _montar_lotes(self, executor):
+        while True:
+            lote = []
+            while len(lote) < self.tamanho_lote:
+                try:
+                    lote.append(self.fila_bruta.popleft())
+                except IndexError:
+                    break
+
+            if lote:
+                # quanto o pacote mais antigo do lote esperou na fila bruta, a partir do carimbo do kernel
+                self.analisador.metricas.observar('fila_bruta', time.time() - lote[0][0])
+                # bloqueia quando os analisadores estao ocupados; a fila bruta absorve o excesso
+                self.fila_lotes.put((len(lote), time.perf_counter(), executor.submit(analisar_lote, lote)))
+            elif self.captura_encerrada.is_set():
+                break
+            else:
+                time.sleep(0.001)
+
+        self.fila_lotes.put(None)
+
+    def _coletar_resultados(self):
+        while True:
+            item = self.fila_lotes.get()
+            if item is None:
+                break
+
+            quantidade, enviado, tarefa = item
+            metricas = self.analisador.metricas
+            try:
+                infos = tarefa.result()
+            except Exception:
+                self.contadores['erros_analise'] += quantidade
+                continue
+            # do envio ao processo ate o resultado, incluindo a espera por um analisador livre
+            metricas.observar('lote', time.perf_counter() - enviado)
+
+            for info in infos:
+                inicio = time.perf_counter()
+                self.analisador.registrar_info(info)
+                self.contadores['analisados'] += 1
+                metricas.observar('registro', time.perf_counter() - inicio)
+
+                if self.exibir_pacotes:
+                    self.saida.enviar(info)
+
+    def exibir_contadores(self):
+        print("Contadores do pipeline:")
+        for nome, valor in self.contadores.items():
+            print(f"  {nome}: {valor}")
+        print(f"  exibidos: {self.saida.contadores['escritos']}")
+        print(f"  descartados_saida: {self.saida.contadores['descartados']}")
+        print(f"  fila_bruta: {len(self.fila_bruta)}")
+
+    def executar(self, fonte):
+        with ProcessPoolExecutor(max_workers=self.trabalhadores) as executor:
+            threads = [
+                threading.Thread(target=self._montar_lotes, args=(executor,), daemon=True),
+                threading.Thread(target=self._coletar_resultados, daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+
+            try:
+                fonte()
+            finally:
+                self.captura_encerrada.set()
+                for thread in threads:
+                    thread.join()
+                self.saida.encerrar()
+
+    def iniciar_captura(self, interface=None, filtro="tcp", quantidade=0, decodificador_rapido=False, snaplen=None):
+        print("Iniciando captura de pacotes de rede (pipeline)...")
+        print("Pressione Ctrl+C para parar a captura\n")
+
+        filtro = combinar_filtros(filtro)
+        amostrador = self.analisador.amostrador
+        no_kernel = self.analisador.preparar_amostragem(snaplen)
+
+        def fonte():
+            # a thread de captura so enfileira bytes: o socket sempre entrega o quadro sem dissecar e a
+            # decodificacao fica com os trabalhadores, entao decodificador_rapido nao muda nada aqui
+            sock, self.classe_enlace = abrir_socket_bruto(interface, filtro, snaplen, amostrador.probabilidade)
+            amostrador.probabilidade_no_kernel = sock is not None and no_kernel
+            if sock is None:
+                sock = conf.L2listen(iface=interface, filter=filtro)
+            self.analisador.metricas.acompanhar_socket(sock)
+            try:
+                sniff(opened_socket=sock, prn=self.capturar, lfilter=self.amostrar, count=quantidade, store=False)
+            finally:
+                self.analisador.metricas.coletar()
+                sock.close()
+
+        try:
+            self.executar(fonte)
+        except KeyboardInterrupt:
+            print("\n\nCaptura interrompida pelo usuário")
+        except Exception as e:
+            print(f"Erro durante a captura: {e}")
+        finally:
+            self.analisador.exibir_estatisticas()
+            self.exibir_contadores()
+            self.analisador.exibir_metricas()
+            print("\nCaptura finalizada")
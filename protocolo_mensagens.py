@@ -0,0 +1,97 @@
+import json
+import struct
+
+# cada quadro e um tamanho de 4 bytes em ordem de rede seguido do JSON em UTF-8
+CABECALHO = struct.Struct('!I')
+TAMANHO_MAXIMO_QUADRO = 16 << 20
+
+
+class ErroProtocolo(ValueError):
+    pass
+
+
+def montar_quadro(mensagem):
+    dados = mensagem.encode('utf-8')
+    return CABECALHO.pack(len(dados)) + dados
+
+
+class DecodificadorQuadros:
+    def __init__(self, tamanho_inicial=65536, tamanho_maximo=TAMANHO_MAXIMO_QUADRO):
+        self.tamanho_maximo = tamanho_maximo
+        self.buffer = bytearray(tamanho_inicial)
+        self.visao = memoryview(self.buffer)
+        # bytes validos ficam entre inicio e fim; o que vem antes de inicio ja foi consumido
+        self.inicio = 0
+        self.fim = 0
+
+    def _garantir_espaco(self, necessario):
+        pendentes = self.fim - self.inicio
+        if len(self.buffer) - self.fim >= necessario:
+            return
+
+        if self.inicio and len(self.buffer) - pendentes >= necessario:
+            # move o quadro incompleto para o comeco em vez de alocar
+            self.visao[:pendentes] = self.visao[self.inicio:self.fim]
+        else:
+            novo = bytearray(max(len(self.buffer) * 2, pendentes + necessario))
+            novo[:pendentes] = self.visao[self.inicio:self.fim]
+            # o bytearray antigo so pode ser descartado depois de a visao exportada ser liberada
+            self.visao.release()
+            self.buffer = novo
+            self.visao = memoryview(novo)
+        self.inicio = 0
+        self.fim = pendentes
+
+    def _faltando(self):
+        # quanto falta para completar o quadro atual, ou um minimo razoavel para a proxima leitura
+        pendentes = self.fim - self.inicio
+        if pendentes >= CABECALHO.size:
+            tamanho = self._tamanho_quadro()
+            return max(CABECALHO.size + tamanho - pendentes, 4096)
+        return 4096
+
+    def _tamanho_quadro(self):
+        tamanho = CABECALHO.unpack_from(self.visao, self.inicio)[0]
+        if tamanho > self.tamanho_maximo:
+            raise ErroProtocolo(f"Quadro de {tamanho} bytes excede o limite de {self.tamanho_maximo}")
+        return tamanho
+
+    def area_livre(self):
+        self._garantir_espaco(self._faltando())
+        return self.visao[self.fim:]
+
+    def confirmar(self, quantidade):
+        self.fim += quantidade
+
+    def receber_de(self, conexao):
+        quantidade = conexao.recv_into(self.area_livre())
+        self.fim += quantidade
+        return quantidade
+
+    def alimentar(self, dados):
+        self._garantir_espaco(len(dados))
+        self.visao[self.fim:self.fim + len(dados)] = dados
+        self.fim += len(dados)
+
+    def proxima(self):
+        pendentes = self.fim - self.inicio
+        if pendentes < CABECALHO.size:
+            return None
+
+        tamanho = self._tamanho_quadro()
+        if pendentes < CABECALHO.size + tamanho:
+            return None
+
+        inicio = self.inicio + CABECALHO.size
+        # o indice avanca antes de decodificar, entao um quadro invalido nao trava a conexao
+        self.inicio = inicio + tamanho
+        if self.inicio == self.fim:
+            self.inicio = self.fim = 0
+        return json.loads(str(self.visao[inicio:inicio + tamanho], 'utf-8'))
+
+    def mensagens(self):
+        while True:
+            mensagem = self.proxima()
+            if mensagem is None:
+                return
+            yield mensagem
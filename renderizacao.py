@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def layout_circular(num_nos):
+    angulos = 2 * np.pi * np.arange(num_nos) / max(num_nos, 1)
+    return np.column_stack((np.cos(angulos), np.sin(angulos)))
+
+
+def criar_figura(figsize, arquivo=None):
+    if arquivo is not None:
+        from matplotlib.figure import Figure
+        return Figure(figsize=figsize)
+
+    import matplotlib.pyplot as plt
+    return plt.figure(figsize=figsize)
+
+
+def finalizar_figura(figura, arquivo=None, dpi=150):
+    figura.tight_layout()
+
+    if arquivo is not None:
+        figura.savefig(arquivo, dpi=dpi)
+        return
+
+    import matplotlib.pyplot as plt
+    plt.show()
+
+
+def desenhar_grafo(eixo, coordenadas, arestas, pesos=None, nomes=None, limite_rotulos=50, decimacao=1,
+                   cor_arestas='gray', largura=1.0, cor_nos='lightblue', tamanho_nos=None):
+    from matplotlib.collections import LineCollection
+
+    coordenadas = np.asarray(coordenadas, dtype=np.float64)
+    arestas = np.asarray(arestas, dtype=np.int64).reshape(-1, 2)
+    if pesos is not None:
+        pesos = np.asarray(pesos)
+
+    if decimacao > 1:
+        arestas = arestas[::decimacao]
+        if pesos is not None:
+            pesos = pesos[::decimacao]
+
+    eixo.add_collection(LineCollection(coordenadas[arestas], colors=cor_arestas, linewidths=largura, alpha=0.7))
+
+    num_nos = len(coordenadas)
+    if tamanho_nos is None:
+        tamanho_nos = 800 if num_nos <= limite_rotulos else max(1, 4000 / num_nos)
+    eixo.scatter(coordenadas[:, 0], coordenadas[:, 1], s=tamanho_nos, c=cor_nos, zorder=2)
+
+    if nomes is not None and num_nos <= limite_rotulos:
+        for (x, y), nome in zip(coordenadas, nomes):
+            eixo.text(x, y, str(nome), ha='center', va='center', fontsize=12, fontweight='bold', zorder=3)
+
+    if pesos is not None and len(arestas) <= limite_rotulos:
+        meios = coordenadas[arestas].mean(axis=1)
+        for (x, y), peso in zip(meios, pesos.tolist()):
+            eixo.text(x, y, f'{peso:g}', ha='center', va='center', fontsize=9,
+                      bbox=dict(boxstyle="round,pad=0.2", facecolor="white", alpha=0.8))
+
+    eixo.autoscale_view()
+    eixo.set_aspect('equal', adjustable='datalim')
+    eixo.axis('off')
@@ -0,0 +1,190 @@
+import json
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from armazenamento_colunar import DTYPE_PACOTE, linha_de_info
+
+
+class FormatadorHora:
+    def __init__(self, formato='%H:%M:%S'):
+        self.formato = formato
+        # segundo e texto ficam juntos para a troca ser atomica entre threads
+        self.ultimo = (None, '')
+
+    def __call__(self, timestamp):
+        segundo = int(timestamp)
+        ultimo_segundo, texto = self.ultimo
+        if segundo != ultimo_segundo:
+            texto = time.strftime(self.formato, time.localtime(segundo))
+            self.ultimo = (segundo, texto)
+        return texto
+
+
+formatar_hora = FormatadorHora()
+
+
+def formatar_linha(info):
+    enlace = ip = transporte = None
+    for camada in info['camadas']:
+        tipo = camada['tipo']
+        if tipo == 'Ethernet':
+            enlace = camada
+        elif tipo == 'IP':
+            ip = camada
+        elif tipo in ('TCP', 'UDP', 'ICMP'):
+            transporte = camada
+
+    inicio = f"#{info.get('numero', 0)} {formatar_hora(info['timestamp'])}"
+    if ip is None:
+        if enlace is None:
+            return f"{inicio} {info['tamanho']}B"
+        return f"{inicio} Ethernet {enlace['origem']} > {enlace['destino']} 0x{enlace['protocolo']:04x} {info['tamanho']}B"
+
+    if transporte is None:
+        return f"{inicio} IP/{ip['protocolo']} {ip['origem']} > {ip['destino']} {info['tamanho']}B"
+    if transporte['tipo'] == 'ICMP':
+        return (f"{inicio} ICMP {ip['origem']} > {ip['destino']} "
+                f"tipo {transporte['tipo_icmp']}/{transporte['codigo']} {info['tamanho']}B")
+
+    linha = (f"{inicio} {transporte['tipo']} {ip['origem']}:{transporte['porta_origem']} > "
+             f"{ip['destino']}:{transporte['porta_destino']}")
+    if transporte['tipo'] == 'TCP':
+        linha += f" [{transporte['flags']}]"
+    return f"{linha} {info['tamanho']}B"
+
+
+class SaidaTexto:
+    def __init__(self, formatar=formatar_linha, caminho=None):
+        self.formatar = formatar
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'w', encoding='utf-8', buffering=1 << 20) if caminho else None
+
+    def escrever(self, infos):
+        # o sys.stdout e consultado a cada lote para respeitar redirecionamentos feitos depois da criacao
+        arquivo = self.arquivo or sys.stdout
+        arquivo.write("\n".join([self.formatar(info) for info in infos]) + "\n")
+
+    def descarregar(self):
+        (self.arquivo or sys.stdout).flush()
+
+    def fechar(self):
+        if self.arquivo is not None:
+            self.arquivo.close()
+        else:
+            sys.stdout.flush()
+
+
+class SaidaJsonLinhas:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'w', encoding='utf-8', buffering=1 << 20)
+
+    def escrever(self, infos):
+        dumps = json.dumps
+        self.arquivo.write("".join([dumps(info, separators=(',', ':')) + "\n" for info in infos]))
+
+    def descarregar(self):
+        self.arquivo.flush()
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+class SaidaBinaria:
+    # registros de tamanho fixo no mesmo dtype do armazenamento colunar; le-se com ler_log_binario
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'wb', buffering=1 << 20)
+
+    def escrever(self, infos):
+        self.arquivo.write(np.array([linha_de_info(info) for info in infos], dtype=DTYPE_PACOTE).tobytes())
+
+    def descarregar(self):
+        self.arquivo.flush()
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+def ler_log_binario(caminho):
+    return np.fromfile(caminho, dtype=DTYPE_PACOTE)
+
+
+def abrir_log(caminho):
+    if caminho.endswith('.bin'):
+        return SaidaBinaria(caminho)
+    return SaidaJsonLinhas(caminho)
+
+
+class SaidaAssincrona:
+    def __init__(self, saidas, tamanho_fila=10000, tamanho_lote=512, intervalo=0.2, bloquear=False, metricas=None):
+        self.saidas = list(saidas)
+        self.metricas = metricas
+        self.bloquear = bloquear
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.thread = None
+        self.contadores = {'escritos': 0, 'descartados': 0, 'erros': 0}
+
+    def iniciar(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._escrever, daemon=True)
+            self.thread.start()
+
+    def enviar(self, info):
+        if not self.saidas:
+            return
+        if self.thread is None:
+            self.iniciar()
+        # na captura ao vivo a thread nunca espera pela saida; com a fila cheia o pacote deixa de ser exibido
+        try:
+            self.fila.put(info, block=self.bloquear)
+        except queue.Full:
+            self.contadores['descartados'] += 1
+
+    def encerrar(self):
+        try:
+            if self.thread is not None:
+                self.fila.put(None)
+                self.thread.join()
+                self.thread = None
+        finally:
+            # os arquivos sao abertos na criacao das saidas e precisam ser fechados mesmo sem nenhum pacote enviado
+            saidas, self.saidas = self.saidas, []
+            for saida in saidas:
+                saida.fechar()
+
+    def _escrever(self):
+        terminou = False
+        while not terminou:
+            lote = []
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                try:
+                    info = self.fila.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if info is None:
+                    terminou = True
+                    break
+                lote.append(info)
+
+            if not lote:
+                continue
+
+            inicio = time.perf_counter()
+            for saida in self.saidas:
+                try:
+                    saida.escrever(lote)
+                    saida.descarregar()
+                except (OSError, ValueError, TypeError):
+                    self.contadores['erros'] += len(lote)
+            self.contadores['escritos'] += len(lote)
+            if self.metricas is not None:
+                # tempo por pacote, para ser comparavel com as etapas da captura
+                self.metricas.observar('escrita', (time.perf_counter() - inicio) / len(lote))
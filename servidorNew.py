@@ -1,16 +1,22 @@
+import asyncio
 import socket
 import ssl
+import sys
 import threading
 import json
 from cryptography.fernet import Fernet
 import base64
 import os
 
+from protocolo_mensagens import DecodificadorQuadros, montar_quadro
+
 class ServidorMessenger:
-    def __init__(self, host='localhost', porta=8443):
+    def __init__(self, host='localhost', porta=8443, limite_buffer_saida=1 << 20):
         self.host = host
         self.porta = porta
+        # no modo de threads guarda (socket, trava de envio); no modo asyncio, os StreamWriter
         self.clientes_conectados = {}
+        self.limite_buffer_saida = limite_buffer_saida
         self.chave_criptografia = Fernet.generate_key()
         self.cifrador = Fernet(self.chave_criptografia)
 
@@ -54,81 +60,164 @@ class ServidorMessenger:
         mensagem_criptografada = self.cifrador.encrypt(mensagem_bytes)
         return base64.urlsafe_b64encode(mensagem_criptografada).decode('utf-8')
     
+    def montar_mensagem_chave(self):
+        return json.dumps({
+            'tipo': 'chave_criptografia',
+            'chave': base64.urlsafe_b64encode(self.chave_criptografia).decode('utf-8')
+        })
+
+    def montar_mensagem_sistema(self, mensagem_criptografada):
+        return json.dumps({
+            'tipo': 'mensagem',
+            'usuario': 'Sistema',
+            'conteudo': mensagem_criptografada
+        })
+
+    def tratar_mensagem(self, mensagem_recebida, conexao):
+        # comum aos dois modos: registra o usuario ou repassa a mensagem; devolve o texto a transmitir
+        # e o usuario de origem, que nao o recebe
+        if mensagem_recebida['tipo'] == 'registro':
+            nome_usuario = mensagem_recebida['usuario']
+            self.clientes_conectados[nome_usuario] = conexao
+            print(f"Usuário registrado: {nome_usuario}")
+
+            mensagem_sistema = self.criptografar_mensagem(
+                f"~~{nome_usuario} entrou no chat"
+            )
+            return self.montar_mensagem_sistema(mensagem_sistema), nome_usuario
+
+        if mensagem_recebida['tipo'] == 'mensagem':
+            mensagem_criptografada = mensagem_recebida['conteudo']
+            usuario_origem = mensagem_recebida['usuario']
+
+            print(f"Mensagem de {usuario_origem}: {self.cifrador.decrypt(base64.urlsafe_b64decode(mensagem_criptografada)).decode('utf-8')}")
+
+            mensagem_transmitir = json.dumps({
+                'tipo': 'mensagem',
+                'usuario': usuario_origem,
+                'conteudo': mensagem_criptografada
+            })
+            return mensagem_transmitir, usuario_origem
+
+        return None, None
+
+    def remover_cliente(self, conexao_cliente):
+        for usuario, conexao in list(self.clientes_conectados.items()):
+            if conexao is conexao_cliente:
+                del self.clientes_conectados[usuario]
+                print(f"Usuário desconectado: {usuario}")
+                break
+
     def processar_cliente(self, conexao_cliente, endereco):
+        cliente = None
         try:
             print(f"Novo cliente conectado: {endereco}")
             
-            dados_chave = json.dumps({
-                'tipo': 'chave_criptografia',
-                'chave': base64.urlsafe_b64encode(self.chave_criptografia).decode('utf-8')
-            })
-            conexao_cliente.send(dados_chave.encode('utf-8'))
+            conexao_cliente.sendall(montar_quadro(self.montar_mensagem_chave()))
+            decodificador = DecodificadorQuadros()
+            # varias threads transmitem para o mesmo socket; a trava e da conexao para que quadros nao se
+            # intercalem sem que um cliente lento segure o envio aos outros
+            cliente = (conexao_cliente, threading.Lock())
             
             while True:
-                dados = conexao_cliente.recv(1024)
-                if not dados:
+                if not decodificador.receber_de(conexao_cliente):
                     break
                 
-                mensagem_recebida = json.loads(dados.decode('utf-8'))
-                
-                if mensagem_recebida['tipo'] == 'registro':
-                    nome_usuario = mensagem_recebida['usuario']
-                    self.clientes_conectados[nome_usuario] = conexao_cliente
-                    print(f"Usuário registrado: {nome_usuario}")
-                    
-                    mensagem_sistema = self.criptografar_mensagem(
-                        f"~~{nome_usuario} entrou no chat"
-                    )
-                    self.transmitir_mensagem(mensagem_sistema, nome_usuario)
-                    
-                elif mensagem_recebida['tipo'] == 'mensagem':
-                    mensagem_criptografada = mensagem_recebida['conteudo']
-                    usuario_origem = mensagem_recebida['usuario']
-                    
-                    print(f"Mensagem de {usuario_origem}: {self.cifrador.decrypt(base64.urlsafe_b64decode(mensagem_criptografada)).decode('utf-8')}")
-                    
-                    mensagem_transmitir = json.dumps({
-                        'tipo': 'mensagem',
-                        'usuario': usuario_origem,
-                        'conteudo': mensagem_criptografada
-                    })
-                    
-                    self.transmitir_mensagem_para_todos(mensagem_transmitir, usuario_origem)
+                for mensagem_recebida in decodificador.mensagens():
+                    mensagem_transmitir, usuario_origem = self.tratar_mensagem(mensagem_recebida, cliente)
+                    if mensagem_transmitir is not None:
+                        self.transmitir_mensagem_para_todos(mensagem_transmitir, usuario_origem)
                     
         except Exception as e:
             print(f"Erro no cliente {endereco}: {e}")
         finally:
-            for usuario, conexao in list(self.clientes_conectados.items()):
-                if conexao == conexao_cliente:
-                    del self.clientes_conectados[usuario]
-                    print(f"Usuário desconectado: {usuario}")
-                    break
+            if cliente is not None:
+                self.remover_cliente(cliente)
             conexao_cliente.close()
     
     def transmitir_mensagem(self, mensagem_criptografada, usuario_origem):
-        mensagem_transmitir = json.dumps({
-            'tipo': 'mensagem',
-            'usuario': 'Sistema',
-            'conteudo': mensagem_criptografada
-        })
+        self.transmitir_mensagem_para_todos(self.montar_mensagem_sistema(mensagem_criptografada), usuario_origem)
 
-        for usuario, conexao in self.clientes_conectados.items():
+    def transmitir_mensagem_para_todos(self, mensagem, usuario_origem):
+        quadro = montar_quadro(mensagem)
+        for usuario, (conexao, trava) in list(self.clientes_conectados.items()):
             if usuario != usuario_origem:
                 try:
-                    conexao.send(mensagem_transmitir.encode('utf-8'))
+                    with trava:
+                        conexao.sendall(quadro)
                 except:
                     if usuario in self.clientes_conectados:
                         del self.clientes_conectados[usuario]
 
+    async def processar_cliente_async(self, leitor, escritor):
+        endereco = escritor.get_extra_info('peername')
+        try:
+            print(f"Novo cliente conectado: {endereco}")
 
-    def transmitir_mensagem_para_todos(self, mensagem, usuario_origem):
-        for usuario, conexao in self.clientes_conectados.items():
-            if usuario != usuario_origem:
-                try:
-                    conexao.send(mensagem.encode('utf-8'))
-                except:
-                    if usuario in self.clientes_conectados:
-                        del self.clientes_conectados[usuario]
+            escritor.write(montar_quadro(self.montar_mensagem_chave()))
+            await escritor.drain()
+            decodificador = DecodificadorQuadros()
+
+            while True:
+                # o StreamReader ja tem buffer proprio; cada leitura e copiada uma vez para o decodificador
+                dados = await leitor.read(65536)
+                if not dados:
+                    break
+
+                decodificador.alimentar(dados)
+                for mensagem_recebida in decodificador.mensagens():
+                    mensagem_transmitir, usuario_origem = self.tratar_mensagem(mensagem_recebida, escritor)
+                    if mensagem_transmitir is not None:
+                        self.transmitir_async(mensagem_transmitir, usuario_origem)
+
+        except Exception as e:
+            print(f"Erro no cliente {endereco}: {e}")
+        finally:
+            self.remover_cliente(escritor)
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    def transmitir_async(self, mensagem, usuario_origem):
+        # write so enfileira no transporte, sem esperar cada cliente; quem acumula mais que
+        # limite_buffer_saida sem ler e desconectado para nao segurar memoria do servidor
+        quadro = montar_quadro(mensagem)
+        for usuario, escritor in list(self.clientes_conectados.items()):
+            if usuario == usuario_origem:
+                continue
+            if escritor.is_closing() or escritor.transport.get_write_buffer_size() > self.limite_buffer_saida:
+                del self.clientes_conectados[usuario]
+                escritor.close()
+                print(f"Usuário desconectado por não acompanhar as mensagens: {usuario}")
+                continue
+            escritor.write(quadro)
+
+    async def servir_async(self, backlog=4096):
+        servidor = await asyncio.start_server(
+            self.processar_cliente_async,
+            self.host,
+            self.porta,
+            ssl=self.contexto_ssl,
+            backlog=backlog,
+            reuse_address=True,
+        )
+
+        print(f"Servidor messenger seguro (asyncio) iniciado em {self.host}:{self.porta}")
+        print("Aguardando conexões de clientes...")
+
+        async with servidor:
+            await servidor.serve_forever()
+
+    def iniciar_servidor_async(self, backlog=4096):
+        aumentar_limite_arquivos()
+        try:
+            asyncio.run(self.servir_async(backlog))
+        except KeyboardInterrupt:
+            print("\nServidor encerrado")
+        except Exception as e:
+            print(f"Erro no servidor: {e}")
     
     def iniciar_servidor(self):
         try:
@@ -158,6 +247,20 @@ class ServidorMessenger:
         except Exception as e:
             print(f"Erro no servidor: {e}")
 
+def aumentar_limite_arquivos():
+    # cada cliente ocupa um descritor; o limite suave padrao (1024) barra o servidor bem antes da memoria
+    try:
+        import resource
+        suave, rigido = resource.getrlimit(resource.RLIMIT_NOFILE)
+        alvo = rigido if rigido != resource.RLIM_INFINITY else 1 << 20
+        if suave < alvo:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (alvo, rigido))
+    except (ImportError, ValueError, OSError):
+        pass
+
 if __name__ == "__main__":
     servidor = ServidorMessenger()
-    servidor.iniciar_servidor()
+    if '--threads' in sys.argv:
+        servidor.iniciar_servidor()
+    else:
+        servidor.iniciar_servidor_async()
@@ -0,0 +1,642 @@
+import heapq
+import math
+from collections import Counter, OrderedDict, deque
+
+from decodificador_rapido import CODIGOS_FLAGS_TCP, IPV4, TAMANHO_MINIMO_TCP
+
+FIN = 0x01
+SYN = 0x02
+RST = 0x04
+ACK = 0x10
+
+SYN_ENVIADO = 'SYN_ENVIADO'
+SYN_RECEBIDO = 'SYN_RECEBIDO'
+ESTABELECIDA = 'ESTABELECIDA'
+FECHANDO = 'FECHANDO'
+FECHADA = 'FECHADA'
+RESETADA = 'RESETADA'
+ESTADOS_FINAIS = (FECHADA, RESETADA)
+
+# baldes do histograma de RTT: 8 por oitava a partir de 1us, ate cerca de 2 minutos
+RTT_MINIMO = 1e-6
+BALDES_POR_OITAVA = 8
+NUMERO_BALDES_RTT = 27 * BALDES_POR_OITAVA
+
+# quantos inicios de segmento cada sentido de um fluxo inicial guarda para mesclar reconhecer as
+# retransmissoes logo depois do corte
+MAX_INICIOS_CONTINUACAO = 16
+
+CONTADORES = ('total_fluxos', 'total_encerrados', 'descartados_por_limite', 'retransmissoes')
+
+MASCARA_SEQ = 0xFFFFFFFF
+METADE_SEQ = 0x80000000
+
+
+def seq_menor(a, b):
+    return a != b and ((a - b) & MASCARA_SEQ) >= METADE_SEQ
+
+
+def seq_maior_igual(a, b):
+    return not seq_menor(a, b)
+
+
+class HistogramaRtt:
+    # contagem dos fluxos da tabela por faixa de RTT; a mediana sai dos baldes sem percorrer os fluxos
+    def __init__(self):
+        self.baldes = [0] * NUMERO_BALDES_RTT
+        self.quantidade = 0
+
+    @staticmethod
+    def balde(rtt):
+        if rtt <= RTT_MINIMO:
+            return 0
+        return min(int(math.log2(rtt / RTT_MINIMO) * BALDES_POR_OITAVA), NUMERO_BALDES_RTT - 1)
+
+    def alterar(self, balde, quantidade):
+        self.baldes[balde] += quantidade
+        self.quantidade += quantidade
+
+    def somar(self, outro):
+        for balde, contagem in enumerate(outro.baldes):
+            self.baldes[balde] += contagem
+        self.quantidade += outro.quantidade
+
+    def mediana(self):
+        if not self.quantidade:
+            return None
+        metade = (self.quantidade + 1) // 2
+        acumulado = 0
+        for balde, contagem in enumerate(self.baldes):
+            acumulado += contagem
+            if acumulado >= metade:
+                # centro geometrico do balde, com erro de no maximo meio balde (cerca de 4%)
+                return RTT_MINIMO * 2 ** ((balde + 0.5) / BALDES_POR_OITAVA)
+        return None
+
+
+class Sentido:
+    __slots__ = ('pacotes', 'bytes', 'dados', 'retransmissoes', 'proximo_seq', 'medicao', 'srtt', 'rtt_min',
+                 'amostras_rtt')
+
+    def __init__(self):
+        self.pacotes = 0
+        self.bytes = 0
+        self.dados = 0
+        self.retransmissoes = 0
+        self.proximo_seq = None
+        # (seq final esperado no ACK, instante de envio) do segmento em medicao
+        self.medicao = None
+        self.srtt = None
+        self.rtt_min = None
+        self.amostras_rtt = 0
+
+    def registrar_rtt(self, amostra):
+        self.amostras_rtt += 1
+        self.rtt_min = amostra if self.rtt_min is None else min(self.rtt_min, amostra)
+        # suavizacao do RFC 6298
+        self.srtt = amostra if self.srtt is None else 0.875 * self.srtt + 0.125 * amostra
+
+    def somar(self, continuacao):
+        self.pacotes += continuacao.pacotes
+        self.bytes += continuacao.bytes
+        self.dados += continuacao.dados
+        self.retransmissoes += continuacao.retransmissoes
+        if continuacao.proximo_seq is not None:
+            self.proximo_seq = continuacao.proximo_seq
+        self.medicao = continuacao.medicao
+        if continuacao.amostras_rtt:
+            self.amostras_rtt += continuacao.amostras_rtt
+            self.srtt = continuacao.srtt
+            self.rtt_min = continuacao.rtt_min if self.rtt_min is None else min(self.rtt_min, continuacao.rtt_min)
+
+
+class Fluxo:
+    __slots__ = ('chave', 'cliente', 'inicio', 'ultimo', 'estado', 'sentidos', 'rtt_handshake', 'instante_syn',
+                 'fins', 'handshake_visto', 'syn_inicial', 'balde_rtt')
+
+    def __init__(self, chave, cliente, timestamp, syn_inicial=False):
+        self.chave = chave
+        # sentido 0 e o do cliente (quem enviou o SYN ou, sem ele, o primeiro pacote visto)
+        self.cliente = cliente
+        self.inicio = timestamp
+        self.ultimo = timestamp
+        self.estado = ESTABELECIDA
+        self.sentidos = (Sentido(), Sentido())
+        self.rtt_handshake = None
+        self.instante_syn = None
+        self.fins = 0
+        self.handshake_visto = False
+        # o primeiro pacote foi um SYN sem ACK, ou seja, uma conexao nova e nao a continuacao de outra
+        self.syn_inicial = syn_inicial
+        # balde do histograma de RTT da tabela onde o fluxo esta contado
+        self.balde_rtt = None
+
+    @property
+    def servidor(self):
+        return self.chave[1] if self.chave[0] == self.cliente else self.chave[0]
+
+    @property
+    def duracao(self):
+        return self.ultimo - self.inicio
+
+    @property
+    def rtt(self):
+        # o ponto de captura fica entre as pontas: cada sentido mede so a parte do RTT ate o outro lado
+        ida, volta = self.sentidos
+        if ida.srtt is None or volta.srtt is None:
+            return None
+        return ida.srtt + volta.srtt
+
+    @property
+    def total_bytes(self):
+        return self.sentidos[0].bytes + self.sentidos[1].bytes
+
+    @property
+    def total_pacotes(self):
+        return self.sentidos[0].pacotes + self.sentidos[1].pacotes
+
+    @property
+    def retransmissoes(self):
+        return self.sentidos[0].retransmissoes + self.sentidos[1].retransmissoes
+
+    def atualizar(self, timestamp, sentido, tamanho, flags, seq, ack, dados):
+        lado = self.sentidos[sentido]
+        self.ultimo = timestamp
+        lado.pacotes += 1
+        lado.bytes += tamanho
+        lado.dados += dados
+
+        if flags & RST:
+            self.estado = RESETADA
+            return False
+
+        # um fluxo fechado ou resetado continua contando pacotes, mas nao volta a um estado nao final
+        final = self.estado in ESTADOS_FINAIS
+        if flags & SYN:
+            self.handshake_visto = True
+            if flags & ACK:
+                if self.estado in (SYN_ENVIADO, ESTABELECIDA):
+                    self.estado = SYN_RECEBIDO
+            elif not final:
+                self.estado = SYN_ENVIADO
+                self.instante_syn = timestamp
+
+        tamanho_segmento = dados + (1 if flags & SYN else 0) + (1 if flags & FIN else 0)
+        if tamanho_segmento:
+            if lado.proximo_seq is not None and seq_menor(seq, lado.proximo_seq):
+                lado.retransmissoes += 1
+                # algoritmo de Karn: segmentos retransmitidos nao geram amostra de RTT
+                lado.medicao = None
+            else:
+                fim = (seq + tamanho_segmento) & MASCARA_SEQ
+                if lado.proximo_seq is None or seq_menor(lado.proximo_seq, fim):
+                    lado.proximo_seq = fim
+                if lado.medicao is None:
+                    lado.medicao = (fim, timestamp)
+
+        amostra_rtt = False
+        if flags & ACK:
+            outro = self.sentidos[1 - sentido]
+            if outro.medicao is not None and seq_maior_igual(ack, outro.medicao[0]):
+                outro.registrar_rtt(timestamp - outro.medicao[1])
+                outro.medicao = None
+                amostra_rtt = True
+
+            if self.estado == SYN_RECEBIDO and sentido == 0 and not flags & SYN:
+                self.estado = ESTABELECIDA
+                if self.instante_syn is not None:
+                    self.rtt_handshake = timestamp - self.instante_syn
+
+        if flags & FIN:
+            self.fins |= 1 << sentido
+            if not final:
+                self.estado = FECHADA if self.fins == 3 else FECHANDO
+        return amostra_rtt
+
+    def juntar(self, continuacao):
+        invertido = continuacao.cliente != self.cliente
+        for sentido, lado in enumerate(self.sentidos):
+            outro = 1 - sentido if invertido else sentido
+            lado.somar(continuacao.sentidos[outro])
+            if continuacao.fins & (1 << outro):
+                self.fins |= 1 << sentido
+
+        self.inicio = min(self.inicio, continuacao.inicio)
+        self.ultimo = max(self.ultimo, continuacao.ultimo)
+        if self.estado == SYN_RECEBIDO and continuacao.sentidos[1 if invertido else 0].pacotes:
+            # o ACK do cliente que fecha o handshake veio na continuacao
+            self.estado = ESTABELECIDA
+        # a continuacao comeca no meio do fluxo; o estado so muda se ela viu handshake ou encerramento, e
+        # um fluxo ja encerrado so passa de fechado a resetado
+        if self.estado in ESTADOS_FINAIS:
+            if continuacao.estado == RESETADA:
+                self.estado = RESETADA
+        elif continuacao.handshake_visto or continuacao.fins or continuacao.estado in ESTADOS_FINAIS:
+            self.estado = continuacao.estado
+        if self.fins == 3 and self.estado not in ESTADOS_FINAIS:
+            self.estado = FECHADA
+        self.handshake_visto = self.handshake_visto or continuacao.handshake_visto
+        if self.rtt_handshake is None:
+            self.rtt_handshake = continuacao.rtt_handshake
+
+    def resumo(self):
+        ida, volta = self.sentidos
+        return {
+            'cliente': self.cliente,
+            'servidor': self.servidor,
+            'estado': self.estado,
+            'inicio': self.inicio,
+            'duracao': self.duracao,
+            'pacotes': (ida.pacotes, volta.pacotes),
+            'bytes': (ida.bytes, volta.bytes),
+            'dados': (ida.dados, volta.dados),
+            'retransmissoes': (ida.retransmissoes, volta.retransmissoes),
+            'rtt_handshake': self.rtt_handshake,
+            'rtt': self.rtt,
+            'srtt': (ida.srtt, volta.srtt),
+            'rtt_min': (ida.rtt_min, volta.rtt_min),
+        }
+
+
+class TabelaFluxos:
+    def __init__(self, tempo_ocioso=300.0, tempo_fechado=10.0, max_fluxos=None, max_encerrados=1000,
+                 intervalo_expiracao=1.0, max_maiores=32, guardar_iniciais=False, registrar_alteracoes=False):
+        self.parametros = {
+            'tempo_ocioso': tempo_ocioso,
+            'tempo_fechado': tempo_fechado,
+            'max_fluxos': max_fluxos,
+            'max_encerrados': max_encerrados,
+            'intervalo_expiracao': intervalo_expiracao,
+            'max_maiores': max_maiores,
+        }
+        self.tempo_ocioso = tempo_ocioso
+        self.tempo_fechado = tempo_fechado
+        self.max_fluxos = max_fluxos
+        self.intervalo_expiracao = intervalo_expiracao
+        self.max_maiores = max_maiores
+
+        # as duas tabelas ficam em ordem de ultima atividade, entao a expiracao so olha o comeco delas
+        self.ativos = OrderedDict()
+        self.fechados = OrderedDict()
+        self.encerrados = deque(maxlen=max_encerrados)
+        # numa tabela que cobre um trecho da captura, o primeiro fluxo de cada chave pode continuar um fluxo
+        # do trecho anterior; ele fica guardado, com a ultima expiracao anterior a ele e, por sentido, os
+        # inicios dos primeiros segmentos novos e o instante do primeiro ACK, mesmo depois de encerrado para
+        # mesclar poder junta-los
+        self.iniciais = {} if guardar_iniciais else None
+        # para enviar so a diferenca a outra tabela: fluxos alterados e os que sairam desde a ultima extracao
+        self.alterados = {} if registrar_alteracoes else None
+        self.saidas = []
+        self.contadores_extraidos = dict.fromkeys(CONTADORES, 0)
+
+        self.total_fluxos = 0
+        self.total_encerrados = 0
+        self.descartados_por_limite = 0
+        self.retransmissoes = 0
+        # a expiracao roda no primeiro pacote de cada intervalo de uma grade fixa, e nao a cada intervalo
+        # desde o primeiro pacote, para os trechos de uma captura expirarem nos mesmos instantes que a
+        # leitura sequencial
+        self.primeiro_pacote = None
+        self.ultima_expiracao = None
+        self.proxima_expiracao = None
+
+        # resumo mantido a cada pacote para o relatorio nao percorrer a tabela: estados e RTT dos fluxos
+        # presentes e os candidatos a maiores fluxos; um fluxo que saiu dos candidatos so volta a ser
+        # considerado no proximo pacote dele
+        self.estados = Counter()
+        self.histograma_rtt = HistogramaRtt()
+        self.maiores = {}
+        self.limiar_maiores = 0
+
+    def __len__(self):
+        return len(self.ativos) + len(self.fechados)
+
+    def fluxos(self):
+        yield from self.ativos.values()
+        yield from self.fechados.values()
+
+    def buscar(self, chave):
+        return self.ativos.get(chave) or self.fechados.get(chave)
+
+    def registrar(self, info):
+        ip = tcp = None
+        for camada in info['camadas']:
+            tipo = camada['tipo']
+            if tipo == 'IP':
+                ip = camada
+            elif tipo == 'TCP':
+                tcp = camada
+        if ip is None or tcp is None:
+            return None
+
+        timestamp = info['timestamp']
+        tamanho = info.get('tamanho', 0)
+        # a carga sai do tamanho total do IP, que nao depende do enlace, do preenchimento do quadro nem do
+        # snaplen; sem os cabecalhos na camada (vinda do armazenamento colunar), valem os tamanhos minimos
+        dados = max(0, ip['tamanho'] - ip.get('cabecalho', IPV4.size) - tcp.get('cabecalho', TAMANHO_MINIMO_TCP))
+        flags = CODIGOS_FLAGS_TCP.get(tcp['flags'], 0)
+
+        origem = (ip['origem'], tcp['porta_origem'])
+        destino = (ip['destino'], tcp['porta_destino'])
+        chave = (origem, destino) if origem <= destino else (destino, origem)
+
+        fluxo = self.ativos.get(chave)
+        if fluxo is not None:
+            self.ativos.move_to_end(chave)
+        else:
+            fluxo = self.fechados.get(chave)
+            if fluxo is not None and flags & SYN and not flags & ACK:
+                # a porta foi reutilizada por uma nova conexao depois do encerramento
+                del self.fechados[chave]
+                self._descontar(fluxo)
+                self._encerrar(fluxo)
+                fluxo = None
+
+            if fluxo is not None:
+                self.fechados.move_to_end(chave)
+            else:
+                fluxo = self._criar(chave, origem, destino, flags, timestamp)
+
+        estado_anterior = fluxo.estado
+        sentido = 0 if origem == fluxo.cliente else 1
+        retransmissoes = fluxo.sentidos[sentido].retransmissoes
+        if fluxo.atualizar(timestamp, sentido, tamanho, flags, tcp['sequencia'], tcp['ack'], dados):
+            self._contar_rtt(fluxo)
+        retransmitidos = fluxo.sentidos[sentido].retransmissoes - retransmissoes
+        self.retransmissoes += retransmitidos
+
+        if self.iniciais is not None:
+            inicial, _, inicios, primeiros_acks = self.iniciais[chave]
+            if inicial is fluxo:
+                if (not retransmitidos and (dados or flags & (SYN | FIN)) and
+                        len(inicios[sentido]) < MAX_INICIOS_CONTINUACAO):
+                    inicios[sentido].append(tcp['sequencia'])
+                if flags & ACK and not flags & SYN and primeiros_acks[sentido] is None:
+                    primeiros_acks[sentido] = timestamp
+
+        if fluxo.estado != estado_anterior:
+            self.estados[estado_anterior] -= 1
+            self.estados[fluxo.estado] += 1
+            if fluxo.estado in ESTADOS_FINAIS and estado_anterior not in ESTADOS_FINAIS:
+                self.ativos.pop(chave, None)
+                self.fechados[chave] = fluxo
+
+        if self.maiores.get(chave) is not fluxo and fluxo.total_bytes > self.limiar_maiores:
+            self._considerar_maior(fluxo)
+        if self.alterados is not None:
+            self.alterados[chave] = fluxo
+
+        if self.primeiro_pacote is None:
+            self.primeiro_pacote = self.ultima_expiracao = timestamp
+            self.proxima_expiracao = self._proxima_expiracao(timestamp)
+        elif timestamp >= self.proxima_expiracao:
+            self.expirar(timestamp)
+
+        return fluxo
+
+    def _criar(self, chave, origem, destino, flags, timestamp):
+        # um SYN/ACK sem o SYN indica que o cliente e o destino
+        cliente = destino if flags & SYN and flags & ACK else origem
+        fluxo = Fluxo(chave, cliente, timestamp, syn_inicial=bool(flags & SYN and not flags & ACK))
+        self.ativos[chave] = fluxo
+        self._contar(fluxo)
+        self.total_fluxos += 1
+        if self.iniciais is not None:
+            self.iniciais.setdefault(chave, (fluxo, self.ultima_expiracao, ([], []), [None, None]))
+
+        if self.max_fluxos is not None and len(self) > self.max_fluxos:
+            tabela = self.fechados if self.fechados else self.ativos
+            _, antigo = tabela.popitem(last=False)
+            self._descontar(antigo)
+            self._encerrar(antigo)
+            self.descartados_por_limite += 1
+
+        return fluxo
+
+    def _contar(self, fluxo):
+        self.estados[fluxo.estado] += 1
+        # um fluxo vindo de outra tabela traz o balde contado la
+        fluxo.balde_rtt = None
+        self._contar_rtt(fluxo)
+        if fluxo.total_bytes > self.limiar_maiores:
+            self._considerar_maior(fluxo)
+
+    def _descontar(self, fluxo):
+        self.estados[fluxo.estado] -= 1
+        if fluxo.balde_rtt is not None:
+            self.histograma_rtt.alterar(fluxo.balde_rtt, -1)
+            fluxo.balde_rtt = None
+        if self.maiores.get(fluxo.chave) is fluxo:
+            del self.maiores[fluxo.chave]
+            self.limiar_maiores = 0
+
+    def _contar_rtt(self, fluxo):
+        rtt = fluxo.rtt
+        balde = None if rtt is None else HistogramaRtt.balde(rtt)
+        if balde != fluxo.balde_rtt:
+            if fluxo.balde_rtt is not None:
+                self.histograma_rtt.alterar(fluxo.balde_rtt, -1)
+            if balde is not None:
+                self.histograma_rtt.alterar(balde, 1)
+            fluxo.balde_rtt = balde
+
+    def _considerar_maior(self, fluxo):
+        maiores = self.maiores
+        maiores[fluxo.chave] = fluxo
+        if len(maiores) > self.max_maiores:
+            menor, segundo = heapq.nsmallest(2, maiores.values(), key=lambda candidato: candidato.total_bytes)
+            del maiores[menor.chave]
+            self.limiar_maiores = segundo.total_bytes
+
+    def _encerrar(self, fluxo):
+        self.encerrados.append(fluxo)
+        self.total_encerrados += 1
+        if self.alterados is not None:
+            self.saidas.append(fluxo)
+            if self.alterados.get(fluxo.chave) is fluxo:
+                del self.alterados[fluxo.chave]
+
+    def extrair_alteracoes(self):
+        # o que mudou desde a ultima extracao; aplicar_alteracoes reproduz a mudanca em outra tabela
+        alteracoes = {
+            'alterados': list(self.alterados.values()),
+            'saidas': self.saidas,
+            'contadores': {nome: getattr(self, nome) - self.contadores_extraidos[nome] for nome in CONTADORES},
+        }
+        self.alterados.clear()
+        self.saidas = []
+        self.contadores_extraidos = {nome: getattr(self, nome) for nome in CONTADORES}
+        return alteracoes
+
+    def aplicar_alteracoes(self, alteracoes):
+        # os fluxos que sairam vem antes: um alterado pode ser a conexao nova na mesma chave de um encerrado
+        for fluxo in alteracoes['saidas']:
+            self._remover(fluxo.chave)
+            self.encerrados.append(fluxo)
+        for fluxo in alteracoes['alterados']:
+            self._remover(fluxo.chave)
+            self._inserir(fluxo)
+        for nome, diferenca in alteracoes['contadores'].items():
+            setattr(self, nome, getattr(self, nome) + diferenca)
+
+    def _proxima_expiracao(self, agora):
+        if not self.intervalo_expiracao:
+            return agora
+        return (math.floor(agora / self.intervalo_expiracao) + 1) * self.intervalo_expiracao
+
+    def expirar(self, agora):
+        self.ultima_expiracao = agora
+        self.proxima_expiracao = self._proxima_expiracao(agora)
+        for tabela, limite in ((self.ativos, agora - self.tempo_ocioso), (self.fechados, agora - self.tempo_fechado)):
+            while tabela:
+                chave, fluxo = next(iter(tabela.items()))
+                if fluxo.ultimo >= limite:
+                    break
+                del tabela[chave]
+                self._descontar(fluxo)
+                self._encerrar(fluxo)
+
+    def encerrar_todos(self):
+        for tabela in (self.ativos, self.fechados):
+            for fluxo in tabela.values():
+                self._descontar(fluxo)
+                self._encerrar(fluxo)
+            tabela.clear()
+
+    def continua(self, existente, continuacao, expiracao):
+        # as mesmas regras de registrar: o fluxo segue se a ultima expiracao antes da continuacao nao o
+        # alcancou e se a continuacao nao abre uma conexao nova na porta de um fluxo ja fechado
+        fechado = existente.estado in ESTADOS_FINAIS
+        limite = self.tempo_fechado if fechado else self.tempo_ocioso
+        if expiracao is not None and existente.ultimo < expiracao - limite:
+            return False
+        return not (fechado and continuacao.syn_inicial)
+
+    def mesclar(self, outra, simultanea=False):
+        # outra deve cobrir o trecho seguinte da captura; o primeiro fluxo de cada chave em outra e juntado
+        # ao fluxo da mesma chave nesta tabela e as expiracoes seguem os instantes da leitura sequencial.
+        # O resultado nao e identico ao sequencial: o RTT suavizado recomeca em cada trecho; so os primeiros
+        # MAX_INICIOS_CONTINUACAO segmentos novos de cada sentido sao conferidos contra o fluxo anterior, entao
+        # retransmissoes depois deles podem faltar; uma reutilizacao de porta sem SYN logo depois do corte e
+        # juntada ao fluxo anterior; e o limite max_fluxos vale para cada trecho, nao para a captura toda.
+        # Com simultanea, outra cobre o mesmo periodo em outra interface e os fluxos da mesma chave sao somados
+        self.total_fluxos += outra.total_fluxos
+        self.total_encerrados += outra.total_encerrados
+        self.descartados_por_limite += outra.descartados_por_limite
+        self.retransmissoes += outra.retransmissoes
+
+        if outra.iniciais is not None:
+            candidatos = outra.iniciais
+        else:
+            # sem os iniciais, so os fluxos que seguem na tabela de outra podem ser continuacoes
+            candidatos = {chave: (fluxo, None, ((), ()), (None, None)) for tabela in (outra.ativos, outra.fechados)
+                          for chave, fluxo in tabela.items()}
+
+        # o primeiro pacote de outra so conta como expiracao se, na leitura sequencial, ja tivesse
+        # chegado a hora da proxima expiracao desta tabela
+        inicio_expira = (self.proxima_expiracao is not None and outra.primeiro_pacote is not None and
+                         outra.primeiro_pacote >= self.proxima_expiracao)
+
+        def expiracao_valida(instante):
+            if instante is None or (instante == outra.primeiro_pacote and not inicio_expira):
+                return None
+            return instante
+
+        juntados = {}
+        reabertos = []
+        for chave, (continuacao, expiracao, inicios, primeiros_acks) in candidatos.items():
+            existente = self.buscar(chave)
+            if existente is None:
+                continue
+            self._remover(chave)
+            if not simultanea and not self.continua(existente, continuacao, expiracao_valida(expiracao)):
+                self._encerrar(existente)
+                continue
+            self._completar_no_corte(existente, continuacao, inicios, primeiros_acks)
+            existente.juntar(continuacao)
+            # o fluxo ja foi contado aqui; se a continuacao foi encerrada em outra, o encerramento tambem ja
+            # foi contado la
+            self.total_fluxos -= 1
+            juntados[id(continuacao)] = existente
+
+            # a continuacao de um fluxo ja fechado expirou em outra pelo tempo ocioso; juntada, ela volta a
+            # tabela e passa pela expiracao de fechados abaixo, a menos que outra ja tenha outro fluxo na chave
+            if (not simultanea and existente.estado in ESTADOS_FINAIS and continuacao.estado not in ESTADOS_FINAIS
+                    and outra.buscar(chave) is None):
+                reabertos.append(existente)
+
+        reabertos.sort(key=lambda fluxo: fluxo.ultimo)
+        ids_reabertos = {id(fluxo) for fluxo in reabertos}
+        self.total_encerrados -= len(reabertos)
+        self.encerrados.extend(fluxo for fluxo in (juntados.get(id(fluxo), fluxo) for fluxo in outra.encerrados)
+                               if id(fluxo) not in ids_reabertos)
+        # juntados podem trocar de tabela; a insercao em ordem de ultima atividade mantem a expiracao correta
+        for fluxo in heapq.merge(outra.ativos.values(), outra.fechados.values(), reabertos,
+                                 key=lambda fluxo: fluxo.ultimo):
+            self._inserir(juntados.get(id(fluxo), fluxo))
+
+        if not simultanea and outra.primeiro_pacote is not None:
+            # os fluxos que nao continuaram em outra passam pelas expiracoes dela, e os juntados sao
+            # conferidos de novo com o estado completo; como a condicao so fica mais forte com o tempo,
+            # basta a ultima expiracao
+            ultima = expiracao_valida(outra.ultima_expiracao)
+            if ultima is not None:
+                self.expirar(ultima)
+            self.ultima_expiracao = outra.ultima_expiracao
+            self.proxima_expiracao = outra.proxima_expiracao
+            if self.primeiro_pacote is None:
+                self.primeiro_pacote = outra.primeiro_pacote
+
+    def _completar_no_corte(self, existente, continuacao, inicios, primeiros_acks):
+        invertido = continuacao.cliente != existente.cliente
+        # o handshake comecado antes do corte termina no primeiro ACK do cliente na continuacao
+        ack_cliente = primeiros_acks[1 if invertido else 0]
+        if (existente.estado in (SYN_ENVIADO, SYN_RECEBIDO) and existente.instante_syn is not None and
+                existente.rtt_handshake is None and ack_cliente is not None):
+            existente.rtt_handshake = ack_cliente - existente.instante_syn
+
+        # um segmento que a continuacao tomou por novo e uma retransmissao se fica antes do que o fluxo ja
+        # tinha visto no sentido
+        for sentido, inicios_sentido in enumerate(inicios):
+            proximo_seq = existente.sentidos[1 - sentido if invertido else sentido].proximo_seq
+            if proximo_seq is None:
+                continue
+            retransmitidos = sum(1 for seq in inicios_sentido if seq_menor(seq, proximo_seq))
+            continuacao.sentidos[sentido].retransmissoes += retransmitidos
+            self.retransmissoes += retransmitidos
+
+    def _remover(self, chave):
+        fluxo = self.ativos.pop(chave, None)
+        if fluxo is None:
+            fluxo = self.fechados.pop(chave, None)
+        if fluxo is not None:
+            self._descontar(fluxo)
+
+    def _inserir(self, fluxo):
+        tabela = self.fechados if fluxo.estado in ESTADOS_FINAIS else self.ativos
+        tabela[fluxo.chave] = fluxo
+        self._contar(fluxo)
+
+    def resumo(self, top=5):
+        return resumir_tabelas([self], top)
+
+
+def resumir_tabelas(tabelas, top=5):
+    # soma os resumos mantidos por cada tabela sem junta-las; um fluxo presente em duas tabelas conta duas vezes
+    estados = Counter()
+    histograma = HistogramaRtt()
+    for tabela in tabelas:
+        estados.update(tabela.estados)
+        histograma.somar(tabela.histograma_rtt)
+    maiores = heapq.nlargest(top, (fluxo for tabela in tabelas for fluxo in tabela.maiores.values()),
+                             key=lambda fluxo: fluxo.total_bytes)
+    return {
+        'fluxos_ativos': sum(len(tabela) for tabela in tabelas),
+        'total_fluxos': sum(tabela.total_fluxos for tabela in tabelas),
+        'total_encerrados': sum(tabela.total_encerrados for tabela in tabelas),
+        'descartados_por_limite': sum(tabela.descartados_por_limite for tabela in tabelas),
+        'retransmissoes': sum(tabela.retransmissoes for tabela in tabelas),
+        'estados': {estado: quantidade for estado, quantidade in estados.items() if quantidade},
+        'rtt_mediano': histograma.mediana(),
+        'maiores_fluxos': [fluxo.resumo() for fluxo in maiores],
+    }
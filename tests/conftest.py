@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def gerar_conexoes(caminho, conexoes=80, semente=1):
+    from scapy.all import IP, TCP, Ether, wrpcap
+
+    aleatorio = random.Random(semente)
+    servidor = ('10.9.0.1', 80)
+    eventos = []
+    for indice in range(conexoes):
+        cliente = ('10.0.%d.%d' % (indice // 250, indice % 250 + 1), 30000 + indice)
+        instante = aleatorio.uniform(0, 10)
+
+        def enviar(origem, destino, flags, seq, ack, dados=b''):
+            nonlocal instante
+            instante += aleatorio.expovariate(1 / 0.05)
+            segmento = (Ether() / IP(src=origem[0], dst=destino[0]) /
+                        TCP(sport=origem[1], dport=destino[1], flags=flags, seq=seq, ack=ack) / dados)
+            eventos.append((instante, segmento))
+            if dados and aleatorio.random() < 0.1:
+                eventos.append((instante + aleatorio.uniform(0.01, 0.3), segmento.copy()))
+
+        seq_cliente, seq_servidor = aleatorio.randrange(1 << 31), aleatorio.randrange(1 << 31)
+        enviar(cliente, servidor, 'S', seq_cliente, 0)
+        enviar(servidor, cliente, 'SA', seq_servidor, seq_cliente + 1)
+        enviar(cliente, servidor, 'A', seq_cliente + 1, seq_servidor + 1)
+        ida, volta = seq_cliente + 1, seq_servidor + 1
+        for _ in range(aleatorio.randint(2, 10)):
+            tamanho = aleatorio.randint(1, 400)
+            enviar(cliente, servidor, 'PA', ida, volta, b'x' * tamanho)
+            ida += tamanho
+            tamanho = aleatorio.randint(1, 1400)
+            enviar(servidor, cliente, 'PA', volta, ida, b'y' * tamanho)
+            volta += tamanho
+        enviar(cliente, servidor, 'FA', ida, volta)
+        enviar(servidor, cliente, 'FA', volta, ida + 1)
+        enviar(cliente, servidor, 'A', ida + 1, volta + 1)
+
+    eventos.sort(key=lambda evento: evento[0])
+    for instante, segmento in eventos:
+        segmento.time = 1000 + instante
+    wrpcap(caminho, [segmento for _, segmento in eventos])
+
+
+@pytest.fixture
+def arquivo_conexoes(tmp_path):
+    caminho = str(tmp_path / 'conexoes.pcap')
+    gerar_conexoes(caminho)
+    return caminho
@@ -0,0 +1,34 @@
+from analise_offline import analisar_arquivo
+from captura_pacotes import AnalisadorRede
+
+
+def _resultados(analisador):
+    resumo = analisador.estatisticas.resumo(top=20, agora=analisador.estatisticas.ultimo)
+    resultados = {'pacotes': analisador.contador_pacotes}
+    for campo in ('total_pacotes', 'total_bytes', 'protocolos', 'bytes_por_protocolo', 'top_pares_ip', 'top_portas',
+                  'taxas'):
+        resultados[campo] = resumo[campo]
+    return resultados
+
+
+def test_estatisticas_da_leitura_paralela_iguais_as_da_sequencial(arquivo_conexoes):
+    resultados = []
+    for processos in (0, 3):
+        analisador = AnalisadorRede(max_pacotes=0, intervalo_estatisticas=0)
+        analisar_arquivo(analisador, arquivo_conexoes, processos=processos)
+        resultados.append(_resultados(analisador))
+
+    sequencial, paralelo = resultados
+    assert paralelo == sequencial
+
+
+def test_pacotes_retidos_numerados_na_ordem_do_arquivo(arquivo_conexoes):
+    retidos = []
+    for processos in (0, 3):
+        analisador = AnalisadorRede(max_pacotes=50, intervalo_estatisticas=0)
+        analisar_arquivo(analisador, arquivo_conexoes, processos=processos)
+        retidos.append([(info['numero'], info['timestamp'], info['tamanho']) for info in analisador.pacotes_capturados])
+
+    sequencial, paralelo = retidos
+    assert len(sequencial) == 50
+    assert paralelo == sequencial
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import caminhos_dinamicos
+from caminhos_dinamicos import atualizar_caminhos, indice_filhos
+from Dijkstra import dijkstra, grafo_reverso
+from grafo_csr import GrafoCSR
+
+NUM_NOS = 30
+
+
+def _matriz(semente):
+    gerador = np.random.default_rng(semente)
+    matriz = gerador.integers(1, 30, size=(NUM_NOS, NUM_NOS)).astype(float)
+    matriz[gerador.random((NUM_NOS, NUM_NOS)) < 0.8] = 0
+    np.fill_diagonal(matriz, 0)
+    return matriz
+
+
+FORMATOS = {
+    'matriz': lambda matriz: matriz.copy(),
+    'linhas_densas': lambda matriz: matriz.tolist(),
+    'dicionarios': lambda matriz: [{d: p for d, p in enumerate(linha) if p} for linha in matriz.tolist()],
+    'pares': lambda matriz: [[(d, p) for d, p in enumerate(linha) if p] for linha in matriz.tolist()],
+    'csr': GrafoCSR.de_matriz,
+}
+
+
+def _alteracoes(matriz, gerador, quantidade):
+    arestas = np.argwhere(matriz > 0).tolist()
+    alteracoes = []
+    for _ in range(quantidade):
+        if gerador.random() < 0.3:
+            origem, destino = gerador.integers(NUM_NOS, size=2).tolist()
+            if origem == destino:
+                continue
+        else:
+            origem, destino = arestas[gerador.integers(len(arestas))]
+        peso = float(gerador.choice([0, gerador.integers(1, 60)]))
+        alteracoes.append((origem, destino, peso))
+    return alteracoes
+
+
+def _conferir_arvore(grafo, distancias, anteriores, origem):
+    esperadas, _ = dijkstra(grafo, origem)
+    assert distancias == esperadas
+    for no, anterior in enumerate(anteriores):
+        if anterior != -1:
+            assert distancias[no] == distancias[anterior] + caminhos_dinamicos._peso_atual(grafo, anterior, no)
+
+
+@pytest.mark.parametrize('formato', sorted(FORMATOS))
+@pytest.mark.parametrize('com_reverso', [False, True])
+def test_atualizar_caminhos_confere_com_recalculo_completo(formato, com_reverso):
+    gerador = np.random.default_rng(11)
+    matriz = _matriz(7)
+    grafo = FORMATOS[formato](matriz)
+    reverso = grafo_reverso(grafo) if com_reverso and formato != 'matriz' else None
+
+    distancias, anteriores = dijkstra(grafo, 0)
+    filhos = indice_filhos(anteriores)
+    for _ in range(25):
+        alteracoes = _alteracoes(matriz, gerador, 4)
+        if formato == 'csr':
+            # o CSR so altera pesos de arestas existentes
+            alteracoes = [(o, d, p) for o, d, p in alteracoes if matriz[o, d] > 0]
+        for origem, destino, peso in alteracoes:
+            matriz[origem, destino] = peso
+
+        atualizar_caminhos(grafo, distancias, anteriores, alteracoes, reverso=reverso, filhos=filhos)
+        _conferir_arvore(grafo, distancias, anteriores, 0)
+        assert filhos == indice_filhos(anteriores)
+
+
+def test_atualizar_caminhos_sem_estado_entre_grafos():
+    # dois grafos alternados sem reverso explicito nao podem compartilhar reverso
+    grafos = [FORMATOS['pares'](_matriz(semente)) for semente in (1, 2)]
+    estados = [dijkstra(grafo, 0) for grafo in grafos]
+    gerador = np.random.default_rng(3)
+    for rodada in range(20):
+        indice = rodada % 2
+        grafo = grafos[indice]
+        distancias, anteriores = estados[indice]
+        matriz = np.array([[dict(linha).get(d, 0) for d in range(NUM_NOS)] for linha in grafo], dtype=float)
+        atualizar_caminhos(grafo, distancias, anteriores, _alteracoes(matriz, gerador, 3))
+        _conferir_arvore(grafo, distancias, anteriores, 0)
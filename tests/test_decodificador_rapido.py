@@ -0,0 +1,47 @@
+import pytest
+from scapy.all import ARP, ICMP, IP, TCP, UDP, Ether, IPOption_NOP
+
+from captura_pacotes import extrair_camadas
+from decodificador_rapido import decodificar_quadro
+
+ETHER = Ether(src='00:11:22:33:44:55', dst='66:77:88:99:aa:bb')
+IDA = IP(src='192.168.0.10', dst='10.1.2.3', ttl=57)
+
+QUADROS = {
+    'tcp': ETHER / IDA / TCP(sport=51000, dport=443, flags='PA', seq=123456, ack=654321) / (b'z' * 100),
+    'tcp_sem_flags': ETHER / IDA / TCP(sport=1, dport=2, flags=0),
+    'tcp_todas_as_flags': ETHER / IDA / TCP(sport=1, dport=2, flags='FSRPAUEC'),
+    'tcp_com_opcoes': ETHER / IDA / TCP(sport=51000, dport=443, flags='S',
+                                        options=[('MSS', 1460), ('SAckOK', b''), ('WScale', 7)]),
+    'ip_com_opcoes': ETHER / IP(src='1.2.3.4', dst='5.6.7.8', options=[IPOption_NOP()] * 4) /
+                     TCP(sport=1000, dport=22, flags='A') / b'abc',
+    'tcp_com_preenchimento': Ether(bytes(ETHER / IDA / TCP(sport=1, dport=2, flags='A') / b'a').ljust(60, b'\0')),
+    'udp': ETHER / IDA / UDP(sport=5353, dport=53) / (b'q' * 33),
+    'icmp_echo': ETHER / IDA / ICMP(type=8, id=7, seq=1) / b'ping',
+    'icmp_resposta': ETHER / IDA / ICMP(type=0, id=7, seq=1),
+    'arp': ETHER / ARP(psrc='192.168.0.10', pdst='192.168.0.1'),
+    'fragmento': ETHER / IP(src='1.2.3.4', dst='5.6.7.8', frag=100, proto=6) / (b'f' * 40),
+}
+
+
+@pytest.mark.parametrize('nome', sorted(QUADROS))
+def test_decodificador_confere_com_o_scapy(nome):
+    dados = bytes(QUADROS[nome])
+    assert decodificar_quadro(dados) == extrair_camadas(Ether(dados))
+
+
+@pytest.mark.parametrize('quadro', [
+    # o caminho rapido recusa e deixa para o scapy
+    ETHER / IDA / ICMP(type=3, code=1) / IP(src='10.1.2.3', dst='192.168.0.10') / UDP(),
+    ETHER / IDA / (b'\x00' * 8),
+    Ether(type=0x86DD) / (b'\x60' + b'\x00' * 39),
+])
+def test_quadros_fora_do_caminho_rapido(quadro):
+    assert decodificar_quadro(bytes(quadro)) is None
+
+
+def test_quadros_truncados_nao_geram_erro():
+    dados = bytes(QUADROS['tcp_com_opcoes'])
+    for tamanho in range(len(dados)):
+        camadas = decodificar_quadro(dados[:tamanho])
+        assert camadas is None or camadas[-1]['tipo'] in ('IP', 'TCP')
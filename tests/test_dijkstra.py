@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import Dijkstra
+
+
+def _grafo_aleatorio(num_nos=40, semente=5):
+    gerador = np.random.default_rng(semente)
+    pesos = gerador.integers(1, 20, size=(num_nos, num_nos)).astype(float)
+    pesos[gerador.random((num_nos, num_nos)) < 0.85] = 0
+    np.fill_diagonal(pesos, 0)
+    return [{destino: peso for destino, peso in enumerate(linha) if peso} for linha in pesos.tolist()]
+
+
+def _proibir(monkeypatch, *nomes):
+    for nome in nomes:
+        def falhar(*args, nome=nome):
+            raise AssertionError(f"{nome} chamada numa consulta com tudo montado")
+        monkeypatch.setattr(Dijkstra, nome, falhar)
+
+
+@pytest.mark.parametrize('metodo', ['dijkstra', 'bidirecional'])
+def test_caminho_mais_curto_confere_com_dijkstra(metodo):
+    grafo = _grafo_aleatorio()
+    for origem in range(0, 40, 7):
+        distancias, _ = Dijkstra.dijkstra(grafo, origem)
+        for destino in range(40):
+            distancia, caminho = Dijkstra.caminho_mais_curto(grafo, origem, destino, metodo)
+            assert distancia == distancias[destino]
+            if caminho:
+                assert caminho[0] == origem and caminho[-1] == destino
+                assert sum(grafo[a][b] for a, b in zip(caminho, caminho[1:])) == distancia
+
+
+def test_consultas_reaproveitam_vizinhos_montados(monkeypatch):
+    grafo = _grafo_aleatorio()
+    vizinhos = Dijkstra.funcao_vizinhos(grafo)
+    vizinhos_reversos = Dijkstra.funcao_vizinhos(Dijkstra.grafo_reverso(grafo))
+    esperado = [Dijkstra.caminho_mais_curto(grafo, 0, destino)[0] for destino in range(40)]
+
+    _proibir(monkeypatch, 'funcao_vizinhos', 'grafo_reverso', 'lista_adjacencia')
+    for destino in range(40):
+        assert Dijkstra.caminho_mais_curto(grafo, 0, destino, vizinhos=vizinhos)[0] == esperado[destino]
+        assert Dijkstra.caminho_mais_curto(grafo, 0, destino, 'bidirecional', vizinhos=vizinhos,
+                                           vizinhos_reversos=vizinhos_reversos)[0] == esperado[destino]
+        assert Dijkstra.caminho_mais_curto(grafo, 0, destino, 'a_estrela', lambda no, alvo: 0,
+                                           vizinhos=vizinhos)[0] == esperado[destino]
+
+
+def test_dijkstra_nao_monta_o_grafo_reverso(monkeypatch):
+    grafo = _grafo_aleatorio()
+    _proibir(monkeypatch, 'grafo_reverso')
+    Dijkstra.caminho_mais_curto(grafo, 0, 5)
@@ -0,0 +1,45 @@
+import numpy as np
+
+import Heuristica
+
+
+def _matriz_aleatoria(num_cidades, semente=3):
+    coordenadas = np.random.default_rng(semente).random((num_cidades, 2)) * 100
+    diferencas = coordenadas[:, None, :] - coordenadas[None, :, :]
+    return np.sqrt((diferencas ** 2).sum(axis=2))
+
+
+def test_melhorar_rota_com_listas_de_vizinhos_prontas():
+    matriz = _matriz_aleatoria(60)
+    caminho, _ = Heuristica.vizinho_mais_proximo(matriz, 0)
+    vizinhos = Heuristica._listas_vizinhos(len(matriz), 8, matriz)
+
+    assert Heuristica.melhorar_rota(caminho, matriz, vizinhos=vizinhos) == Heuristica.melhorar_rota(caminho, matriz)
+
+
+def test_multiplos_inicios_montam_as_listas_de_vizinhos_uma_vez(monkeypatch):
+    matriz = _matriz_aleatoria(40)
+    chamadas = []
+    original = Heuristica._listas_vizinhos
+
+    def contar(*args, **kwargs):
+        chamadas.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(Heuristica, '_listas_vizinhos', contar)
+    caminho, distancia, estatisticas = Heuristica.vizinho_mais_proximo_multiplos_inicios(
+        matriz, melhorar=True, processos=1)
+
+    assert chamadas == [40]
+    assert len(estatisticas['distancias']) == 40
+    assert distancia == min(estatisticas['distancias'].values())
+    assert sorted(caminho[:-1]) == list(range(40))
+
+
+def test_multiplos_inicios_em_processos_igual_ao_sequencial():
+    matriz = _matriz_aleatoria(30)
+    sequencial = Heuristica.vizinho_mais_proximo_multiplos_inicios(matriz, melhorar=True, processos=1)
+    paralelo = Heuristica.vizinho_mais_proximo_multiplos_inicios(matriz, melhorar=True, processos=2)
+
+    assert paralelo[1] == sequencial[1]
+    assert paralelo[2]['distancias'] == sequencial[2]['distancias']
@@ -0,0 +1,77 @@
+import pytest
+from scapy.all import IP, TCP, UDP, Ether, rdpcap
+from scapy.utils import PcapNgWriter, PcapWriter
+
+from leitor_pcap import LeitorPcap
+
+
+def _pacotes(quantidade=200):
+    pacotes = []
+    for numero in range(quantidade):
+        if numero % 3:
+            segmento = TCP(sport=40000 + numero % 7, dport=80, seq=numero) / (b'x' * (numero % 50))
+        else:
+            segmento = UDP(sport=5353, dport=53) / (b'y' * (numero % 30))
+        pacote = Ether() / IP(src='10.0.0.1', dst='10.0.0.2') / segmento
+        pacote.time = 1000 + numero * 0.001234
+        pacotes.append(pacote)
+    return pacotes
+
+
+def _gravar(caminho, pacotes, formato):
+    if formato == 'pcapng':
+        escritor = PcapNgWriter(caminho)
+    else:
+        escritor = PcapWriter(caminho, nano=formato == 'pcap_nano', endianness='>' if formato == 'pcap_be' else '')
+    for pacote in pacotes:
+        escritor.write(pacote)
+    escritor.close()
+
+
+@pytest.mark.parametrize('formato', ['pcap', 'pcap_nano', 'pcap_be', 'pcapng'])
+def test_registros_conferem_com_o_scapy(tmp_path, formato):
+    caminho = str(tmp_path / 'captura')
+    _gravar(caminho, _pacotes(), formato)
+    esperados = rdpcap(caminho)
+
+    with LeitorPcap(caminho) as leitor:
+        registros = [(timestamp, linktype, bytes(dados)) for timestamp, linktype, dados in leitor.registros()]
+
+    assert len(registros) == len(esperados)
+    for (timestamp, linktype, dados), pacote in zip(registros, esperados):
+        assert dados == bytes(pacote)
+        assert linktype == 1
+        assert timestamp == pytest.approx(float(pacote.time), abs=1e-6)
+
+
+@pytest.mark.parametrize('formato', ['pcap', 'pcapng'])
+@pytest.mark.parametrize('partes', [1, 2, 7, 500])
+def test_trechos_cobrem_o_arquivo_sem_repetir(tmp_path, formato, partes):
+    caminho = str(tmp_path / 'captura')
+    _gravar(caminho, _pacotes(), formato)
+
+    with LeitorPcap(caminho) as leitor:
+        completos = [(timestamp, bytes(dados)) for timestamp, _, dados in leitor.registros()]
+        trechos = leitor.dividir(partes)
+        por_trecho = [(timestamp, bytes(dados)) for inicio, fim, estado in trechos
+                      for timestamp, _, dados in leitor.registros(inicio, fim, estado)]
+
+    assert len(trechos) <= max(partes, 1) + 1
+    assert por_trecho == completos
+
+
+def test_registro_truncado_no_fim_e_ignorado(tmp_path):
+    caminho = tmp_path / 'captura.pcap'
+    _gravar(str(caminho), _pacotes(10), 'pcap')
+    caminho.write_bytes(caminho.read_bytes()[:-5])
+
+    with LeitorPcap(str(caminho)) as leitor:
+        assert len(list(leitor.registros())) == 9
+
+
+@pytest.mark.parametrize('conteudo', [b'', b'nao e um pcap', b'\xd4\xc3\xb2\xa1\x02\x00'])
+def test_arquivo_invalido(tmp_path, conteudo):
+    caminho = tmp_path / 'invalido.pcap'
+    caminho.write_bytes(conteudo)
+    with pytest.raises(ValueError):
+        LeitorPcap(str(caminho))
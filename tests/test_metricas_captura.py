@@ -0,0 +1,36 @@
+import json
+import threading
+
+from metricas_captura import MetricasCaptura, gravar_instantaneos
+
+
+def test_observacoes_de_varias_threads_nao_se_perdem():
+    metricas = MetricasCaptura()
+
+    def observar():
+        for _ in range(20000):
+            metricas.observar('analise', 1e-5)
+            metricas.incrementar('pacotes')
+
+    threads = [threading.Thread(target=observar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    histograma = metricas.histogramas['analise']
+    assert histograma.quantidade == sum(histograma.baldes) == 80000
+    assert metricas.contadores['pacotes'] == 80000
+    assert metricas.instantaneo()['latencias']['analise']['quantidade'] == 80000
+
+
+def test_gravar_instantaneos_acrescenta_linhas(tmp_path):
+    caminho = tmp_path / 'instantaneos.jsonl'
+    metricas = MetricasCaptura()
+    gravar = gravar_instantaneos(str(caminho))
+    for _ in range(2):
+        metricas.incrementar('pacotes')
+        gravar(metricas.instantaneo())
+
+    linhas = [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+    assert [linha['contadores']['pacotes'] for linha in linhas] == [1, 2]
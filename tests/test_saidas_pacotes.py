@@ -0,0 +1,26 @@
+import json
+
+from saidas_pacotes import SaidaAssincrona, SaidaJsonLinhas
+
+
+def test_saida_assincrona_fecha_arquivos_sem_pacotes_enviados(tmp_path):
+    saida = SaidaJsonLinhas(str(tmp_path / 'log.jsonl'))
+    assincrona = SaidaAssincrona([saida])
+    assincrona.encerrar()
+
+    assert saida.arquivo.closed
+    # depois de encerrada a saida ignora novos pacotes em vez de escrever num arquivo fechado
+    assincrona.enviar({'timestamp': 0})
+    assert assincrona.thread is None
+
+
+def test_saida_assincrona_escreve_e_fecha(tmp_path):
+    caminho = tmp_path / 'log.jsonl'
+    saida = SaidaJsonLinhas(str(caminho))
+    assincrona = SaidaAssincrona([saida], intervalo=0.01)
+    for numero in range(3):
+        assincrona.enviar({'numero': numero})
+    assincrona.encerrar()
+
+    assert saida.arquivo.closed
+    assert [json.loads(linha)['numero'] for linha in caminho.read_text(encoding='utf-8').splitlines()] == [0, 1, 2]
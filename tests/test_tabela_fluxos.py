@@ -0,0 +1,223 @@
+from collections import Counter
+
+import pytest
+
+from decodificador_rapido import TEXTO_FLAGS_TCP
+from tabela_fluxos import ACK, FECHADA, FIN, RESETADA, RST, SYN, TabelaFluxos
+
+CLIENTE = ('10.0.0.1', 40000)
+SERVIDOR = ('10.0.0.2', 80)
+
+
+def pacote(timestamp, origem, destino, flags, seq=0, ack=0, dados=0):
+    return {
+        'timestamp': timestamp,
+        'tamanho': 54 + dados,
+        'camadas': [
+            {'tipo': 'Ethernet', 'origem': '00:00:00:00:00:01', 'destino': '00:00:00:00:00:02', 'protocolo': 0x0800},
+            {'tipo': 'IP', 'origem': origem[0], 'destino': destino[0], 'protocolo': 6, 'ttl': 64,
+             'tamanho': 40 + dados},
+            {'tipo': 'TCP', 'porta_origem': origem[1], 'porta_destino': destino[1], 'flags': TEXTO_FLAGS_TCP[flags],
+             'sequencia': seq, 'ack': ack, 'tamanho': dados},
+        ],
+    }
+
+
+def conferir_contadores(tabela):
+    # os contadores mantidos a cada pacote devem bater com uma varredura da tabela
+    estados = Counter(fluxo.estado for fluxo in tabela.fluxos())
+    assert {estado: quantidade for estado, quantidade in tabela.estados.items() if quantidade} == dict(estados)
+    assert tabela.histograma_rtt.quantidade == sum(1 for fluxo in tabela.fluxos() if fluxo.rtt is not None)
+    assert all(fluxo.estado not in (FECHADA, RESETADA) for fluxo in tabela.ativos.values())
+    assert all(fluxo.estado in (FECHADA, RESETADA) for fluxo in tabela.fechados.values())
+
+
+def test_rst_depois_de_fin_em_fluxo_resetado():
+    tabela = TabelaFluxos()
+    for timestamp, (origem, destino, flags) in enumerate([
+        (CLIENTE, SERVIDOR, SYN),
+        (SERVIDOR, CLIENTE, SYN | ACK),
+        (CLIENTE, SERVIDOR, RST),
+        (SERVIDOR, CLIENTE, FIN | ACK),
+        (CLIENTE, SERVIDOR, RST),
+    ]):
+        tabela.registrar(pacote(timestamp * 0.01, origem, destino, flags, seq=1, ack=1))
+
+    fluxo, = tabela.fluxos()
+    assert fluxo.estado == RESETADA
+    assert fluxo.total_pacotes == 5
+    assert list(tabela.fechados.values()) == [fluxo]
+    conferir_contadores(tabela)
+
+
+def test_fluxo_fechado_nao_volta_a_estado_nao_final():
+    tabela = TabelaFluxos()
+    sequencia = [
+        (CLIENTE, SERVIDOR, SYN, 100, 0),
+        (SERVIDOR, CLIENTE, SYN | ACK, 500, 101),
+        (CLIENTE, SERVIDOR, ACK, 101, 501),
+        (CLIENTE, SERVIDOR, FIN | ACK, 101, 501),
+        (SERVIDOR, CLIENTE, FIN | ACK, 501, 102),
+        (CLIENTE, SERVIDOR, ACK, 102, 502),
+        # FIN e SYN/ACK atrasados depois do encerramento
+        (SERVIDOR, CLIENTE, FIN | ACK, 501, 102),
+        (SERVIDOR, CLIENTE, SYN | ACK, 500, 101),
+    ]
+    for timestamp, (origem, destino, flags, seq, ack) in enumerate(sequencia):
+        tabela.registrar(pacote(timestamp * 0.01, origem, destino, flags, seq, ack))
+
+    fluxo, = tabela.fluxos()
+    assert fluxo.estado == FECHADA
+    assert fluxo.chave in tabela.fechados
+    conferir_contadores(tabela)
+
+
+def test_handshake_dados_e_retransmissao():
+    tabela = TabelaFluxos()
+    sequencia = [
+        (0.000, CLIENTE, SERVIDOR, SYN, 100, 0, 0),
+        (0.010, SERVIDOR, CLIENTE, SYN | ACK, 500, 101, 0),
+        (0.020, CLIENTE, SERVIDOR, ACK, 101, 501, 0),
+        (0.030, CLIENTE, SERVIDOR, ACK, 101, 501, 10),
+        (0.040, CLIENTE, SERVIDOR, ACK, 101, 501, 10),
+        (0.050, SERVIDOR, CLIENTE, ACK, 501, 111, 0),
+    ]
+    for timestamp, origem, destino, flags, seq, ack, dados in sequencia:
+        tabela.registrar(pacote(timestamp, origem, destino, flags, seq, ack, dados))
+
+    fluxo, = tabela.fluxos()
+    assert fluxo.cliente == CLIENTE
+    assert fluxo.rtt_handshake == 0.020
+    assert fluxo.resumo()['dados'] == (20, 0)
+    assert fluxo.resumo()['retransmissoes'] == (1, 0)
+    assert tabela.retransmissoes == 1
+    assert fluxo.rtt is not None
+    conferir_contadores(tabela)
+
+
+def test_porta_reutilizada_depois_do_encerramento_abre_fluxo_novo():
+    tabela = TabelaFluxos()
+    for inicio in (0.0, 1.0):
+        tabela.registrar(pacote(inicio, CLIENTE, SERVIDOR, SYN, 100))
+        tabela.registrar(pacote(inicio + 0.01, SERVIDOR, CLIENTE, RST | ACK, 0, 101))
+
+    assert tabela.total_fluxos == 2
+    assert tabela.total_encerrados == 1
+    assert len(tabela) == 1
+    conferir_contadores(tabela)
+
+
+def _conexao_com_dados(enlace):
+    from scapy.all import IP, TCP
+
+    ida = IP(src=CLIENTE[0], dst=SERVIDOR[0])
+    volta = IP(src=SERVIDOR[0], dst=CLIENTE[0])
+    segmentos = [
+        ida / TCP(sport=CLIENTE[1], dport=SERVIDOR[1], flags='S', seq=100),
+        volta / TCP(sport=SERVIDOR[1], dport=CLIENTE[1], flags='SA', seq=500, ack=101),
+        ida / TCP(sport=CLIENTE[1], dport=SERVIDOR[1], flags='A', seq=101, ack=501),
+        ida / TCP(sport=CLIENTE[1], dport=SERVIDOR[1], flags='PA', seq=101, ack=501) / (b'x' * 10),
+        ida / TCP(sport=CLIENTE[1], dport=SERVIDOR[1], flags='PA', seq=111, ack=501) / (b'y' * 10),
+        volta / TCP(sport=SERVIDOR[1], dport=CLIENTE[1], flags='A', seq=501, ack=121),
+    ]
+    pacotes = []
+    for posicao, segmento in enumerate(segmentos):
+        pacote = enlace() / segmento
+        pacote.time = 1000 + posicao * 0.01
+        pacotes.append(pacote)
+    return pacotes
+
+
+def _fluxo_do_arquivo(tmp_path, pacotes):
+    from scapy.all import wrpcap
+
+    from analise_offline import analisar_arquivo
+    from captura_pacotes import AnalisadorRede
+
+    caminho = str(tmp_path / 'captura.pcap')
+    wrpcap(caminho, pacotes)
+    analisador = AnalisadorRede(max_pacotes=0, intervalo_estatisticas=0, rastrear_fluxos=True)
+    analisar_arquivo(analisador, caminho)
+    fluxo, = analisador.fluxos.fluxos()
+    return analisador.fluxos, fluxo
+
+
+def test_carga_tcp_em_captura_linux_cooked(tmp_path):
+    from scapy.all import CookedLinux
+
+    tabela, fluxo = _fluxo_do_arquivo(tmp_path, _conexao_com_dados(CookedLinux))
+    assert fluxo.resumo()['dados'] == (20, 0)
+    assert tabela.retransmissoes == 0
+
+
+def test_carga_tcp_ignora_preenchimento_ethernet(tmp_path):
+    from scapy.all import Ether
+
+    # quadros minimos de 60 bytes: os segmentos de 10 bytes e os ACKs levam preenchimento
+    pacotes = [Ether(bytes(pacote).ljust(60, b'\0')) for pacote in _conexao_com_dados(Ether)]
+    for posicao, pacote in enumerate(pacotes):
+        pacote.time = 1000 + posicao * 0.01
+    _, fluxo = _fluxo_do_arquivo(tmp_path, pacotes)
+    assert fluxo.resumo()['dados'] == (20, 0)
+
+
+def _resumo_fluxos(tabela):
+    return sorted((fluxo.chave, fluxo.inicio, fluxo.ultimo, fluxo.estado, fluxo.total_pacotes, fluxo.total_bytes,
+                   fluxo.resumo()['dados'], fluxo.resumo()['retransmissoes'], fluxo.rtt_handshake)
+                  for fluxo in tabela.fluxos())
+
+
+def _contadores(tabela):
+    return (tabela.total_fluxos, tabela.total_encerrados, tabela.descartados_por_limite, tabela.retransmissoes)
+
+
+def test_mesclar_trechos_com_corte_no_handshake_e_retransmissao():
+    sequencia = [
+        (0.000, CLIENTE, SERVIDOR, SYN, 100, 0, 0),
+        (0.010, SERVIDOR, CLIENTE, SYN | ACK, 500, 101, 0),
+        # corte: o ACK do cliente e uma retransmissao ficam no segundo trecho
+        (0.020, CLIENTE, SERVIDOR, ACK, 101, 501, 0),
+        (0.030, CLIENTE, SERVIDOR, ACK, 101, 501, 10),
+        (0.040, CLIENTE, SERVIDOR, ACK, 111, 501, 10),
+        (0.050, CLIENTE, SERVIDOR, ACK, 101, 501, 10),
+        (0.060, SERVIDOR, CLIENTE, FIN | ACK, 501, 121, 0),
+        (0.070, CLIENTE, SERVIDOR, FIN | ACK, 121, 502, 0),
+    ]
+    pacotes = [pacote(timestamp, origem, destino, flags, seq, ack, dados)
+               for timestamp, origem, destino, flags, seq, ack, dados in sequencia]
+
+    sequencial = TabelaFluxos()
+    for info in pacotes:
+        sequencial.registrar(info)
+
+    for corte in range(1, len(pacotes)):
+        trechos = [TabelaFluxos(guardar_iniciais=True) for _ in range(2)]
+        for tabela, infos in zip(trechos, (pacotes[:corte], pacotes[corte:])):
+            for info in infos:
+                tabela.registrar(info)
+        mesclada = TabelaFluxos()
+        for tabela in trechos:
+            mesclada.mesclar(tabela)
+
+        assert _resumo_fluxos(mesclada) == _resumo_fluxos(sequencial), corte
+        assert _contadores(mesclada) == _contadores(sequencial), corte
+        conferir_contadores(mesclada)
+
+
+@pytest.mark.parametrize('tempo_ocioso', [300.0, 0.3])
+def test_leitura_paralela_segue_a_sequencial(arquivo_conexoes, tempo_ocioso):
+    from analise_offline import analisar_arquivo
+    from captura_pacotes import AnalisadorRede
+
+    tabelas = []
+    for processos in (0, 3):
+        analisador = AnalisadorRede(max_pacotes=0, intervalo_estatisticas=0, rastrear_fluxos=True,
+                                    tempo_ocioso_fluxos=tempo_ocioso)
+        analisar_arquivo(analisador, arquivo_conexoes, processos=processos)
+        tabelas.append(analisador.fluxos)
+
+    # o RTT suavizado recomeca em cada trecho e fica de fora da comparacao
+    sequencial, paralela = tabelas
+    assert _contadores(paralela) == _contadores(sequencial)
+    assert _resumo_fluxos(paralela) == _resumo_fluxos(sequencial)
+    conferir_contadores(paralela)